@@ -5,15 +5,108 @@ AI Stock Summary Generator
 Generates investment summaries using Gemini AI
 """
 
-import os, json, logging, time, requests
+import os, json, logging, threading, hashlib
 import pandas as pd
+from collections import Counter
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Optional
 from tqdm import tqdm
 from dotenv import load_dotenv
 
+import http_client
+from fetch_engine import TokenBucket, configure_host, limiter_for, log_host_stats
+from llm_cache import DEFAULT_TTL, LLMCache, model_name, shared_cache
+from bilingual import (BATCH_INSTRUCTIONS, BILINGUAL_INSTRUCTIONS, batch_config, bilingual_config,
+                       parse_batch, parse_bilingual)
+
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Model quota (gemini-2.0-flash free tier by default; raise for paid tiers)
+GEMINI_RPM = int(os.getenv('GEMINI_RPM', 15))
+GEMINI_TPM = int(os.getenv('GEMINI_TPM', 1_000_000))
+OUTPUT_TOKEN_BUDGET = 400  # a 3-4 sentence summary, counted against TPM up front
+
+# Batched prompts: how many tickers fit in one request is bounded by the
+# model's output limit (two summaries each), its context window and the TPM
+# bucket; BATCH_MAX also caps how much one bad answer can cost
+GEMINI_MAX_OUTPUT_TOKENS = int(os.getenv('GEMINI_MAX_OUTPUT_TOKENS', 8192))
+GEMINI_CONTEXT_TOKENS = int(os.getenv('GEMINI_CONTEXT_TOKENS', 1_048_576))
+TICKER_PROMPT_TOKENS = 300  # score line + 3 headlines, before the news is in
+BATCH_MAX = 10
+
+def estimate_tokens(prompt: str, output_tokens: int = OUTPUT_TOKEN_BUDGET) -> int:
+    """Conservative prompt + answer token estimate (Hangul runs ~1 token per 2 chars)"""
+    return len(prompt) // 2 + output_tokens
+
+def headline_hash(title: str) -> str:
+    return hashlib.sha1(title.strip().lower().encode('utf-8')).hexdigest()[:12]
+
+class RefreshPolicy:
+    """
+    Decides when a stored summary is regenerated: it is new, failed or has
+    no recorded inputs, the composite score moved by `score_delta` points or
+    more, the grade changed, at least `news_change` of the current headlines
+    were not in its prompt, or it is older than `max_age` seconds. Otherwise
+    the summary is kept, and drift keeps accumulating against the inputs it
+    was written from.
+    """
+    
+    def __init__(self, score_delta: float = 5.0, news_change: float = 0.5, max_age: float = DEFAULT_TTL):
+        self.score_delta = score_delta
+        self.news_change = news_change
+        self.max_age = max_age
+    
+    @staticmethod
+    def _score(data) -> Optional[float]:
+        score = data.get('composite_score')
+        return None if pd.isna(score) else round(float(score), 1)
+    
+    @staticmethod
+    def _grade(data) -> Optional[str]:
+        grade = data.get('grade')
+        return None if pd.isna(grade) else str(grade)
+    
+    @staticmethod
+    def _failed(summary) -> bool:
+        return not isinstance(summary, str) or not summary.strip() or summary in ("Analysis Failed", "No API Key")
+    
+    def inputs(self, data, news) -> Dict:
+        """What a summary was generated from, stored alongside it"""
+        return {
+            'composite_score': self._score(data),
+            'grade': self._grade(data),
+            'news': [headline_hash(n['title']) for n in news if n.get('title')],
+        }
+    
+    def reason(self, entry, data, news=None) -> Optional[str]:
+        """Why `entry` is stale for the current inputs, or None to keep it (news=None skips the news check)"""
+        if not entry:
+            return 'new'
+        if any(self._failed(entry.get(field)) for field in ('summary_ko', 'summary_en')):
+            return 'failed'
+        inputs = entry.get('inputs')
+        if not inputs:
+            return 'no inputs'
+        try:
+            updated = datetime.strptime(entry.get('updated', ''), '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+        except ValueError:
+            return 'age'
+        if (datetime.now(timezone.utc) - updated).total_seconds() > self.max_age:
+            return 'age'
+        old, new = inputs.get('composite_score'), self._score(data)
+        if (old is None) != (new is None) or (new is not None and abs(new - old) >= self.score_delta):
+            return 'score'
+        if inputs.get('grade') != self._grade(data):
+            return 'grade'
+        if news:  # no headlines (fetch failed) is not a reason to regenerate
+            current = {headline_hash(n['title']) for n in news if n.get('title')}
+            if current and len(current - set(inputs.get('news', []))) / len(current) >= self.news_change:
+                return 'news'
+        return None
+
 class NewsCollector:
     def get_news(self, ticker: str):
         # Simplified for brevity - uses Google News RSS
@@ -21,19 +114,63 @@ class NewsCollector:
         try:
             import xml.etree.ElementTree as ET
             url = f"https://news.google.com/rss/search?q={ticker}+stock&hl=en-US&gl=US&ceid=US:en"
-            resp = requests.get(url, timeout=5)
+            resp = limiter_for('google_news').call(
+                http_client.get, url, timeout=5,
+                empty=lambda r: r.status_code == 200 and b'<item>' not in r.content)
             if resp.status_code == 200:
                 root = ET.fromstring(resp.content)
                 for item in root.findall('.//item')[:3]:
                     news.append({'title': item.find('title').text, 'published': item.find('pubDate').text})
-        except: pass
+        except Exception as e:
+            logger.debug(f"News fetch failed for {ticker}: {e}")
         return news
 
 class GeminiGenerator:
-    def __init__(self):
+    def __init__(self, rpm: int = GEMINI_RPM, tpm: int = GEMINI_TPM, cache: LLMCache = None):
         self.key = os.getenv('GOOGLE_API_KEY')
         self.url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+        # Requests/minute caps this process's adaptive Gemini limiter;
+        # tokens/minute is a separate bucket charged with each prompt's
+        # estimate before sending. Both assume no other process is using the
+        # key at the same time (update_all runs Gemini stages one at a time).
+        configure_host('gemini', rpm / 60.0)
+        self.tpm = TokenBucket(tpm / 60.0, burst=tpm)
+        self.cache = cache or shared_cache()
         
+    def _request(self, ticker, prompt, config=None, output_tokens=OUTPUT_TOKEN_BUDGET, valid=None):
+        """Answer text (cached), or None on an HTTP error or an answer `valid` rejects"""
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        if config:
+            payload["generationConfig"] = config
+        
+        def call():
+            self.tpm.acquire(min(estimate_tokens(prompt, output_tokens), self.tpm.burst))
+            resp = limiter_for('gemini').call(http_client.post, f"{self.url}?key={self.key}", json=payload)
+            if resp.status_code != 200:
+                logger.warning(f"Gemini returned HTTP {resp.status_code} for {ticker}")
+                return None
+            text = resp.json()['candidates'][0]['content']['parts'][0]['text']
+            if valid is not None and not valid(text):
+                logger.warning(f"Gemini returned an unusable answer for {ticker}")
+                return None
+            return text
+        
+        # Unchanged score/news inputs reuse the cached answer: no latency, no quota
+        return self.cache.get_or_generate(model_name(self.url), prompt, config, call)
+    
+    @staticmethod
+    def _stock_block(ticker, data, news):
+        news_txt = "\n".join([n['title'] for n in news])
+        score_info = f"Score: {data.get('composite_score')}/100, Quant: {data.get('grade')}"
+        return f"""Stock: {ticker}
+Info: {score_info}
+News: {news_txt}"""
+    
+    def _bilingual_prompt(self, ticker, data, news):
+        return f"""{self._stock_block(ticker, data, news)}
+Req: 3-4 sentence investment summary (money flow, fundamentals, strategy). No emojis.
+{BILINGUAL_INSTRUCTIONS}"""
+    
     def generate(self, ticker, data, news, lang='ko'):
         if not self.key: return "No API Key"
         
@@ -52,20 +189,157 @@ News: {news_txt}
 Req: 3-4 sentence investment summary. No emojis."""
 
         try:
-            payload = {"contents": [{"parts": [{"text": prompt}]}]}
-            resp = requests.post(f"{self.url}?key={self.key}", json=payload, timeout=30)
-            if resp.status_code == 200:
-                return resp.json()['candidates'][0]['content']['parts'][0]['text']
-        except: return "Analysis Failed"
+            return self._request(ticker, prompt)
+        except Exception as e:
+            logger.warning(f"Gemini request failed for {ticker}: {e}")
+            return "Analysis Failed"
+    
+    def generate_bilingual(self, ticker, data, news):
+        """
+        {'ko', 'en'} summaries from a single JSON-mode request. None if the
+        answer is not a valid bilingual object (callers fall back to one
+        generate() per language); 'Analysis Failed' for both if the request
+        itself fails.
+        """
+        if not self.key: return {'ko': "No API Key", 'en': "No API Key"}
+        
+        prompt = self._bilingual_prompt(ticker, data, news)
+        try:
+            text = self._request(ticker, prompt, bilingual_config(), 2 * OUTPUT_TOKEN_BUDGET,
+                                 valid=lambda t: parse_bilingual(t) is not None)
+        except Exception as e:
+            logger.warning(f"Gemini request failed for {ticker}: {e}")
+            return {'ko': "Analysis Failed", 'en': "Analysis Failed"}
+        return parse_bilingual(text)
+    
+    def _input_budget(self):
+        return min(GEMINI_CONTEXT_TOKENS, self.tpm.burst)
+    
+    def batch_size(self, cap=BATCH_MAX):
+        """Tickers per batched request, from the model's output/context budget"""
+        per_ticker = TICKER_PROMPT_TOKENS + 2 * OUTPUT_TOKEN_BUDGET
+        by_output = GEMINI_MAX_OUTPUT_TOKENS // (2 * OUTPUT_TOKEN_BUDGET)
+        return max(1, min(cap, by_output, self._input_budget() // per_ticker))
+    
+    def _pack(self, entries):
+        """Split (ticker, data, news, ...) entries into batches whose actual prompts fit the budget"""
+        batches, batch, used = [], [], 0
+        for entry in entries:
+            need = estimate_tokens(self._stock_block(*entry[:3]), 2 * OUTPUT_TOKEN_BUDGET)
+            if batch and (used + need > self._input_budget() or
+                          2 * OUTPUT_TOKEN_BUDGET * (len(batch) + 1) > GEMINI_MAX_OUTPUT_TOKENS):
+                batches.append(batch)
+                batch, used = [], 0
+            batch.append(entry)
+            used += need
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    def _request_batch(self, batch):
+        tickers = [ticker for ticker, *_ in batch]
+        blocks = "\n\n".join(self._stock_block(*entry[:3]) for entry in batch)
+        prompt = f"""Req: 3-4 sentence investment summary (money flow, fundamentals, strategy) for each stock below. No emojis.
+{BATCH_INSTRUCTIONS}
+
+{blocks}"""
+        payload = {"contents": [{"parts": [{"text": prompt}]}], "generationConfig": batch_config()}
+        self.tpm.acquire(min(estimate_tokens(prompt, 2 * OUTPUT_TOKEN_BUDGET * len(batch)), self.tpm.burst))
+        # Several summaries per answer: allow a longer read than the default
+        resp = limiter_for('gemini').call(http_client.post, f"{self.url}?key={self.key}", json=payload,
+                                          timeout=(5.0, 90.0))
+        if resp.status_code != 200:
+            logger.warning(f"Gemini returned HTTP {resp.status_code} for batch {', '.join(tickers)}")
+            return {}
+        return parse_batch(resp.json()['candidates'][0]['content']['parts'][0]['text'], tickers)
+    
+    def generate_batch(self, entries):
+        """
+        ticker -> {'ko', 'en'} for (ticker, data, news) entries, several
+        tickers per request. Each ticker's answer is cached under its
+        single-ticker bilingual prompt, so reruns and generate_bilingual()
+        reuse it whatever the batch composition. Tickers missing from the
+        result (failed request, malformed entry) are for the caller to retry.
+        """
+        if not self.key: return {}
+        
+        model = model_name(self.url)
+        pairs, todo = {}, []
+        for ticker, data, news in entries:
+            key = self.cache.key(model, self._bilingual_prompt(ticker, data, news), bilingual_config())
+            pair = parse_bilingual(self.cache.get(key))
+            if pair is not None:
+                pairs[ticker] = pair
+            else:
+                todo.append((ticker, data, news, key))
+        
+        for batch in self._pack(todo):
+            try:
+                answers = self._request_batch(batch)
+            except Exception as e:
+                logger.warning(f"Gemini batch request failed: {e}")
+                continue
+            for ticker, _, _, key in batch:
+                if ticker in answers:
+                    pairs[ticker] = answers[ticker]
+                    self.cache.put(key, json.dumps(answers[ticker], ensure_ascii=False), model)
+        return pairs
 
 class AIStockAnalyzer:
-    def __init__(self, data_dir='.'):
+    def __init__(self, data_dir='.', rpm: int = GEMINI_RPM, tpm: int = GEMINI_TPM,
+                 policy: Optional[RefreshPolicy] = None):
         self.data_dir = data_dir
         self.output = os.path.join(data_dir, 'ai_summaries.json')
-        self.gen = GeminiGenerator()
+        self.gen = GeminiGenerator(rpm, tpm, shared_cache(data_dir))
         self.news = NewsCollector()
-        
-    def run(self, top_n=20):
+        self.policy = policy or RefreshPolicy()
+        self._lock = threading.Lock()
+    
+    def _save(self, results):
+        """Atomic write (temp file + os.replace): a crash never leaves a torn file"""
+        tmp = self.output + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.output)
+    
+    def summarize(self, ticker, data, news_future):
+        """Both language summaries for one ticker, once its news has arrived"""
+        news = news_future.result()
+        # One request for both languages, so they cannot disagree; separate
+        # per-language requests only when that answer does not parse
+        pair = self.gen.generate_bilingual(ticker, data, news)
+        if pair is None:
+            pair = {lang: self.gen.generate(ticker, data, news, lang) for lang in ('ko', 'en')}
+        return self._entry(pair, self.policy.inputs(data, news))
+    
+    def summarize_batch(self, rows, news_futures):
+        """
+        ticker -> summary for a group of (ticker, data) rows: one batched
+        request, then individual retries for the tickers it did not cover
+        """
+        entries = [(ticker, data, news_futures[ticker].result()) for ticker, data in rows]
+        pairs = self.gen.generate_batch(entries) if len(entries) > 1 else {}
+        summaries = {}
+        for ticker, data, news in entries:
+            if ticker in pairs:
+                summaries[ticker] = self._entry(pairs[ticker], self.policy.inputs(data, news))
+            else:
+                if len(entries) > 1:
+                    logger.info(f"Retrying {ticker} on its own")
+                summaries[ticker] = self.summarize(ticker, data, news_futures[ticker])
+        return summaries
+    
+    @staticmethod
+    def _entry(pair, inputs):
+        return {
+            'summary': pair['ko'],
+            'summary_ko': pair['ko'],
+            'summary_en': pair['en'],
+            'updated': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'inputs': inputs
+        }
+    
+    def run(self, top_n=20, workers=4, batch=BATCH_MAX):
         csv = os.path.join(self.data_dir, 'smart_money_picks_v2.csv')
         if not os.path.exists(csv): return
         
@@ -75,40 +349,91 @@ class AIStockAnalyzer:
         # Load existing
         if os.path.exists(self.output):
             with open(self.output, encoding='utf-8') as f: results = json.load(f)
+        
+        rows = [row for _, row in df.iterrows()]
+        reasons = Counter()
+        
+        # News is prefetched on its own pool, so the RSS fetch for later
+        # tickers overlaps Gemini generation for earlier ones. Generation runs
+        # on a bounded pool, up to K tickers per request; the RPM/TPM limiters
+        # pace the actual requests.
+        k = self.gen.batch_size(batch)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='news') as news_pool, \
+             ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gemini') as gen_pool, \
+             tqdm(total=0) as progress:
+            news = {row['ticker']: news_pool.submit(self.news.get_news, row['ticker']) for row in rows}
+            futures = {}
             
-        for _, row in tqdm(df.iterrows(), total=len(df)):
-            ticker = row['ticker']
-            if ticker in results: continue # Skip if exists
-            
-            print(f"DEBUG: Processing {ticker}")
-            news = self.news.get_news(ticker)
-            print(f"DEBUG: Got news for {ticker}")
-            
-            summary_ko = self.gen.generate(ticker, row.to_dict(), news, 'ko')
-            print(f"DEBUG: Generated KO summary for {ticker}")
-            
-            summary_en = self.gen.generate(ticker, row.to_dict(), news, 'en')
-            print(f"DEBUG: Generated EN summary for {ticker}")
+            def refresh(stale):
+                progress.total += len(stale)
+                progress.refresh()
+                for i in range(0, len(stale), k):
+                    group = stale[i:i + k]
+                    future = gen_pool.submit(self.summarize_batch, [(row['ticker'], row.to_dict()) for row in group], news)
+                    futures[future] = [row['ticker'] for row in group]
             
-            results[ticker] = {
-                'summary': summary_ko,
-                'summary_ko': summary_ko,
-                'summary_en': summary_en,
-                'updated': os.popen('date -u +"%Y-%m-%dT%H:%M:%SZ"').read().strip()
-            }
+            def stale_rows(candidates, with_news):
+                stale, kept = [], []
+                for row in candidates:
+                    ticker = row['ticker']
+                    reason = self.policy.reason(results.get(ticker), row.to_dict(),
+                                                news[ticker].result() if with_news else None)
+                    if reason:
+                        stale.append(row)
+                        reasons[reason] += 1
+                    else:
+                        kept.append(row)
+                return stale, kept
             
-            # Save incrementally every 5 items
-            if len(results) % 5 == 0:
-                with open(self.output, 'w', encoding='utf-8') as f:
-                    json.dump(results, f, indent=2, ensure_ascii=False)
-                logger.info(f"Saved progress: {len(results)} summaries")
-                
-            time.sleep(1) # Rate limit
+            # Score, grade and age drift are known up front; headline drift
+            # only once each ticker's news is in
+            stale, kept = stale_rows(rows, with_news=False)
+            refresh(stale)
+            stale, kept = stale_rows(kept, with_news=True)
+            refresh(stale)
+            logger.info(f"Refreshing {progress.total} of {len(rows)} summaries, {len(kept)} unchanged "
+                        f"({', '.join(f'{r}: {n}' for r, n in reasons.items())})")
             
-        with open(self.output, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+            for future in as_completed(futures):
+                tickers = futures[future]
+                progress.update(len(tickers))
+                try:
+                    summaries = future.result()
+                except Exception as e:
+                    logger.warning(f"Summary failed for {', '.join(tickers)}: {e}")
+                    continue
+                # Persist every finished group: a crash loses at most the
+                # summaries still in flight
+                with self._lock:
+                    results.update(summaries)
+                    self._save(results)
+        
+        self._save(results)
         logger.info(f"Saved {len(results)} summaries")
+        self.gen.cache.log_stats()
+        log_host_stats()
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dir', default='.')
+    parser.add_argument('--top', type=int, default=5, help='Summarize the top N screener picks')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent tickers (1 = serial)')
+    parser.add_argument('--rpm', type=int, default=GEMINI_RPM, help='Gemini requests per minute quota')
+    parser.add_argument('--tpm', type=int, default=GEMINI_TPM, help='Gemini tokens per minute quota')
+    parser.add_argument('--batch', type=int, default=BATCH_MAX,
+                        help='Max tickers per Gemini request, shrunk to fit the token budget (1 = one per ticker)')
+    parser.add_argument('--score-delta', type=float, default=5.0,
+                        help='Regenerate a summary once its composite score moved this many points')
+    parser.add_argument('--news-change', type=float, default=0.5,
+                        help='Regenerate once this fraction of the current headlines is new')
+    parser.add_argument('--max-age', type=float, default=DEFAULT_TTL / 86400, help='Regenerate summaries older than this (days)')
+    args = parser.parse_args()
+    
+    print(f"Starting AI Summary Generation for Top {args.top} stocks...")
+    policy = RefreshPolicy(args.score_delta, args.news_change, args.max_age * 86400)
+    AIStockAnalyzer(args.dir, rpm=args.rpm, tpm=args.tpm, policy=policy).run(
+        top_n=args.top, workers=max(1, args.workers), batch=max(1, args.batch))
 
 if __name__ == "__main__":
-    print("Starting AI Summary Generation for Top 5 stocks...")
-    AIStockAnalyzer().run(top_n=5)
+    main()
@@ -13,7 +13,9 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import json
-import time
+
+from fetch_engine import FetchEngine, log_host_stats, raise_if_throttled
+from fundamentals_store import FundamentalsStore, INSTITUTIONAL_FIELDS
 
 # Logging Configuration
 logging.basicConfig(
@@ -33,6 +35,7 @@ class SEC13FAnalyzer:
         self.data_dir = data_dir
         self.output_file = os.path.join(data_dir, 'us_13f_holdings.csv')
         self.cache_file = os.path.join(data_dir, 'us_13f_cache.json')
+        self.fundamentals = FundamentalsStore(data_dir)
         
         # SEC EDGAR API base URL
         self.sec_base_url = "https://data.sec.gov"
@@ -44,114 +47,120 @@ class SEC13FAnalyzer:
             'Host': 'data.sec.gov'
         }
         
-    def analyze_institutional_changes(self, tickers: List[str]) -> pd.DataFrame:
-        """
-        Analyze institutional ownership and recent changes
-        Uses yfinance as primary data source
-        """
+    def analyze_ticker(self, ticker: str) -> Optional[Dict]:
+        """Ownership, insider activity and institutional score for one ticker"""
         import yfinance as yf
-        from tqdm import tqdm
         
-        results = []
-        
-        for ticker in tqdm(tickers, desc="Fetching institutional data"):
+        try:
+            stock = yf.Ticker(ticker)
+            info = self.fundamentals.get(ticker, INSTITUTIONAL_FIELDS)
+            
+            # Basic ownership info
+            inst_pct = info.get('heldPercentInstitutions', 0) or 0
+            insider_pct = info.get('heldPercentInsiders', 0) or 0
+            
+            # Float and shares
+            float_shares = info.get('floatShares', 0) or 0
+            shares_outstanding = info.get('sharesOutstanding', 0) or 0
+            short_pct = info.get('shortPercentOfFloat', 0) or 0
+            
+            # Insider transactions
             try:
-                stock = yf.Ticker(ticker)
-                info = stock.info
-                
-                # Basic ownership info
-                inst_pct = info.get('heldPercentInstitutions', 0) or 0
-                insider_pct = info.get('heldPercentInsiders', 0) or 0
-                
-                # Float and shares
-                float_shares = info.get('floatShares', 0) or 0
-                shares_outstanding = info.get('sharesOutstanding', 0) or 0
-                short_pct = info.get('shortPercentOfFloat', 0) or 0
-                
-                # Insider transactions
-                try:
-                    insider_txns = stock.insider_transactions
-                    if insider_txns is not None and len(insider_txns) > 0:
-                        recent = insider_txns.head(10)
-                        buys = len(recent[recent['Transaction'].str.contains('Buy', na=False)])
-                        sells = len(recent[recent['Transaction'].str.contains('Sale', na=False)])
-                        insider_sentiment = 'Buying' if buys > sells else ('Selling' if sells > buys else 'Neutral')
-                    else:
-                        insider_sentiment = 'Unknown'
-                        buys = 0
-                        sells = 0
-                except:
+                insider_txns = stock.insider_transactions
+                if insider_txns is not None and len(insider_txns) > 0:
+                    recent = insider_txns.head(10)
+                    buys = len(recent[recent['Transaction'].str.contains('Buy', na=False)])
+                    sells = len(recent[recent['Transaction'].str.contains('Sale', na=False)])
+                    insider_sentiment = 'Buying' if buys > sells else ('Selling' if sells > buys else 'Neutral')
+                else:
                     insider_sentiment = 'Unknown'
                     buys = 0
                     sells = 0
-                
-                # Institutional holders count
-                try:
-                    inst_holders = stock.institutional_holders
-                    num_inst_holders = len(inst_holders) if inst_holders is not None else 0
-                except:
-                    num_inst_holders = 0
-                
-                # Score calculation (0-100)
-                score = 50
-                
-                # High institutional ownership is generally positive
-                if inst_pct > 0.8:
-                    score += 15
-                elif inst_pct > 0.6:
-                    score += 10
-                elif inst_pct < 0.3:
-                    score -= 10
-                
-                # Insider activity
-                if buys > sells:
-                    score += 15
-                elif sells > buys:
-                    score -= 10
-                
-                # Low short interest is positive
-                if short_pct < 0.03:
-                    score += 5
-                elif short_pct > 0.1:
-                    score -= 10
-                elif short_pct > 0.2:
-                    score -= 20
-                
-                score = max(0, min(100, score))
-                
-                # Determine stage
-                if score >= 70:
-                    stage = "Strong Institutional Support"
-                elif score >= 55:
-                    stage = "Institutional Support"
-                elif score >= 45:
-                    stage = "Neutral"
-                elif score >= 30:
-                    stage = "Institutional Concern"
-                else:
-                    stage = "Strong Institutional Selling"
-                
-                results.append({
-                    'ticker': ticker,
-                    'institutional_pct': round(inst_pct * 100, 2),
-                    'insider_pct': round(insider_pct * 100, 2),
-                    'short_pct': round(short_pct * 100, 2),
-                    'float_shares_m': round(float_shares / 1e6, 2) if float_shares else 0,
-                    'num_inst_holders': num_inst_holders,
-                    'insider_buys': buys,
-                    'insider_sells': sells,
-                    'insider_sentiment': insider_sentiment,
-                    'institutional_score': score,
-                    'institutional_stage': stage
-                })
-                
-                time.sleep(0.1)  # Rate limiting
-                
             except Exception as e:
-                logger.debug(f"Error analyzing {ticker}: {e}")
-                continue
+                raise_if_throttled(e)
+                insider_sentiment = 'Unknown'
+                buys = 0
+                sells = 0
+            
+            # Institutional holders count
+            try:
+                inst_holders = stock.institutional_holders
+                num_inst_holders = len(inst_holders) if inst_holders is not None else 0
+            except Exception as e:
+                raise_if_throttled(e)
+                num_inst_holders = 0
+            
+            # Score calculation (0-100)
+            score = 50
+            
+            # High institutional ownership is generally positive
+            if inst_pct > 0.8:
+                score += 15
+            elif inst_pct > 0.6:
+                score += 10
+            elif inst_pct < 0.3:
+                score -= 10
+            
+            # Insider activity
+            if buys > sells:
+                score += 15
+            elif sells > buys:
+                score -= 10
+            
+            # Low short interest is positive
+            if short_pct < 0.03:
+                score += 5
+            elif short_pct > 0.1:
+                score -= 10
+            elif short_pct > 0.2:
+                score -= 20
+            
+            score = max(0, min(100, score))
+            
+            # Determine stage
+            if score >= 70:
+                stage = "Strong Institutional Support"
+            elif score >= 55:
+                stage = "Institutional Support"
+            elif score >= 45:
+                stage = "Neutral"
+            elif score >= 30:
+                stage = "Institutional Concern"
+            else:
+                stage = "Strong Institutional Selling"
+            
+            return {
+                'ticker': ticker,
+                'institutional_pct': round(inst_pct * 100, 2),
+                'insider_pct': round(insider_pct * 100, 2),
+                'short_pct': round(short_pct * 100, 2),
+                'float_shares_m': round(float_shares / 1e6, 2) if float_shares else 0,
+                'num_inst_holders': num_inst_holders,
+                'insider_buys': buys,
+                'insider_sells': sells,
+                'insider_sentiment': insider_sentiment,
+                'institutional_score': score,
+                'institutional_stage': stage
+            }
+            
+        except Exception as e:
+            raise_if_throttled(e)
+            logger.debug(f"Error analyzing {ticker}: {e}")
+            return None
+    
+    def analyze_institutional_changes(self, tickers: List[str]) -> pd.DataFrame:
+        """
+        Analyze institutional ownership and recent changes
+        Uses yfinance as primary data source
+        """
+        # Up to three Yahoo requests per ticker (.info when stale, insider
+        # transactions, institutional holders), paced by the shared bucket
+        engine = FetchEngine('yahoo')
+        results = engine.map(self.analyze_ticker, tickers, cost=3, desc="Fetching institutional data")
         
-        return pd.DataFrame(results)
+        self.fundamentals.save()
+        log_host_stats()
+        return pd.DataFrame([r for r in results if r is not None])
     
     def run(self) -> pd.DataFrame:
         """Run institutional analysis for stocks in the data directory"""
@@ -12,12 +12,15 @@ import logging
 import pandas as pd
 import numpy as np
 import yfinance as yf
-import requests
 from datetime import datetime
 from typing import Dict, List, Optional
 from tqdm import tqdm
 from dotenv import load_dotenv
 
+import http_client
+from fetch_engine import limiter_for
+from llm_cache import model_name, shared_cache
+
 # Logging Configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -106,13 +109,23 @@ class ETFFlowAnalyzer:
         Provide a concise 3-sentence summary in Korean."""
         
         url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent"
-        try:
-            payload = {"contents": [{"parts": [{"text": prompt}]}]}
-            resp = requests.post(f"{url}?key={api_key}", json=payload)
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        
+        def call():
+            resp = limiter_for('gemini').call(http_client.post, f"{url}?key={api_key}", json=payload)
             if resp.status_code == 200:
                 return resp.json()['candidates'][0]['content']['parts'][0]['text']
+        
+        cache = shared_cache(self.data_dir)
+        try:
+            # Same top-3/bottom-3 lists as a recent run -> cached answer
+            text = cache.get_or_generate(model_name(url), prompt, None, call)
+            if text:
+                return text
         except Exception as e:
             logger.error(f"AI Generation Error: {e}")
+        finally:
+            cache.log_stats()
         return "AI Analysis Unavailable"
 
     def run(self):
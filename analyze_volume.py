@@ -13,6 +13,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from tqdm import tqdm
 
+from price_store import PriceStore
+
 # Logging Configuration
 logging.basicConfig(
     level=logging.INFO,
@@ -21,23 +23,38 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def whole_volume(volume: pd.Series) -> bool:
+    """
+    True when every volume is a whole number. The price store keeps volume
+    as float64, so OBV (a running sum of volumes) is cast back to int64 to
+    write it the way an integer volume column would ("1234", not "1234.0").
+    """
+    values = volume.to_numpy(dtype=np.float64)
+    return bool(np.isfinite(values).all() and (values == np.round(values)).all())
+
+
 class VolumeAnalyzer:
     """Volume-based technical analysis for supply/demand detection"""
     
+    # Trailing bars kept per ticker in the indicator state:
+    # 20-bar summary window + 19 bars of warm-up for the 20-day volume SMA
+    STATE_BARS = 40
+    PRICE_COLUMNS = ['name', 'high', 'low', 'current_price', 'volume']
+    CUMULATIVE_COLUMNS = ['obv', 'ad_line', 'cum_pv', 'cum_vol']
+    
     def __init__(self, data_dir: str = '.'):
         self.data_dir = data_dir
-        self.prices_file = os.path.join(data_dir, 'us_daily_prices.csv')
+        self.store = PriceStore(data_dir)
         self.output_file = os.path.join(data_dir, 'us_volume_analysis.csv')
+        self.state_file = os.path.join(data_dir, 'us_volume_state.parquet')
         
     def load_prices(self) -> pd.DataFrame:
-        """Load daily price data"""
-        if not os.path.exists(self.prices_file):
-            raise FileNotFoundError(f"Price file not found: {self.prices_file}")
+        """Load daily price data (only the columns the indicators need)"""
+        if not self.store.exists() and not os.path.exists(self.store.legacy_csv):
+            raise FileNotFoundError(f"Price store not found: {self.store.root}")
         
-        logger.info(f"📂 Loading prices from {self.prices_file}")
-        df = pd.read_csv(self.prices_file)
-        df['date'] = pd.to_datetime(df['date'], utc=True).dt.tz_localize(None)
-        return df
+        logger.info(f"📂 Loading prices from {self.store.root}")
+        return self.store.read(columns=self.PRICE_COLUMNS)
     
     def calculate_obv(self, df: pd.DataFrame) -> pd.Series:
         """
@@ -46,15 +63,11 @@ class VolumeAnalyzer:
         - Price down: Subtract volume
         - Price unchanged: No change
         """
-        obv = [0]
-        for i in range(1, len(df)):
-            if df['current_price'].iloc[i] > df['current_price'].iloc[i-1]:
-                obv.append(obv[-1] + df['volume'].iloc[i])
-            elif df['current_price'].iloc[i] < df['current_price'].iloc[i-1]:
-                obv.append(obv[-1] - df['volume'].iloc[i])
-            else:
-                obv.append(obv[-1])
-        return pd.Series(obv, index=df.index)
+        direction = np.sign(df['current_price'].diff()).fillna(0)
+        obv = (direction * df['volume']).cumsum()
+        if whole_volume(df['volume']):
+            obv = obv.astype('int64')
+        return obv
     
     def calculate_ad_line(self, df: pd.DataFrame) -> pd.Series:
         """
@@ -103,6 +116,45 @@ class VolumeAnalyzer:
         typical_price = (df['high'] + df['low'] + df['current_price']) / 3
         return (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
     
+    def score_supply_demand(self, obv_change, ad_change, vol_ratio, mfi_current):
+        """
+        Supply/Demand Score (0-100) and stage.
+        Works element-wise on scalars or arrays (one entry per ticker).
+        """
+        obv_change = np.asarray(obv_change)
+        ad_change = np.asarray(ad_change)
+        vol_ratio = np.asarray(vol_ratio)
+        mfi_current = np.asarray(mfi_current)
+        
+        score = np.full(obv_change.shape, 50)
+        
+        # OBV contribution
+        score += np.select(
+            [obv_change > 10, obv_change > 5, obv_change < -10, obv_change < -5],
+            [15, 10, -15, -10], 0)
+        
+        # A/D contribution
+        score += np.select(
+            [ad_change > 10, ad_change > 5, ad_change < -10, ad_change < -5],
+            [15, 10, -15, -10], 0)
+        
+        # Volume ratio contribution
+        score += np.select([vol_ratio > 1.5, vol_ratio > 1.2, vol_ratio < 0.7], [10, 5, -5], 0)
+        
+        # MFI contribution
+        # >70: overbought but with buying pressure, <30: oversold, possible capitulation
+        score += np.select([mfi_current > 70, mfi_current < 30], [5, -5], 0)
+        
+        score = np.clip(score, 0, 100)
+        
+        # Determine stage
+        stage = np.select(
+            [score >= 70, score >= 55, score >= 45, score >= 30],
+            ["Strong Accumulation", "Accumulation", "Neutral", "Distribution"],
+            "Strong Distribution")
+        
+        return score, stage
+    
     def analyze_supply_demand(self, df: pd.DataFrame) -> Dict:
         """
         Comprehensive supply/demand analysis
@@ -141,56 +193,8 @@ class VolumeAnalyzer:
         # MFI current value
         mfi_current = mfi.iloc[-1] if not pd.isna(mfi.iloc[-1]) else 50
         
-        # Supply/Demand Score (0-100)
-        score = 50
-        
-        # OBV contribution
-        if obv_change > 10:
-            score += 15
-        elif obv_change > 5:
-            score += 10
-        elif obv_change < -10:
-            score -= 15
-        elif obv_change < -5:
-            score -= 10
-        
-        # A/D contribution
-        if ad_change > 10:
-            score += 15
-        elif ad_change > 5:
-            score += 10
-        elif ad_change < -10:
-            score -= 15
-        elif ad_change < -5:
-            score -= 10
-        
-        # Volume ratio contribution
-        if vol_ratio > 1.5:
-            score += 10
-        elif vol_ratio > 1.2:
-            score += 5
-        elif vol_ratio < 0.7:
-            score -= 5
-        
-        # MFI contribution
-        if mfi_current > 70:
-            score += 5  # Overbought but with buying pressure
-        elif mfi_current < 30:
-            score -= 5  # Oversold, possible capitulation
-        
-        score = max(0, min(100, score))
-        
-        # Determine stage
-        if score >= 70:
-            stage = "Strong Accumulation"
-        elif score >= 55:
-            stage = "Accumulation"
-        elif score >= 45:
-            stage = "Neutral"
-        elif score >= 30:
-            stage = "Distribution"
-        else:
-            stage = "Strong Distribution"
+        score, stage = self.score_supply_demand(obv_change, ad_change, vol_ratio, mfi_current)
+        score, stage = int(score), str(stage)
         
         return {
             'date': latest['date'],
@@ -206,17 +210,139 @@ class VolumeAnalyzer:
             'supply_demand_stage': stage
         }
     
-    def run(self) -> pd.DataFrame:
-        """Run volume analysis for all stocks"""
-        logger.info("🚀 Starting Volume Analysis...")
+    def compute_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Cross-sectional engine: OBV, A/D line, MFI, volume SMA and surge flags
+        for every ticker in one grouped, vectorized pass.
+        df must be sorted by (ticker, date).
+        
+        Rows flagged state_row=True are trailing bars restored from the
+        indicator state: their cumulative columns are taken as-is and the
+        following new bars continue the running sums from them.
+        """
+        df = df.copy()
+        by_ticker = df['ticker']
         
-        # Load data
-        df = self.load_prices()
+        # Row offsets where each ticker's contiguous block starts
+        tickers = by_ticker.to_numpy()
+        starts = np.flatnonzero(np.r_[True, tickers[1:] != tickers[:-1]]) if len(df) else np.empty(0, dtype=int)
         
-        # Get unique tickers
-        tickers = df['ticker'].unique()
-        logger.info(f"📊 Analyzing {len(tickers)} stocks")
+        state_rows = df['state_row'].to_numpy(dtype=bool) if 'state_row' in df.columns else np.zeros(len(df), dtype=bool)
+        
+        def grouped_cumsum(series: pd.Series, name: str) -> pd.Series:
+            # Sequential per-block cumsum (same summation order as Series.cumsum; NaN rows stay NaN)
+            values = series.to_numpy(dtype=np.float64)
+            known = df[name].to_numpy(dtype=np.float64) if name in df.columns else None
+            out = np.empty_like(values)
+            for lo, hi in zip(starts, np.r_[starts[1:], len(values)]):
+                # State rows precede new rows within a block
+                k = lo + int(state_rows[lo:hi].sum())
+                carry = 0.0
+                if k > lo:
+                    out[lo:k] = known[lo:k]
+                    prior = known[lo:k][~np.isnan(known[lo:k])]
+                    carry = prior[-1] if len(prior) else 0.0
+                out[k:hi] = np.nancumsum(np.r_[carry, values[k:hi]])[1:]
+            out[np.isnan(values) & ~state_rows] = np.nan
+            return pd.Series(out, index=series.index)
+        
+        def grouped_rolling(series: pd.Series, period: int, how: str) -> pd.Series:
+            rolled = getattr(series.groupby(by_ticker, sort=False).rolling(window=period), how)()
+            return rolled.reset_index(level=0, drop=True)
+        
+        # OBV
+        direction = np.sign(df.groupby('ticker', sort=False)['current_price'].diff()).fillna(0)
+        df['obv'] = grouped_cumsum(direction * df['volume'], 'obv')
+        if whole_volume(df['volume']):
+            df['obv'] = df['obv'].astype('int64')
+        
+        # A/D Line
+        high_low = (df['high'] - df['low']).replace(0, 0.0001)
+        clv = ((df['current_price'] - df['low']) - (df['high'] - df['current_price'])) / high_low
+        df['ad_line'] = grouped_cumsum(clv * df['volume'], 'ad_line')
+        
+        # VWAP accumulators
+        typical_price = (df['high'] + df['low'] + df['current_price']) / 3
+        money_flow = typical_price * df['volume']
+        df['cum_pv'] = grouped_cumsum(money_flow, 'cum_pv')
+        df['cum_vol'] = grouped_cumsum(df['volume'], 'cum_vol')
+        df['vwap'] = df['cum_pv'] / df['cum_vol']
+        
+        # MFI (14)
+        delta = typical_price.groupby(by_ticker, sort=False).diff()
+        positive_mf = grouped_rolling(money_flow.where(delta > 0, 0), 14, 'sum')
+        negative_mf = grouped_rolling(money_flow.where(delta < 0, 0), 14, 'sum')
+        df['mfi'] = 100 - (100 / (1 + positive_mf / negative_mf.replace(0, 0.0001)))
+        
+        # Volume SMA (20) and surge flags
+        df['vol_sma'] = grouped_rolling(df['volume'], 20, 'mean')
+        df['vol_surge'] = df['volume'] > (df['vol_sma'] * 2.0)
+        
+        return df
+    
+    def summarize_indicators(self, df: pd.DataFrame, min_rows: int = 30,
+                             history_rows: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+        """
+        Reduce indicator columns (from compute_indicators) to one
+        us_volume_analysis.csv row per ticker, using the trailing 20 bars.
+        history_rows gives each ticker's full history length when df only
+        holds its trailing bars.
+        """
+        if history_rows is not None:
+            sizes = df['ticker'].map(history_rows)
+        else:
+            sizes = df.groupby('ticker', sort=False)['ticker'].transform('size')
+        df = df[sizes >= min_rows]
+        if df.empty:
+            return pd.DataFrame()
+        
+        # Trailing 20 bars per ticker as a (tickers x 20) matrix; column -1 is the latest bar
+        tail = df.groupby('ticker', sort=False).tail(20)
+        def matrix(col):
+            return tail[col].to_numpy(dtype=np.float64).reshape(-1, 20)
+        
+        obv, ad, volume = matrix('obv'), matrix('ad_line'), matrix('volume')
+        obv_latest = tail['obv'].to_numpy().reshape(-1, 20)[:, -1]
+        surge = tail['vol_surge'].to_numpy().reshape(-1, 20)
+        latest = tail.groupby('ticker', sort=False).tail(1)
         
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # OBV / A/D Trend (20-day)
+            obv_change = np.where(obv[:, 0] != 0, (obv[:, -1] - obv[:, 0]) / np.abs(obv[:, 0]) * 100, 0)
+            ad_change = np.where(ad[:, 0] != 0, (ad[:, -1] - ad[:, 0]) / np.abs(ad[:, 0]) * 100, 0)
+            
+            # Volume Ratio (5-day avg vs 20-day avg)
+            vol_5d = np.nanmean(volume[:, -5:], axis=1)
+            vol_20d = np.nanmean(volume, axis=1)
+            vol_ratio = np.where(vol_20d > 0, vol_5d / vol_20d, 1)
+        
+        mfi_current = latest['mfi'].fillna(50).to_numpy()
+        score, stage = self.score_supply_demand(obv_change, ad_change, vol_ratio, mfi_current)
+        
+        return pd.DataFrame({
+            'ticker': latest['ticker'].to_numpy(),
+            'name': latest['name'].to_numpy() if 'name' in latest.columns else latest['ticker'].to_numpy(),
+            'date': latest['date'].to_numpy(),
+            'obv': obv_latest,
+            'obv_change_20d': np.round(obv_change, 2),
+            'ad_line': ad[:, -1],
+            'ad_change_20d': np.round(ad_change, 2),
+            'mfi': np.round(mfi_current, 1),
+            'vol_ratio_5d_20d': np.round(vol_ratio, 2),
+            'surge_count_5d': surge[:, -5:].sum(axis=1).astype(int),
+            'surge_count_20d': surge.sum(axis=1).astype(int),
+            'supply_demand_score': score,
+            'supply_demand_stage': stage
+        })
+    
+    def analyze_universe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Whole-universe supply/demand analysis in one vectorized pass"""
+        df = df.sort_values(['ticker', 'date'], kind='stable').reset_index(drop=True)
+        return self.summarize_indicators(self.compute_indicators(df))
+    
+    def analyze_per_ticker(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Reference implementation: filter and analyze one ticker at a time"""
+        tickers = df['ticker'].unique()
         results = []
         
         for ticker in tqdm(tickers, desc="Analyzing volume"):
@@ -235,8 +361,130 @@ class VolumeAnalyzer:
                 }
                 results.append(result)
         
-        # Create DataFrame
-        results_df = pd.DataFrame(results)
+        return pd.DataFrame(results)
+    
+    def load_state(self) -> pd.DataFrame:
+        """Load per-ticker indicator state (trailing bars with running cumulative values)"""
+        if not os.path.exists(self.state_file):
+            return pd.DataFrame()
+        return pd.read_parquet(self.state_file)
+    
+    def save_state(self, df: pd.DataFrame, history_rows: Dict[str, int]):
+        """Persist the trailing STATE_BARS rows per ticker for the next incremental run"""
+        tail = df.groupby('ticker', sort=False).tail(self.STATE_BARS)
+        cols = ['ticker', 'date'] + self.PRICE_COLUMNS + self.CUMULATIVE_COLUMNS
+        state = tail[[c for c in cols if c in tail.columns]].copy()
+        state['history_rows'] = state['ticker'].map(history_rows).astype('int64')
+        
+        tmp = self.state_file + '.tmp'
+        state.to_parquet(tmp, index=False)
+        os.replace(tmp, self.state_file)
+    
+    def plan_incremental(self, index: Dict, state: pd.DataFrame):
+        """
+        Split tickers into (incremental, full recompute) using the store index
+        and the saved state. Returns (incremental tickers, full tickers, new bars).
+        A ticker is recomputed from scratch when it has no state, when its
+        history shrank or moved backwards, or when the stored last bar no longer
+        matches the state (history rewritten).
+        """
+        if state.empty:
+            return [], sorted(index), pd.DataFrame()
+        
+        last = state.groupby('ticker', sort=False).tail(1).set_index('ticker')
+        incremental, full = [], []
+        for ticker, meta in index.items():
+            if ticker not in last.index:
+                full.append(ticker)
+            elif meta['rows'] < last.at[ticker, 'history_rows'] or pd.Timestamp(meta['last_date']) < last.at[ticker, 'date']:
+                full.append(ticker)
+            else:
+                incremental.append(ticker)
+        
+        if not incremental:
+            return [], full, pd.DataFrame()
+        
+        # One read for every incremental ticker, starting at its last stored bar
+        last_dates = last.loc[incremental, 'date']
+        fresh = self.store.read(incremental, columns=self.PRICE_COLUMNS, start=last_dates.min())
+        fresh = fresh[fresh['date'] >= fresh['ticker'].map(last_dates)]
+        
+        # Consistency check: first bar == state's last bar, and the row count adds up
+        first = fresh.groupby('ticker', sort=False).head(1).set_index('ticker')
+        counts = fresh.groupby('ticker', sort=False).size()
+        rewritten = []
+        for ticker in incremental:
+            expected_new = index[ticker]['rows'] - last.at[ticker, 'history_rows']
+            ok = (
+                ticker in first.index
+                and first.at[ticker, 'date'] == last.at[ticker, 'date']
+                and np.isclose(first.at[ticker, 'current_price'], last.at[ticker, 'current_price'], equal_nan=True)
+                and np.isclose(first.at[ticker, 'volume'], last.at[ticker, 'volume'], equal_nan=True)
+                and counts.get(ticker, 0) - 1 == expected_new
+            )
+            if not ok:
+                rewritten.append(ticker)
+        
+        if rewritten:
+            logger.info(f"♻️ History rewritten for {len(rewritten)} tickers; recomputing them in full")
+            incremental = [t for t in incremental if t not in set(rewritten)]
+            full.extend(rewritten)
+        
+        new_bars = fresh[fresh['ticker'].isin(incremental) & (fresh['date'] > fresh['ticker'].map(last_dates))]
+        return incremental, full, new_bars
+    
+    def analyze_incremental(self) -> pd.DataFrame:
+        """
+        Fold only the bars added since the last run into the saved indicator
+        state; tickers without usable state fall back to a full recompute.
+        """
+        index = self.store.load_index()['tickers']
+        state = self.load_state()
+        incremental, full, new_bars = self.plan_incremental(index, state)
+        
+        logger.info(f"📊 Incremental: {len(incremental)} tickers, {len(new_bars)} new bars; "
+                    f"full recompute: {len(full)} tickers")
+        
+        parts = []
+        if incremental:
+            restored = state[state['ticker'].isin(incremental)].copy()
+            restored['state_row'] = True
+            new_rows = new_bars.copy()
+            new_rows['state_row'] = False
+            parts.extend([restored.drop(columns=['history_rows']), new_rows])
+        if full:
+            history = self.store.read(full, columns=self.PRICE_COLUMNS)
+            history['state_row'] = False
+            parts.append(history)
+        
+        if not parts:
+            return pd.DataFrame()
+        
+        frame = pd.concat(parts, ignore_index=True)
+        frame = frame.sort_values(['ticker', 'date'], kind='stable').reset_index(drop=True)
+        
+        history_rows = {t: int(index[t]['rows']) for t in incremental + full}
+        indicators = self.compute_indicators(frame)
+        self.save_state(indicators, history_rows)
+        return self.summarize_indicators(indicators, history_rows=history_rows)
+    
+    def run(self, per_ticker: bool = False, full: bool = False) -> pd.DataFrame:
+        """Run volume analysis for all stocks (incremental when indicator state exists)"""
+        logger.info("🚀 Starting Volume Analysis...")
+        
+        if per_ticker:
+            results_df = self.analyze_per_ticker(self.load_prices())
+        elif not full and self.store.exists() and os.path.exists(self.state_file):
+            results_df = self.analyze_incremental()
+        else:
+            # Full recompute from the whole history, then seed the state
+            df = self.load_prices()
+            logger.info(f"📊 Analyzing {df['ticker'].nunique()} stocks")
+            df = df.sort_values(['ticker', 'date'], kind='stable').reset_index(drop=True)
+            indicators = self.compute_indicators(df)
+            history_rows = indicators.groupby('ticker', sort=False).size().to_dict()
+            self.save_state(indicators, history_rows)
+            results_df = self.summarize_indicators(indicators)
         
         # Save results
         results_df.to_csv(self.output_file, index=False)
@@ -251,17 +499,18 @@ class VolumeAnalyzer:
         
         return results_df
 
-
 def main():
     """Main execution"""
     import argparse
     
     parser = argparse.ArgumentParser(description='US Stock Volume Analysis')
     parser.add_argument('--dir', default='.', help='Data directory')
+    parser.add_argument('--per-ticker', action='store_true', help='Use the per-ticker reference loop')
+    parser.add_argument('--full', action='store_true', help='Recompute from full history (ignore saved state)')
     args = parser.parse_args()
     
     analyzer = VolumeAnalyzer(data_dir=args.dir)
-    results = analyzer.run()
+    results = analyzer.run(per_ticker=args.per_ticker, full=args.full)
     
     # Show top 10 accumulation stocks
     if not results.empty:
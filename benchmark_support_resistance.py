@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Support / Resistance Benchmark
+Compares the original per-bar .iloc pivot loop with the rolling-window
+detector on synthetic daily and intraday series
+"""
+
+import time
+import warnings
+import argparse
+import numpy as np
+import pandas as pd
+
+from support_resistance import cluster_levels, find_pivots, support_resistance
+
+# label -> bars (252 sessions a year; 390 one-minute bars a session)
+DEFAULT_SIZES = {
+    '1y daily': 252,
+    '5y daily': 252 * 5,
+    '20y daily': 252 * 20,
+    '1y 1-min intraday': 390 * 252,
+}
+
+
+def make_series(n_bars: int, seed: int = 42):
+    """Synthetic random-walk low/high/volume arrays"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(rng.normal(0, 0.01, n_bars).cumsum())
+    spread = close * rng.uniform(0.001, 0.02, n_bars)
+    # Tick-rounded prices so equal lows/highs (ties) occur as they do in real data
+    low = np.round(close - spread, 2)
+    high = np.round(close + spread, 2)
+    volume = rng.integers(100_000, 10_000_000, n_bars).astype(np.float64)
+    return low, high, volume
+
+
+def reference_pivots(low: pd.Series, high: pd.Series, window: int, limit: int):
+    """The original endpoint loop over the first `limit` candidate bars"""
+    supports, resistances = [], []
+    for i in range(window, min(len(low) - window, window + limit)):
+        low_window = low.iloc[i - window:i + window + 1]
+        high_window = high.iloc[i - window:i + window + 1]
+        if low.iloc[i] == low_window.min():
+            supports.append(i)
+        if high.iloc[i] == high_window.max():
+            resistances.append(i)
+    return supports, resistances
+
+
+def reference_clusters(levels, threshold: float = 0.02):
+    """The original clustering (all clusters, before the last-five cut)"""
+    if not levels:
+        return []
+    levels = sorted(levels)
+    clusters = []
+    current_cluster = [levels[0]]
+    for level in levels[1:]:
+        if (level - current_cluster[0]) / current_cluster[0] < threshold:
+            current_cluster.append(level)
+        else:
+            clusters.append(sum(current_cluster) / len(current_cluster))
+            current_cluster = [level]
+    clusters.append(sum(current_cluster) / len(current_cluster))
+    return [round(c, 2) for c in clusters]
+
+
+def check_placeholder_prices():
+    """Zero/NaN/negative pivot prices (placeholder rows) are skipped, never divided by"""
+    prices = np.array([0.0, 10.0, 10.1, 0.0, 20.0, np.nan, -1.0])
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')  # a 0/0 would raise here instead of warning
+        clusters = cluster_levels(prices, np.arange(len(prices), dtype=np.float64))
+        empty = cluster_levels(np.zeros(3))
+        low = np.r_[np.full(30, 0.0), np.linspace(10, 12, 30), np.full(30, 0.0)]
+        levels = support_resistance(low, low + 1, window=5)
+    ok = ([c['level'] for c in clusters] == [10.07, 20.0] and [c['touches'] for c in clusters] == [2, 1]
+          and empty == [] and all(c['level'] > 0 for c in levels['support']))
+    print(f"Placeholder (zero/NaN) prices skipped: {ok}")
+    return ok
+
+
+def bench(label: str, n_bars: int, window: int, max_loop_bars: int):
+    low, high, volume = make_series(n_bars)
+    candidates = max(0, n_bars - 2 * window)
+
+    t0 = time.perf_counter()
+    levels = support_resistance(low, high, volume, window=window)
+    t_vec = time.perf_counter() - t0
+
+    # The loop is O(n * window) with pandas overhead per bar, so long series
+    # time a prefix of bars and extrapolate linearly
+    limit = min(candidates, max_loop_bars)
+    t0 = time.perf_counter()
+    ref_sup, ref_res = reference_pivots(pd.Series(low), pd.Series(high), window, limit)
+    t_loop = (time.perf_counter() - t0) * candidates / max(1, limit)
+
+    # Correctness: same pivot bars on the timed prefix, and (without volume)
+    # the same cluster levels as the original clustering on the full series,
+    # up to one cent of rounding from the different summation order
+    sup_idx, res_idx = find_pivots(low, high, window)
+    end = window + limit
+    same_pivots = (sup_idx[sup_idx < end].tolist() == ref_sup and res_idx[res_idx < end].tolist() == ref_res)
+
+    def same(prices):
+        ours = [c['level'] for c in cluster_levels(prices)]
+        theirs = reference_clusters(prices.tolist())
+        return len(ours) == len(theirs) and np.allclose(ours, theirs, rtol=0, atol=0.0101)
+
+    same_levels = same(low[sup_idx]) and same(high[res_idx])
+
+    estimated = '' if limit == candidates else f' (extrapolated from {limit:,} bars)'
+    print(f"\n[{label}] {n_bars:,} bars, window {window}")
+    print(f"   Per-bar loop:  {t_loop:9.3f}s{estimated}")
+    print(f"   Vectorized:    {t_vec:9.3f}s")
+    print(f"   Speed-up:      {t_loop / t_vec:9.1f}x")
+    print(f"   Pivots: {len(sup_idx):,} lows / {len(res_idx):,} highs, identical: {same_pivots}")
+    print(f"   Unweighted cluster levels match: {same_levels}")
+    print(f"   Strongest support:    {[c['level'] for c in levels['support']]}")
+    print(f"   Strongest resistance: {[c['level'] for c in levels['resistance']]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Support/resistance benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', help='Series lengths in bars (default: 1y/5y/20y daily, 1y 1-min)')
+    parser.add_argument('--window', type=int, default=20, help='Pivot half-window (bars)')
+    parser.add_argument('--max-loop-bars', type=int, default=5000, help='Bars timed in the per-bar loop')
+    args = parser.parse_args()
+
+    if not check_placeholder_prices():
+        raise SystemExit("cluster_levels mishandled placeholder prices")
+    sizes = {f"{n:,} bars": n for n in args.sizes} if args.sizes else DEFAULT_SIZES
+    for label, n_bars in sizes.items():
+        bench(label, n_bars, args.window, args.max_loop_bars)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Volume Analysis Benchmark
+Compares the per-ticker reference loop with the cross-sectional engine
+on the current price store and on a synthetic large universe
+"""
+
+import os
+import time
+import tempfile
+import logging
+import argparse
+import pandas as pd
+import numpy as np
+
+from analyze_volume import VolumeAnalyzer
+from price_store import PriceStore
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def make_universe(n_tickers: int, n_days: int, seed: int = 42) -> pd.DataFrame:
+    """Synthetic random-walk OHLCV frame sorted by (ticker, date)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days)
+
+    n = n_tickers * n_days
+    close = 100 * np.exp(rng.normal(0, 0.02, (n_tickers, n_days)).cumsum(axis=1)).ravel()
+    spread = close * rng.uniform(0.001, 0.03, n)
+    tickers = np.repeat([f"T{i:05d}" for i in range(n_tickers)], n_days)
+
+    return pd.DataFrame({
+        'ticker': tickers,
+        'name': tickers,
+        'date': np.tile(dates, n_tickers),
+        'high': close + spread,
+        'low': close - spread,
+        'current_price': close,
+        'volume': rng.integers(100_000, 10_000_000, n).astype(np.float64),
+    })
+
+
+def check_csv_format(n_tickers: int = 20, n_days: int = 60):
+    """
+    us_volume_analysis.csv written from the Parquet store (float64 volume) must
+    be byte-identical to the one written from an integer-volume legacy CSV,
+    the way the original script read it, e.g. OBV as "1234" rather than "1234.0"
+    """
+    prices = make_universe(n_tickers, n_days)
+    prices['volume'] = prices['volume'].astype('int64')
+    outputs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('legacy', 'store'):
+            data_dir = os.path.join(tmp, name)
+            os.makedirs(data_dir)
+            prices.to_csv(os.path.join(data_dir, 'us_daily_prices.csv'), index=False)
+            if name == 'store':
+                PriceStore(data_dir).migrate_from_csv()
+            analyzer = VolumeAnalyzer(data_dir)
+            analyzer.run(full=True)
+            with open(analyzer.output_file, 'r', encoding='utf-8') as f:
+                outputs.append(f.read())
+    ok = outputs[0] == outputs[1]
+    print(f"CSV identical to the integer-volume baseline: {ok}")
+    return ok
+
+
+def bench(label: str, df: pd.DataFrame, sample: int):
+    analyzer = VolumeAnalyzer()
+    n_tickers = df['ticker'].nunique()
+
+    t0 = time.perf_counter()
+    engine = analyzer.analyze_universe(df)
+    t_engine = time.perf_counter() - t0
+
+    # The per-ticker loop re-filters the whole frame for every ticker, so time a
+    # sample of tickers and extrapolate linearly
+    sample_tickers = df['ticker'].unique()[:sample]
+    subset_mask = df['ticker'].isin(sample_tickers)
+    t0 = time.perf_counter()
+    for ticker in sample_tickers:
+        ticker_data = df[df['ticker'] == ticker].copy()
+        if len(ticker_data) >= 30:
+            analyzer.analyze_supply_demand(ticker_data)
+    t_loop = (time.perf_counter() - t0) * n_tickers / max(1, len(sample_tickers))
+
+    # Correctness: the engine must match the reference loop on the sample
+    reference = analyzer.analyze_per_ticker(df[subset_mask])
+    matched = engine[engine['ticker'].isin(sample_tickers)].reset_index(drop=True)
+    identical = reference.to_csv(index=False) == matched.to_csv(index=False)
+
+    estimated = '' if len(sample_tickers) == n_tickers else ' (extrapolated)'
+    print(f"\n[{label}] {n_tickers} tickers, {len(df):,} rows")
+    print(f"   Per-ticker loop: {t_loop:8.2f}s{estimated}")
+    print(f"   Vectorized:      {t_engine:8.2f}s")
+    print(f"   Speed-up:        {t_loop / t_engine:8.1f}x")
+    print(f"   Output identical on {len(sample_tickers)} sampled tickers: {identical}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Volume analysis benchmark')
+    parser.add_argument('--dir', default='.', help='Data directory with the price store')
+    parser.add_argument('--tickers', type=int, default=5000, help='Synthetic universe size')
+    parser.add_argument('--days', type=int, default=1500, help='Synthetic history length (bars)')
+    parser.add_argument('--sample', type=int, default=100, help='Tickers timed in the per-ticker loop')
+    args = parser.parse_args()
+
+    if not check_csv_format():
+        raise SystemExit("us_volume_analysis.csv format differs from the baseline")
+    store = PriceStore(args.dir)
+    current = store.read(columns=['name', 'high', 'low', 'current_price', 'volume'])
+    if not current.empty:
+        bench("Current universe", current, args.sample)
+    else:
+        print("[Current universe] No price data found; skipping")
+
+    bench("Synthetic universe", make_universe(args.tickers, args.days), args.sample)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bilingual Generation
+Structured-output helpers for asking Gemini for the Korean and English
+versions of a text in one request: JSON response configs and validators for
+the {"ko": ..., "en": ...} object it returns, or for a batched array of
+{"ticker", "ko", "en"} objects covering several stocks.
+"""
+
+import re
+import json
+from typing import Dict, Iterable, Optional
+
+HANGUL = re.compile(r'[가-힣]')
+
+BILINGUAL_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {"ko": {"type": "STRING"}, "en": {"type": "STRING"}},
+    "required": ["ko", "en"],
+}
+
+BATCH_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {"ticker": {"type": "STRING"}, "ko": {"type": "STRING"}, "en": {"type": "STRING"}},
+        "required": ["ticker", "ko", "en"],
+    },
+}
+
+BILINGUAL_INSTRUCTIONS = (
+    'Write the answer twice with the same content: once in Korean and once in English. '
+    'Reply with only a JSON object: {"ko": "<Korean answer>", "en": "<English answer>"}'
+)
+
+BATCH_INSTRUCTIONS = (
+    'Write each answer twice with the same content: once in Korean and once in English. '
+    'Reply with only a JSON array holding one object per stock, in the order given: '
+    '[{"ticker": "<ticker>", "ko": "<Korean answer>", "en": "<English answer>"}]'
+)
+
+
+def bilingual_config(**config) -> Dict:
+    """generationConfig for a JSON {"ko", "en"} answer, plus any extra settings"""
+    return {**config, "responseMimeType": "application/json", "responseSchema": BILINGUAL_SCHEMA}
+
+
+def batch_config(**config) -> Dict:
+    """generationConfig for a JSON [{"ticker", "ko", "en"}] answer"""
+    return {**config, "responseMimeType": "application/json", "responseSchema": BATCH_SCHEMA}
+
+
+def _load(text: Optional[str]):
+    if not text:
+        return None
+    # Tolerate a ```json fence around the payload
+    text = re.sub(r'^\s*```(?:json)?\s*|\s*```\s*$', '', text)
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def parse_bilingual(text: Optional[str]) -> Optional[Dict[str, str]]:
+    """{'ko', 'en'} from a bilingual answer, or None if it is not a usable one"""
+    return _validate(_load(text))
+
+
+def parse_batch(text: Optional[str], tickers: Iterable[str]) -> Dict[str, Dict[str, str]]:
+    """
+    ticker -> {'ko', 'en'} for the valid entries of a batched answer. Entries
+    that are malformed, duplicated or for tickers that were not asked about
+    are dropped, so callers can retry the missing tickers individually.
+    """
+    entries = _load(text)
+    if not isinstance(entries, list):
+        return {}
+    wanted = {t.upper(): t for t in tickers}
+    pairs, seen = {}, set()
+    for entry in entries:
+        ticker = entry.get('ticker') if isinstance(entry, dict) else None
+        if not isinstance(ticker, str):
+            continue
+        ticker = ticker.strip().upper()
+        if ticker in seen:
+            pairs.pop(wanted.get(ticker), None)  # two answers for one stock: trust neither
+            continue
+        seen.add(ticker)
+        pair = _validate(entry)
+        if ticker in wanted and pair is not None:
+            pairs[wanted[ticker]] = pair
+    return pairs
+
+
+def _validate(obj) -> Optional[Dict[str, str]]:
+    if not isinstance(obj, dict):
+        return None
+    ko, en = obj.get('ko'), obj.get('en')
+    if not isinstance(ko, str) or not isinstance(en, str) or not ko.strip() or not en.strip():
+        return None
+    if not HANGUL.search(ko):
+        return None  # "Korean" version came back in another language
+    return {'ko': ko.strip(), 'en': en.strip()}
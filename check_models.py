@@ -1,5 +1,5 @@
 import os
-import requests
+import http_client
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,7 +7,7 @@ key = os.getenv('GOOGLE_API_KEY')
 url = f"https://generativelanguage.googleapis.com/v1beta/models?key={key}"
 
 try:
-    resp = requests.get(url)
+    resp = http_client.get(url)
     if resp.status_code == 200:
         models = resp.json().get('models', [])
         print("Available Models:")
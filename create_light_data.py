@@ -1,24 +1,18 @@
-import pandas as pd
 import os
 from datetime import datetime, timedelta
 
+from price_store import PriceStore
+
 def create_light_csv():
-    input_file = 'us_daily_prices.csv'
+    store = PriceStore('.')
     output_file = 'us_daily_prices_light.csv'
     
-    print(f"Reading {input_file}...")
+    print(f"Reading {store.root}...")
     try:
-        # Read only necessary columns if possible, but reading all for now
-        df = pd.read_csv(input_file)
-        
-        # Convert Date to datetime
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # Filter for last 1 year
+        # Filter for last 1 year (only matching rows are loaded from the store)
         one_year_ago = datetime.now() - timedelta(days=365)
-        df_light = df[df['date'] >= one_year_ago]
+        df_light = store.read(start=one_year_ago)
         
-        print(f"Original rows: {len(df)}")
         print(f"Light rows: {len(df_light)}")
         
         # Save to new file
@@ -11,10 +11,14 @@ import pandas as pd
 import numpy as np
 import yfinance as yf
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from tqdm import tqdm
 
+from price_store import PriceStore
+
 # Logging Configuration
 logging.basicConfig(
     level=logging.INFO,
@@ -24,19 +28,23 @@ logger = logging.getLogger(__name__)
 
 
 class USStockDailyPricesCreator:
-    def __init__(self):
+    def __init__(self, batch_size: int = 100, max_workers: int = 4):
         self.data_dir = os.getenv('DATA_DIR', '.')
         self.output_dir = self.data_dir
         os.makedirs(self.output_dir, exist_ok=True)
         
         # Data file paths
-        self.prices_file = os.path.join(self.output_dir, 'us_daily_prices.csv')
+        self.store = PriceStore(self.output_dir)
         self.stocks_list_file = os.path.join(self.output_dir, 'us_stocks_list.csv')
         
         # Start date for historical data
         self.start_date = datetime(2020, 1, 1)
         self.end_date = datetime.now()
         
+        # Batched ingestion: tickers per multi-symbol request and concurrent requests
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        
     def get_sp500_tickers(self) -> List[Dict]:
         """Get full S&P 500 tickers list"""
         logger.info("📊 Loading full S&P 500 stocks...")
@@ -137,20 +145,34 @@ class USStockDailyPricesCreator:
         
         return stocks_df
     
-    def load_existing_prices(self) -> pd.DataFrame:
-        """Load existing price data"""
-        if os.path.exists(self.prices_file):
-            logger.info(f"📂 Loading existing prices: {self.prices_file}")
-            df = pd.read_csv(self.prices_file)
-            df['date'] = pd.to_datetime(df['date'], utc=True).dt.tz_localize(None)
-            return df
-        return pd.DataFrame()
+    def get_latest_dates(self) -> Dict[str, datetime]:
+        """Get latest date for each ticker (from the store index, no price data is read)"""
+        logger.info(f"📂 Loading latest dates from {self.store.root}")
+        return self.store.latest_dates()
     
-    def get_latest_dates(self, df: pd.DataFrame) -> Dict[str, datetime]:
-        """Get latest date for each ticker"""
-        if df.empty:
-            return {}
-        return df.groupby('ticker')['date'].max().to_dict()
+    def _format_history(self, hist: pd.DataFrame, ticker: str) -> pd.DataFrame:
+        """Convert a yfinance history frame to the us_daily_prices.csv layout"""
+        hist = hist.reset_index()
+        hist['Date'] = pd.to_datetime(hist['Date'], utc=True).dt.tz_localize(None)
+        hist['ticker'] = ticker
+        
+        # Rename columns to match Korean stock format
+        hist = hist.rename(columns={
+            'Date': 'date',
+            'Open': 'open',
+            'High': 'high',
+            'Low': 'low',
+            'Close': 'current_price',
+            'Volume': 'volume'
+        })
+        
+        # Calculate change and change_rate
+        hist['change'] = hist['current_price'].diff()
+        hist['change_rate'] = hist['current_price'].pct_change() * 100
+        
+        # Select required columns
+        cols = ['ticker', 'date', 'open', 'high', 'low', 'current_price', 'volume', 'change', 'change_rate']
+        return hist[cols]
     
     def download_stock_data(self, ticker: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
         """Download daily price data for a single stock"""
@@ -161,34 +183,110 @@ class USStockDailyPricesCreator:
             if hist.empty:
                 return pd.DataFrame()
             
-            hist = hist.reset_index()
-            hist['Date'] = pd.to_datetime(hist['Date'], utc=True).dt.tz_localize(None)
-            hist['ticker'] = ticker
-            
-            # Rename columns to match Korean stock format
-            hist = hist.rename(columns={
-                'Date': 'date',
-                'Open': 'open',
-                'High': 'high',
-                'Low': 'low',
-                'Close': 'current_price',
-                'Volume': 'volume'
-            })
-            
-            # Calculate change and change_rate
-            hist['change'] = hist['current_price'].diff()
-            hist['change_rate'] = hist['current_price'].pct_change() * 100
-            
-            # Select required columns
-            cols = ['ticker', 'date', 'open', 'high', 'low', 'current_price', 'volume', 'change', 'change_rate']
-            hist = hist[cols]
-            
-            return hist
+            return self._format_history(hist, ticker)
             
         except Exception as e:
             logger.debug(f"⚠️ Failed to download {ticker}: {e}")
             return pd.DataFrame()
     
+    def download_batch(self, tickers: List[str], start_date: datetime, end_date: datetime) -> Dict[str, pd.DataFrame]:
+        """Download daily price data for several stocks in one multi-symbol request"""
+        results = {}
+        try:
+            # ignore_tz=False keeps the exchange timezone so dates match download_stock_data()
+            data = yf.download(
+                tickers, start=start_date, end=end_date,
+                group_by='ticker', auto_adjust=True, ignore_tz=False,
+                threads=False, progress=False
+            )
+        except Exception as e:
+            logger.debug(f"⚠️ Failed to download batch {tickers[:3]}...: {e}")
+            return results
+        
+        if data is None or data.empty:
+            return results
+        
+        for ticker in tickers:
+            try:
+                if isinstance(data.columns, pd.MultiIndex):
+                    if ticker not in data.columns.get_level_values(0):
+                        continue
+                    hist = data[ticker]
+                else:
+                    hist = data
+                
+                # Multi-symbol frames share one date index; drop rows this ticker did not trade
+                hist = hist.dropna(how='all')
+                if hist.empty:
+                    continue
+                
+                hist = hist.rename_axis(index='Date', columns=None)
+                results[ticker] = self._format_history(hist, ticker)
+            except Exception as e:
+                logger.debug(f"⚠️ Failed to parse {ticker} from batch: {e}")
+        
+        return results
+    
+    def plan_batches(self, tickers: List[str], latest_dates: Dict[str, datetime],
+                     end_date: datetime) -> List[Tuple[datetime, List[str]]]:
+        """Group tickers sharing the same incremental start date into request batches"""
+        groups: Dict[datetime, List[str]] = {}
+        for ticker in tickers:
+            if ticker in latest_dates:
+                start_date = pd.Timestamp(latest_dates[ticker] + timedelta(days=1)).normalize().to_pydatetime()
+            else:
+                start_date = self.start_date
+            
+            # Skip if already up to date
+            if start_date >= end_date:
+                continue
+            groups.setdefault(start_date, []).append(ticker)
+        
+        size = max(1, self.batch_size)
+        batches = []
+        for start_date in sorted(groups):
+            group = groups[start_date]
+            for i in range(0, len(group), size):
+                batches.append((start_date, group[i:i + size]))
+        return batches
+    
+    def collect_batched(self, batches: List[Tuple[datetime, List[str]]],
+                        end_date: datetime) -> Tuple[Dict[str, pd.DataFrame], List[str]]:
+        """Run planned batches through a bounded worker pool"""
+        downloaded: Dict[str, pd.DataFrame] = {}
+        failed: List[str] = []
+        
+        def run_batch(start_date, tickers):
+            t0 = time.perf_counter()
+            result = self.download_batch(tickers, start_date, end_date)
+            return result, time.perf_counter() - t0
+        
+        workers = max(1, min(self.max_workers, len(batches)))
+        logger.info(f"📦 {len(batches)} batches (size ≤ {self.batch_size}) on {workers} workers")
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(run_batch, start_date, tickers): (i, start_date, tickers)
+                for i, (start_date, tickers) in enumerate(batches, 1)
+            }
+            for future in as_completed(futures):
+                i, start_date, tickers = futures[future]
+                try:
+                    result, elapsed = future.result()
+                except Exception as e:
+                    logger.warning(f"⚠️ Batch {i} failed: {e}")
+                    result, elapsed = {}, 0.0
+                
+                downloaded.update(result)
+                missing = [t for t in tickers if t not in result]
+                failed.extend(missing)
+                logger.info(
+                    f"⏱️ Batch {i}/{len(batches)}: {len(result)}/{len(tickers)} tickers "
+                    f"from {start_date:%Y-%m-%d} in {elapsed:.1f}s"
+                )
+        
+        return downloaded, failed
+    
     def run(self, full_refresh: bool = False) -> bool:
         """Run data collection (incremental by default)"""
         logger.info("🚀 US Stock Daily Prices Collection Started...")
@@ -200,9 +298,8 @@ class USStockDailyPricesCreator:
                 logger.error("❌ No stocks to process")
                 return False
             
-            # 2. Load existing data
-            existing_df = pd.DataFrame() if full_refresh else self.load_existing_prices()
-            latest_dates = self.get_latest_dates(existing_df)
+            # 2. Load latest stored date per ticker
+            latest_dates = {} if full_refresh else self.get_latest_dates()
             
             # 3. Determine target end date
             now = datetime.now()
@@ -212,46 +309,52 @@ class USStockDailyPricesCreator:
             all_new_data = []
             failed_tickers = []
             
-            for idx, row in tqdm(stocks_df.iterrows(), desc="Downloading US stocks", total=len(stocks_df)):
-                ticker = row['ticker']
+            if self.batch_size > 1:
+                # Batched mode: multi-symbol requests grouped by start date
+                names = stocks_df.set_index('ticker')
+                batches = self.plan_batches(stocks_df['ticker'].tolist(), latest_dates, target_end_date)
+                t0 = time.perf_counter()
+                downloaded, failed_tickers = self.collect_batched(batches, target_end_date)
+                logger.info(f"⏱️ Downloaded {len(downloaded)} tickers in {time.perf_counter() - t0:.1f}s")
                 
-                # Determine start date
-                if ticker in latest_dates:
-                    start_date = latest_dates[ticker] + timedelta(days=1)
-                else:
-                    start_date = self.start_date
-                
-                # Skip if already up to date
-                if start_date >= target_end_date:
-                    continue
-                
-                # Download data
-                new_data = self.download_stock_data(ticker, start_date, target_end_date)
-                
-                if not new_data.empty:
-                    # Add name from stock list
-                    new_data['name'] = row['name']
-                    new_data['market'] = row['market']
+                for ticker, new_data in downloaded.items():
+                    new_data['name'] = names.at[ticker, 'name']
+                    new_data['market'] = names.at[ticker, 'market']
                     all_new_data.append(new_data)
-                else:
-                    failed_tickers.append(ticker)
+            else:
+                for idx, row in tqdm(stocks_df.iterrows(), desc="Downloading US stocks", total=len(stocks_df)):
+                    ticker = row['ticker']
+                    
+                    # Determine start date
+                    if ticker in latest_dates:
+                        start_date = latest_dates[ticker] + timedelta(days=1)
+                    else:
+                        start_date = self.start_date
+                    
+                    # Skip if already up to date
+                    if start_date >= target_end_date:
+                        continue
+                    
+                    # Download data
+                    new_data = self.download_stock_data(ticker, start_date, target_end_date)
+                    
+                    if not new_data.empty:
+                        # Add name from stock list
+                        new_data['name'] = row['name']
+                        new_data['market'] = row['market']
+                        all_new_data.append(new_data)
+                    else:
+                        failed_tickers.append(ticker)
             
             # 5. Combine and save
             if all_new_data:
                 new_df = pd.concat(all_new_data, ignore_index=True)
                 
-                if not existing_df.empty:
-                    final_df = pd.concat([existing_df, new_df])
-                    final_df = final_df.drop_duplicates(subset=['ticker', 'date'], keep='last')
-                else:
-                    final_df = new_df
-                
-                # Sort and save
-                final_df = final_df.sort_values(['ticker', 'date']).reset_index(drop=True)
-                final_df.to_csv(self.prices_file, index=False)
+                # Only the partitions of tickers that received new bars are rewritten
+                changed = self.store.upsert(new_df, replace=full_refresh)
                 
-                logger.info(f"✅ Saved {len(new_df)} new records to {self.prices_file}")
-                logger.info(f"📊 Total records: {len(final_df)}")
+                logger.info(f"✅ Saved {len(new_df)} new records to {len(changed)} partitions in {self.store.root}")
+                logger.info(f"📊 Total records: {sum(m['rows'] for m in self.store.load_index()['tickers'].values())}")
             else:
                 logger.info("✨ All data is up to date!")
             
@@ -277,14 +380,17 @@ def main():
     
     parser = argparse.ArgumentParser(description='US Stock Daily Prices Collector')
     parser.add_argument('--full', action='store_true', help='Full refresh (ignore existing data)')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='Tickers per multi-symbol request (1 = one request per ticker)')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent batch requests')
     args = parser.parse_args()
     
-    creator = USStockDailyPricesCreator()
+    creator = USStockDailyPricesCreator(batch_size=args.batch_size, max_workers=args.workers)
     success = creator.run(full_refresh=args.full)
     
     if success:
         print("\\n[SUCCESS] US Stock Daily Prices collection completed!")
-        print(f"[FILE] File location: ./us_daily_prices.csv")
+        print(f"[FILE] Store location: {creator.store.root}")
     else:
         print("\\n[FAILED] Collection failed.")
 
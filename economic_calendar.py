@@ -1,16 +1,21 @@
 #!/usr/bin/env python3
-import os, json, requests, logging
+import os, json, logging
 from datetime import datetime, timedelta
 import pandas as pd
 from io import StringIO
 from dotenv import load_dotenv
 
+import http_client
+from fetch_engine import limiter_for
+from llm_cache import model_name, shared_cache
+
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 
 class EconomicCalendar:
     def __init__(self, data_dir='.'):
         self.output = os.path.join(data_dir, 'weekly_calendar.json')
+        self.cache = shared_cache(data_dir)
         
     def get_events(self):
         # Scrape Yahoo Finance Calendar (Simplified)
@@ -18,7 +23,7 @@ class EconomicCalendar:
         try:
             url = f"https://finance.yahoo.com/calendar/economic"
             headers = {'User-Agent': 'Mozilla/5.0'}
-            resp = requests.get(url, headers=headers)
+            resp = limiter_for('yahoo').call(http_client.get, url, headers=headers)
             if resp.status_code == 200:
                 dfs = pd.read_html(StringIO(resp.text))
                 if dfs:
@@ -48,17 +53,24 @@ class EconomicCalendar:
         
         url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
         
+        def call(payload):
+            resp = limiter_for('gemini').call(http_client.post, f"{url}?key={key}", json=payload)
+            if resp.status_code == 200:
+                return resp.json()['candidates'][0]['content']['parts'][0]['text']
+            print(f"DEBUG: Status {resp.status_code}: {resp.text}")
+        
         for ev in events:
             if ev['impact'] == 'High':
                 try:
-                    payload = {"contents": [{"parts": [{"text": f"Explain market impact of: {ev['event']} in 2 sentences."}]}]}
-                    resp = requests.post(f"{url}?key={key}", json=payload)
-                    if resp.status_code == 200:
-                        ev['description'] += "\n\n[AI] AI: " + resp.json()['candidates'][0]['content']['parts'][0]['text']
-                    else:
-                        print(f"DEBUG: Status {resp.status_code}: {resp.text}")
+                    prompt = f"Explain market impact of: {ev['event']} in 2 sentences."
+                    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+                    # Recurring events (FOMC, CPI ...) hit the cache across runs
+                    text = self.cache.get_or_generate(model_name(url), prompt, None, lambda: call(payload))
+                    if text:
+                        ev['description'] += "\n\n[AI] AI: " + text
                 except Exception as e:
                     print(f"DEBUG: Exception: {e}")
+        self.cache.log_stats()
         return events
 
     def run(self):
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Concurrent Fetch Engine
+Runs per-ticker network lookups on a thread pool. Every call first takes a
+token from its upstream host's limiter, so throughput is bounded by the
+provider's rate limit rather than by round-trip latency. Results come back
+in input order.
+
+Limiters are per process: every engine and direct limiter_for() caller in
+one process shares a host's budget, but separate processes each get their
+own. update_all.py therefore never runs two stages that call the same host
+at the same time.
+
+Limiters are adaptive (AIMD): each success nudges the host's rate up, and
+HTTP 429/5xx responses, rate-limit errors or a run of empty responses cut it
+in half and pause the host.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# host -> (initial requests per second, burst, min rate, max rate)
+HOST_LIMITS: Dict[str, Tuple[float, int, float, float]] = {
+    'yahoo': (4.0, 8, 0.5, 20.0),
+    'google_news': (2.0, 4, 0.2, 10.0),
+    'gemini': (0.25, 2, 0.05, 2.0),  # 15 RPM free tier to start
+}
+DEFAULT_LIMIT = (2.0, 4, 0.2, 10.0)
+
+EMPTY_STREAK = 3  # consecutive empty responses treated as a soft block
+MAX_PAUSE = 60.0
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """True for provider push-back: HTTP 429/5xx or a rate-limit exception"""
+    status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    if status is not None:
+        return status == 429 or status >= 500
+    text = f"{type(exc).__name__} {exc}"
+    return 'RateLimit' in text or 'Too Many Requests' in text or ' 429' in text
+
+
+def raise_if_throttled(exc: BaseException):
+    """Re-raise throttling from a broad except block so the limiter can react"""
+    if is_throttle_error(exc):
+        raise exc
+
+
+def _retry_after(obj) -> Optional[float]:
+    """Retry-After seconds from a response (or an exception carrying one)"""
+    headers = getattr(obj, 'headers', None) or getattr(getattr(obj, 'response', None), 'headers', None)
+    try:
+        return float(headers.get('Retry-After')) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` banked"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until `tokens` are available; False if `timeout` runs out first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return True
+                    wait_s = (tokens - self._tokens) / self.rate
+                else:
+                    wait_s = self._paused_until - now
+            if deadline is not None and now + wait_s > deadline:
+                return False
+            time.sleep(wait_s)
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket whose rate follows AIMD: +`increase` req/s per success up to
+    `max_rate`, x`decrease` on throttling down to `min_rate`. Throttling also
+    drains the bucket and pauses the host for Retry-After, or an exponential
+    1, 2, 4 ... MAX_PAUSE seconds while throttling persists.
+    """
+
+    def __init__(self, host: str, rate: float, burst: int, min_rate: float, max_rate: float,
+                 increase: Optional[float] = None, decrease: float = 0.5):
+        super().__init__(rate, burst)
+        self.host = host
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase if increase is not None else 0.1 * min_rate
+        self.decrease = decrease
+        self._throttle_streak = 0
+        self._empty_streak = 0
+        self.counters = {'requests': 0, 'successes': 0, 'throttled': 0, 'empty': 0, 'errors': 0, 'retries': 0}
+
+    def success(self):
+        with self._lock:
+            self.counters['requests'] += 1
+            self.counters['successes'] += 1
+            self._throttle_streak = self._empty_streak = 0
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def throttled(self, retry_after: Optional[float] = None, counted: bool = True):
+        with self._lock:
+            if counted:
+                self.counters['requests'] += 1
+                self.counters['throttled'] += 1
+            self._throttle_streak += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = 0.0
+            pause = retry_after if retry_after is not None else min(MAX_PAUSE, 2.0 ** (self._throttle_streak - 1))
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            rate = self.rate
+        logger.warning(f"🐢 {self.host} throttled: rate -> {rate:.2f}/s, pausing {pause:.1f}s")
+
+    def empty(self):
+        with self._lock:
+            self.counters['requests'] += 1
+            self.counters['empty'] += 1
+            self._empty_streak += 1
+            blocked = self._empty_streak >= EMPTY_STREAK
+            if blocked:
+                self._empty_streak = 0
+        if blocked:
+            self.throttled(counted=False)
+
+    def error(self):
+        with self._lock:
+            self.counters['requests'] += 1
+            self.counters['errors'] += 1
+
+    def call(self, fn: Callable, *args, empty: Optional[Callable[[Any], bool]] = None, retries: int = 2,
+             tokens: float = 1.0, **kwargs):
+        """
+        fn(*args, **kwargs) under the limiter, retried up to `retries` times
+        on throttling. A returned HTTP response with a 429/5xx status counts
+        as throttled (and is returned as-is once retries run out); `empty`
+        flags results that are empty responses. tokens=0 calls straight
+        through (cache hits) without touching the rate.
+        """
+        if tokens <= 0:
+            return fn(*args, **kwargs)
+        for attempt in range(retries + 1):
+            self.acquire(tokens)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_throttle_error(e):
+                    self.error()
+                    raise
+                self.throttled(_retry_after(e))
+                if attempt == retries:
+                    raise
+                with self._lock:
+                    self.counters['retries'] += 1
+                continue
+            status = getattr(result, 'status_code', None)
+            if isinstance(status, int) and (status == 429 or status >= 500):
+                self.throttled(_retry_after(result))
+                if attempt == retries:
+                    return result
+                with self._lock:
+                    self.counters['retries'] += 1
+                continue
+            if empty is not None and empty(result):
+                self.empty()
+            else:
+                self.success()
+            return result
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {**self.counters, 'rate': round(self.rate, 3)}
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(host: str) -> AdaptiveRateLimiter:
+    """The process-wide limiter for an upstream host"""
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            rate, burst, min_rate, max_rate = HOST_LIMITS.get(host, DEFAULT_LIMIT)
+            limiter = _limiters[host] = AdaptiveRateLimiter(host, rate, burst, min_rate, max_rate)
+        return limiter
+
+
+def configure_host(host: str, max_rate: float, burst: Optional[int] = None):
+    """
+    Cap this process's limiter for a host at a known quota (e.g. an API's
+    requests/minute). The live limiter starts at the cap and AIMD works
+    below it from there. Other processes calling the host are not counted,
+    so the quota only holds while no other process uses it.
+    """
+    limiter = limiter_for(host)
+    with limiter._lock:
+        limiter.max_rate = max_rate
+        limiter.min_rate = min(limiter.min_rate, max_rate)
+        limiter.rate = max_rate
+        if burst is not None:
+            limiter.burst = max(1, int(burst))
+
+
+def host_stats() -> Dict[str, Dict]:
+    """Per-host counters and current rate for every limiter used in this process"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {host: limiter.snapshot() for host, limiter in sorted(limiters.items())}
+
+
+def log_host_stats():
+    for host, s in host_stats().items():
+        logger.info(f"🌐 {host}: {s['requests']} requests, {s['successes']} ok, {s['throttled']} throttled, "
+                    f"{s['empty']} empty, {s['errors']} errors, {s['retries']} retries, rate {s['rate']}/s")
+
+
+class FetchEngine:
+    """
+    map(fn, items) calls fn(item) for every item on `max_workers` threads,
+    taking `cost` tokens (or cost(item): the requests that item will really
+    make, 0 for cache hits) from the host limiter before each call. Calls
+    report back to the limiter: a throttling exception (see
+    raise_if_throttled) backs the host off and retries the item, and
+    `empty(result)` marks empty responses. A call that still raises, or runs
+    longer than `timeout` seconds, yields `default` in its slot (a timed-out
+    thread is abandoned, not killed).
+    """
+
+    def __init__(self, host: str = 'yahoo', max_workers: int = 8, timeout: float = 30.0):
+        self.host = host
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.limiter = limiter_for(host)
+        self.stats = {'calls': 0, 'errors': 0, 'timeouts': 0, 'seconds': 0.0}
+
+    def map(self, fn: Callable[[Any], Any], items: Iterable, default: Any = None,
+            cost: Union[float, Callable[[Any], float]] = 1.0, empty: Optional[Callable[[Any], bool]] = None,
+            retries: int = 2, desc: Optional[str] = None) -> List[Any]:
+        items = list(items)
+        results = [default] * len(items)
+        if not items:
+            return results
+
+        started: Dict[int, float] = {}
+
+        def run(i, item):
+            # Only time spent inside fn counts towards the timeout, not
+            # waiting for tokens or a throttling pause
+            started[i] = time.monotonic()
+            try:
+                return fn(item)
+            finally:
+                started.pop(i, None)
+
+        def call(i, item):
+            tokens = cost(item) if callable(cost) else cost
+            return self.limiter.call(run, i, item, empty=empty, retries=retries, tokens=tokens)
+
+        progress = None
+        if desc:
+            from tqdm import tqdm
+            progress = tqdm(total=len(items), desc=desc)
+
+        t0 = time.monotonic()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"fetch-{self.host}")
+        try:
+            futures = {pool.submit(call, i, item): i for i, item in enumerate(items)}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=min(1.0, self.timeout), return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = futures[future]
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        self.stats['errors'] += 1
+                        logger.debug(f"{self.host} fetch failed for {items[i]}: {e}")
+                now = time.monotonic()
+                expired = {f for f in pending if now - started.get(futures[f], now) > self.timeout}
+                for future in expired:
+                    self.stats['timeouts'] += 1
+                    logger.warning(f"⏱️ {self.host} fetch for {items[futures[future]]} timed out after {self.timeout:.0f}s")
+                pending -= expired
+                if progress is not None:
+                    progress.update(len(done) + len(expired))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            if progress is not None:
+                progress.close()
+
+        self.stats['calls'] += len(items)
+        self.stats['seconds'] += time.monotonic() - t0
+        return results
@@ -5,6 +5,13 @@ from datetime import datetime
 
 logging.basicConfig(level=logging.INFO)
 
+def write_json_atomic(path, data):
+    """Write to a temp file and swap it in, so readers never see a partial report"""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
 class FinalReportGenerator:
     def __init__(self, data_dir='.'):
         self.data_dir = data_dir
@@ -68,8 +75,7 @@ class FinalReportGenerator:
         for i, p in enumerate(top_picks, 1): p['rank'] = i
         
         # Save Report
-        with open(os.path.join(self.data_dir, 'final_top10_report.json'), 'w', encoding='utf-8') as f:
-            json.dump({'top_picks': top_picks}, f, indent=2, ensure_ascii=False)
+        write_json_atomic(os.path.join(self.data_dir, 'final_top10_report.json'), {'top_picks': top_picks})
             
         # Save for Dashboard
         current_data = {
@@ -77,8 +83,7 @@ class FinalReportGenerator:
             'analysis_timestamp': datetime.now().isoformat(),
             'picks': top_picks
         }
-        with open(os.path.join(self.data_dir, 'smart_money_current.json'), 'w', encoding='utf-8') as f:
-            json.dump(current_data, f, indent=2, ensure_ascii=False)
+        write_json_atomic(os.path.join(self.data_dir, 'smart_money_current.json'), current_data)
             
         print(f"Generated Final Report for {len(top_picks)} stocks")
 
@@ -1,16 +1,30 @@
 import os
 import json
+import time
+import hashlib
 import threading
 import pandas as pd
 import numpy as np
 import yfinance as yf
-import subprocess
 from flask import Flask, render_template, jsonify, request
 import traceback
 from datetime import datetime, timedelta
 
+from price_store import PriceStore, PriceIndex
+from fundamentals_store import FundamentalsStore, short_sector
+from response_cache import FileCache, PreparedResponse, read_json
+from job_runner import JobRunner
+from fetch_engine import host_stats, limiter_for
+from technical_indicators import IndicatorCache, indicator_payload, indicator_summary, period_start
+
 app = Flask(__name__)
 
+# Shared daily price store (partitioned by ticker)
+price_store = PriceStore('.')
+
+# Per-worker in-memory OHLC index for chart slicing (built lazily on first use)
+price_index = PriceIndex(price_store, fallback_csv='us_daily_prices_light.csv')
+
 # Sector mapping for major US stocks (S&P 500 + popular stocks)
 SECTOR_MAP = {
     # Technology
@@ -81,7 +95,13 @@ SECTOR_MAP = {
     'EPAM': 'Tech', 'ALGN': 'Health',
 }
 
-# Persistent sector cache file
+# Shared fundamentals snapshot (written by analyze_13f.py / smart_money_screener_v2.py)
+fundamentals_store = FundamentalsStore('.')
+
+# Adaptive Yahoo rate limit shared by every live lookup in this worker
+yahoo = limiter_for('yahoo')
+
+# Legacy per-app sector cache, still consulted for tickers the snapshot lacks
 SECTOR_CACHE_FILE = 'sector_cache.json'
 
 def _load_sector_cache() -> dict:
@@ -94,79 +114,72 @@ def _load_sector_cache() -> dict:
         pass
     return {}
 
-def _save_sector_cache(cache: dict):
-    """Save sector cache to file"""
-    try:
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(SECTOR_CACHE_FILE), exist_ok=True)
-        with open(SECTOR_CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cache, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"Error saving sector cache: {e}")
-
 # Load cache at startup
 _sector_cache = _load_sector_cache()
 
 def get_sector(ticker: str) -> str:
-    """Get sector for a ticker, auto-fetch from yfinance if not in SECTOR_MAP"""
-    global _sector_cache
-    
+    """Get sector for a ticker from SECTOR_MAP or the shared fundamentals snapshot"""
     # Check static map first
     if ticker in SECTOR_MAP:
         return SECTOR_MAP[ticker]
     
-    # Check persistent cache
+    # Shared snapshot (picks up pipeline rewrites without a restart)
+    fundamentals_store.load()
+    sector = fundamentals_store.peek(ticker, 'sector')
+    if sector:
+        return short_sector(sector)
+    
+    # Check legacy cache
     if ticker in _sector_cache:
         return _sector_cache[ticker]
     
-    # Fetch from yfinance and save to file - DISABLED for Render compatibility
-    # yfinance calls hang or fail on Render due to IP blocking
-    # Return '-' if not in cache
+    # No yfinance fetch here - calls hang or fail on Render due to IP blocking.
+    # The pipeline populates the snapshot instead.
     return '-'
+
+# Parsed pipeline outputs and serialized responses, refreshed when a file is rewritten
+file_cache = FileCache()
+
+def send_prepared(prepared: PreparedResponse):
+    """Answer with 304 on a matching ETag, otherwise the best precompressed body"""
+    headers = {'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    matched = next((tag for tag in prepared.etags() if request.if_none_match.contains(tag)), None)
+    if prepared.status == 200 and matched:
+        resp = app.response_class(status=304, headers=headers)
+        resp.set_etag(matched)
+        return resp
     
+    encoding = None
+    if prepared.compressible():
+        encoding = next((e for e in prepared.available_encodings() if request.accept_encodings[e]), None)
+    
+    resp = app.response_class(prepared.encoded(encoding), status=prepared.status,
+                              mimetype=prepared.mimetype, headers=headers)
+    if encoding:
+        resp.headers['Content-Encoding'] = encoding
+    resp.set_etag(prepared.variant_etag(encoding))
+    return resp
+
+def cached_json(key, paths, build, version=None):
     """
-    try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        sector = info.get('sector', '')
-        
-        # Map sector to short code
-        sector_short_map = {
-            'Technology': 'Tech',
-            'Information Technology': 'Tech',
-            'Healthcare': 'Health',
-            'Health Care': 'Health',
-            'Financials': 'Fin',
-            'Financial Services': 'Fin',
-            'Consumer Discretionary': 'Cons',
-            'Consumer Cyclical': 'Cons',
-            'Consumer Staples': 'Staple',
-            'Consumer Defensive': 'Staple',
-            'Energy': 'Energy',
-            'Industrials': 'Indust',
-            'Materials': 'Mater',
-            'Basic Materials': 'Mater',
-            'Utilities': 'Util',
-            'Real Estate': 'REIT',
-            'Communication Services': 'Comm',
-            'Sector': 'Unknown'
-        }
-        
-        short_sector = sector_short_map.get(sector, sector[:5] if sector else '-')
-        
-        # Save to cache and persist to file
-        _sector_cache[ticker] = short_sector
-        _save_sector_cache(_sector_cache)
-        print(f"✅ Cached sector for {ticker}: {short_sector}")
-        
-        return short_sector
-    except Exception as e:
-        print(f"Error fetching sector for {ticker}: {e}")
-        _sector_cache[ticker] = '-'
-        _save_sector_cache(_sector_cache)
-        return '-'
+    jsonify(build()) served from cached bytes until one of `paths` changes
+    (or `version` moves), with a strong ETag and gzip/brotli variants
+    compressed once per rewrite. build() returns a payload or a
+    (payload, status) tuple.
     """
-    return '-'
+    def render():
+        result = build()
+        payload, status = result if isinstance(result, tuple) else (result, 200)
+        return PreparedResponse(jsonify(payload).get_data(), status)
+    return send_prepared(file_cache.derive(('response', key), paths, render, version))
+
+# Supported values of the lang/model query args, default first
+QUERY_CHOICES = {'lang': ('ko', 'en'), 'model': ('gemini', 'gpt')}
+
+def query_choice(name):
+    """request.args[name] if it is a supported value, else the default"""
+    value = request.args.get(name)
+    return value if value in QUERY_CHOICES[name] else QUERY_CHOICES[name][0]
 
 @app.route('/')
 def index():
@@ -178,10 +191,9 @@ def get_us_portfolio_data():
     try:
         # 1. Try to load from cached JSON file (bypass Yahoo API on Render)
         json_path = 'market_indices.json'
-        if os.path.exists(json_path):
+        if file_cache.exists(json_path):
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    return jsonify(json.load(f))
+                return cached_json('portfolio', [json_path], lambda: read_json(json_path))
             except Exception as e:
                 print(f"Error reading market_indices.json: {e}")
         
@@ -257,80 +269,82 @@ def get_us_smart_money():
         # Try to load tracked picks with performance
         current_file = 'smart_money_current.json'
         
-        if os.path.exists(current_file):
-            with open(current_file, 'r', encoding='utf-8') as f:
-                snapshot = json.load(f)
+        if file_cache.exists(current_file):
+            def build_tracked():
+                snapshot = read_json(current_file)
             
-            # Get current prices - DISABLED for Render compatibility
-            # Fetching prices individually causes timeouts on Render
-            current_prices = {}
-            """
-            tickers = [p['ticker'] for p in snapshot['picks']]
+                # Get current prices - DISABLED for Render compatibility
+                # Fetching prices individually causes timeouts on Render
+                current_prices = {}
+                """
+                tickers = [p['ticker'] for p in snapshot['picks']]
             
-            # Fetch prices individually for better reliability
-            for ticker in tickers:
-                try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(period='5d')
-                    if not hist.empty:
-                        current_prices[ticker] = round(float(hist['Close'].dropna().iloc[-1]), 2)
-                except Exception as e:
-                    print(f"Error fetching price for {ticker}: {e}")
-            """
+                # Fetch prices individually for better reliability
+                for ticker in tickers:
+                    try:
+                        stock = yf.Ticker(ticker)
+                        hist = stock.history(period='5d')
+                        if not hist.empty:
+                            current_prices[ticker] = round(float(hist['Close'].dropna().iloc[-1]), 2)
+                    except Exception as e:
+                        print(f"Error fetching price for {ticker}: {e}")
+                """
             
-            # Add performance data to picks
-            picks_with_perf = []
-            for pick in snapshot['picks']:
-                ticker = pick['ticker']
-                price_at_rec = pick.get('price_at_analysis', 0) or 0
-                current_price = current_prices.get(ticker, price_at_rec) or price_at_rec or 0
+                # Add performance data to picks
+                picks_with_perf = []
+                for pick in snapshot['picks']:
+                    ticker = pick['ticker']
+                    price_at_rec = pick.get('price_at_analysis', 0) or 0
+                    current_price = current_prices.get(ticker, price_at_rec) or price_at_rec or 0
                 
-                # Handle NaN values
-                import math
-                if math.isnan(price_at_rec) if isinstance(price_at_rec, float) else False:
-                    price_at_rec = 0
-                if math.isnan(current_price) if isinstance(current_price, float) else False:
-                    current_price = price_at_rec
+                    # Handle NaN values
+                    import math
+                    if math.isnan(price_at_rec) if isinstance(price_at_rec, float) else False:
+                        price_at_rec = 0
+                    if math.isnan(current_price) if isinstance(current_price, float) else False:
+                        current_price = price_at_rec
                 
-                if price_at_rec > 0:
-                    change_pct = ((current_price / price_at_rec) - 1) * 100
-                else:
-                    change_pct = 0
+                    if price_at_rec > 0:
+                        change_pct = ((current_price / price_at_rec) - 1) * 100
+                    else:
+                        change_pct = 0
                 
-                # Ensure no NaN in output
-                if math.isnan(change_pct) if isinstance(change_pct, float) else False:
-                    change_pct = 0
+                    # Ensure no NaN in output
+                    if math.isnan(change_pct) if isinstance(change_pct, float) else False:
+                        change_pct = 0
                 
-                # Calculate target upside if target_price exists
-                target_price = pick.get('target_price')
-                print(f"DEBUG {ticker}: target_price={target_price}, current_price={current_price}")
-                if target_price and current_price > 0:
-                    target_upside = ((target_price / current_price) - 1) * 100
-                    print(f"DEBUG {ticker}: target_upside calculated = {target_upside}")
-                else:
-                    target_upside = None
-                    print(f"DEBUG {ticker}: target_upside = None")
+                    # Calculate target upside if target_price exists
+                    target_price = pick.get('target_price')
+                    print(f"DEBUG {ticker}: target_price={target_price}, current_price={current_price}")
+                    if target_price and current_price > 0:
+                        target_upside = ((target_price / current_price) - 1) * 100
+                        print(f"DEBUG {ticker}: target_upside calculated = {target_upside}")
+                    else:
+                        target_upside = None
+                        print(f"DEBUG {ticker}: target_upside = None")
                 
-                pick_data = {
-                    **pick,
-                    'sector': get_sector(ticker),
-                    'current_price': round(current_price, 2),
-                    'price_at_rec': round(price_at_rec, 2),
-                    'change_since_rec': round(change_pct, 2),
-                    'target_upside': round(target_upside, 2) if target_upside is not None else None
-                }
-                print(f"DEBUG {ticker}: 'target_upside' in pick_data = {'target_upside' in pick_data}")
-                picks_with_perf.append(pick_data)
+                    pick_data = {
+                        **pick,
+                        'sector': get_sector(ticker),
+                        'current_price': round(current_price, 2),
+                        'price_at_rec': round(price_at_rec, 2),
+                        'change_since_rec': round(change_pct, 2),
+                        'target_upside': round(target_upside, 2) if target_upside is not None else None
+                    }
+                    print(f"DEBUG {ticker}: 'target_upside' in pick_data = {'target_upside' in pick_data}")
+                    picks_with_perf.append(pick_data)
             
-            return jsonify({
-                'analysis_date': snapshot.get('analysis_date', ''),
-                'analysis_timestamp': snapshot.get('analysis_timestamp', ''),
-                'top_picks': picks_with_perf,
-                'summary': {
-                    'total_analyzed': len(picks_with_perf),
-                    'avg_score': round(sum(p['final_score'] for p in picks_with_perf) / len(picks_with_perf), 1) if picks_with_perf else 0
+                return {
+                    'analysis_date': snapshot.get('analysis_date', ''),
+                    'analysis_timestamp': snapshot.get('analysis_timestamp', ''),
+                    'top_picks': picks_with_perf,
+                    'summary': {
+                        'total_analyzed': len(picks_with_perf),
+                        'avg_score': round(sum(p['final_score'] for p in picks_with_perf) / len(picks_with_perf), 1) if picks_with_perf else 0
+                    }
                 }
-            })
+            
+            return cached_json('smart-money', [current_file, fundamentals_store.path], build_tracked)
         
         # Fallback to CSV if no tracked data
         csv_path = 'smart_money_picks_v2.csv'
@@ -342,66 +356,69 @@ def get_us_smart_money():
              # to prevent crash/hang
             return jsonify({'top_picks': [], 'summary': {'total_analyzed': 0, 'avg_score': 0}})
         
-        df = pd.read_csv(csv_path)
+        def build_from_csv():
+            df = pd.read_csv(csv_path)
         
-        # DISABLED: Start Fetching real-time prices for CSV data
-        # Fetching prices individually causes timeouts on Render
-        current_prices = {}
-        """
-        tickers = df['ticker'].head(20).tolist()
-        try:
-            import math
-            price_data = yf.download(tickers, period='1d', progress=False)
-            if not price_data.empty:
-                closes = price_data['Close']
-                for ticker in tickers:
-                    try:
-                        if isinstance(closes, pd.DataFrame) and ticker in closes.columns:
-                            val = closes[ticker].iloc[-1]
-                        elif isinstance(closes, pd.Series):
-                            val = closes.iloc[-1]
-                        else:
-                            val = 0
-                        current_prices[ticker] = round(float(val), 2) if not (isinstance(val, float) and math.isnan(val)) else 0
-                    except:
-                        current_prices[ticker] = 0
-        except Exception as e:
-            print(f"Error fetching US real-time prices: {e}")
-        """
-        # DISABLED: End Fetching
+            # DISABLED: Start Fetching real-time prices for CSV data
+            # Fetching prices individually causes timeouts on Render
+            current_prices = {}
+            """
+            tickers = df['ticker'].head(20).tolist()
+            try:
+                import math
+                price_data = yf.download(tickers, period='1d', progress=False)
+                if not price_data.empty:
+                    closes = price_data['Close']
+                    for ticker in tickers:
+                        try:
+                            if isinstance(closes, pd.DataFrame) and ticker in closes.columns:
+                                val = closes[ticker].iloc[-1]
+                            elif isinstance(closes, pd.Series):
+                                val = closes.iloc[-1]
+                            else:
+                                val = 0
+                            current_prices[ticker] = round(float(val), 2) if not (isinstance(val, float) and math.isnan(val)) else 0
+                        except:
+                            current_prices[ticker] = 0
+            except Exception as e:
+                print(f"Error fetching US real-time prices: {e}")
+            """
+            # DISABLED: End Fetching
         
-        top_picks = []
-        for _, row in df.head(20).iterrows():
-            ticker = row['ticker']
-            rec_price = row.get('current_price', 0) or 0
-            cur_price = current_prices.get(ticker, rec_price) or rec_price
+            top_picks = []
+            for _, row in df.head(20).iterrows():
+                ticker = row['ticker']
+                rec_price = row.get('current_price', 0) or 0
+                cur_price = current_prices.get(ticker, rec_price) or rec_price
             
-            if rec_price > 0:
-                change_pct = ((cur_price / rec_price) - 1) * 100
-            else:
-                change_pct = 0
+                if rec_price > 0:
+                    change_pct = ((cur_price / rec_price) - 1) * 100
+                else:
+                    change_pct = 0
             
-            top_picks.append({
-                'ticker': ticker,
-                'name': row.get('name', ticker),
-                'sector': get_sector(ticker),
-                'final_score': row.get('smart_money_score', row.get('composite_score', 0)),
-                'current_price': round(cur_price, 2),
-                'price_at_rec': round(rec_price, 2),
-                'change_since_rec': round(change_pct, 2),
-                'category': row.get('category', 'N/A'),
-                'volume_stage': row.get('volume_stage', 'N/A'),
-                'insider_score': row.get('insider_score', 0),
-                'avg_surprise': row.get('avg_surprise', 0)
-            })
+                top_picks.append({
+                    'ticker': ticker,
+                    'name': row.get('name', ticker),
+                    'sector': get_sector(ticker),
+                    'final_score': row.get('smart_money_score', row.get('composite_score', 0)),
+                    'current_price': round(cur_price, 2),
+                    'price_at_rec': round(rec_price, 2),
+                    'change_since_rec': round(change_pct, 2),
+                    'category': row.get('category', 'N/A'),
+                    'volume_stage': row.get('volume_stage', 'N/A'),
+                    'insider_score': row.get('insider_score', 0),
+                    'avg_surprise': row.get('avg_surprise', 0)
+                })
         
-        return jsonify({
-            'top_picks': top_picks,
-            'summary': {
-                'total_analyzed': len(df),
-                'avg_score': round(df['smart_money_score'].mean() if 'smart_money_score' in df.columns else 0, 1)
+            return {
+                'top_picks': top_picks,
+                'summary': {
+                    'total_analyzed': len(df),
+                    'avg_score': round(df['smart_money_score'].mean() if 'smart_money_score' in df.columns else 0, 1)
+                }
             }
-        })
+        
+        return cached_json(('smart-money-csv', csv_path), [csv_path, fundamentals_store.path], build_from_csv)
         
     except Exception as e:
         print(f"Error getting smart money picks: {e}")
@@ -412,42 +429,43 @@ def get_us_etf_flows():
     """Get ETF Fund Flow Analysis"""
     try:
         csv_path = 'us_etf_flows.csv'
+        ai_path = 'etf_flow_analysis.json'
         
-        if not os.path.exists(csv_path):
+        if not file_cache.exists(csv_path):
             return jsonify({'error': 'ETF flows not found. Run analyze_etf_flows.py first.'}), 404
         
-        df = pd.read_csv(csv_path)
-        
-        # Calculate market sentiment
-        broad_market = df[df['category'] == 'Broad Market']
-        broad_score = round(broad_market['flow_score'].mean(), 1) if not broad_market.empty else 50
-        
-        # Sector summary
-        sector_flows = df[df['category'] == 'Sector'].to_dict(orient='records')
-        
-        # Top inflows and outflows
-        top_inflows = df.nlargest(5, 'flow_score').to_dict(orient='records')
-        top_outflows = df.nsmallest(5, 'flow_score').to_dict(orient='records')
-        
-        # Load AI analysis
-        ai_analysis_text = ""
-        ai_path = 'etf_flow_analysis.json'
-        if os.path.exists(ai_path):
-            try:
-                with open(ai_path, 'r', encoding='utf-8') as f:
-                    ai_data = json.load(f)
-                    ai_analysis_text = ai_data.get('ai_analysis', '')
-            except Exception as e:
-                print(f"Error loading ETF AI analysis: {e}")
+        def build():
+            df = pd.read_csv(csv_path)
+            
+            # Calculate market sentiment
+            broad_market = df[df['category'] == 'Broad Market']
+            broad_score = round(broad_market['flow_score'].mean(), 1) if not broad_market.empty else 50
+            
+            # Sector summary
+            sector_flows = df[df['category'] == 'Sector'].to_dict(orient='records')
+            
+            # Top inflows and outflows
+            top_inflows = df.nlargest(5, 'flow_score').to_dict(orient='records')
+            top_outflows = df.nsmallest(5, 'flow_score').to_dict(orient='records')
+            
+            # Load AI analysis
+            ai_analysis_text = ""
+            if os.path.exists(ai_path):
+                try:
+                    ai_analysis_text = read_json(ai_path).get('ai_analysis', '')
+                except Exception as e:
+                    print(f"Error loading ETF AI analysis: {e}")
 
-        return jsonify({
-            'market_sentiment_score': broad_score,
-            'sector_flows': sector_flows,
-            'top_inflows': top_inflows,
-            'top_outflows': top_outflows,
-            'all_etfs': df.to_dict(orient='records'),
-            'ai_analysis': ai_analysis_text
-        })
+            return {
+                'market_sentiment_score': broad_score,
+                'sector_flows': sector_flows,
+                'top_inflows': top_inflows,
+                'top_outflows': top_outflows,
+                'all_etfs': df.to_dict(orient='records'),
+                'ai_analysis': ai_analysis_text
+            }
+        
+        return cached_json('etf-flows', [csv_path, ai_path], build)
         
     except Exception as e:
         print(f"Error getting ETF flows: {e}")
@@ -461,100 +479,155 @@ def get_us_history_dates():
     try:
         history_dir = 'history'
         
-        if not os.path.exists(history_dir):
+        if not file_cache.exists(history_dir):
             return jsonify({'dates': []})
         
-        dates = []
-        for f in os.listdir(history_dir):
-            if f.startswith('picks_') and f.endswith('.json'):
-                date_str = f[6:-5]  # Extract date from filename
-                dates.append(date_str)
-        
-        dates.sort(reverse=True)  # Most recent first
+        # The directory's mtime moves whenever a snapshot is added or removed
+        def build():
+            dates = []
+            for f in os.listdir(history_dir):
+                if f.startswith('picks_') and f.endswith('.json'):
+                    date_str = f[6:-5]  # Extract date from filename
+                    dates.append(date_str)
+            
+            dates.sort(reverse=True)  # Most recent first
+            
+            return {
+                'dates': dates,
+                'count': len(dates)
+            }
         
-        return jsonify({
-            'dates': dates,
-            'count': len(dates)
-        })
+        return cached_json('history-dates', [history_dir], build)
         
     except Exception as e:
         print(f"Error getting history dates: {e}")
         return jsonify({'error': str(e)}), 500
 
+def fetch_live_closes(tickers) -> dict:
+    """Last close per ticker from a single batched yfinance download"""
+    data = yahoo.call(yf.download, tickers, period='5d', group_by='ticker', auto_adjust=True,
+                      threads=True, progress=False, empty=lambda d: d is None or d.empty)
+    closes = {}
+    if data is None or data.empty:
+        return closes
+    for ticker in tickers:
+        try:
+            col = data[ticker]['Close'] if isinstance(data.columns, pd.MultiIndex) else data['Close']
+            col = col.dropna()
+            if not col.empty:
+                closes[ticker] = round(float(col.iloc[-1]), 2)
+        except KeyError:
+            continue
+    return closes
+
+def get_latest_closes(tickers):
+    """
+    Latest close per ticker from the local price store in one index lookup
+    (or from the in-memory price index, which also covers the light CSV).
+    Only tickers whose last stored bar is more than one business day old (or
+    missing) go to yfinance, in one batched request.
+    Returns ({ticker: close}, whether yfinance was asked).
+    """
+    closes = {}
+    local = price_store.latest_closes(tickers)
+    if local.empty:
+        local = price_index.latest_closes(tickers)
+    if not local.empty:
+        today = np.datetime64(datetime.now().date(), 'D')
+        age = np.busday_count(local['last_date'].values.astype('datetime64[D]'), today)
+        fresh = local.loc[age <= 1, 'last_close']
+        closes = {t: round(float(c), 2) for t, c in fresh.items()}
+    
+    stale = [t for t in tickers if t.upper() not in closes]
+    if stale:
+        try:
+            closes.update({t.upper(): c for t, c in fetch_live_closes(stale).items()})
+        except Exception as e:
+            print(f"Error fetching live prices for {len(stale)} tickers: {e}")
+        # Fall back to the stale local close rather than none at all
+        for t in stale:
+            if t.upper() not in closes and t.upper() in local.index:
+                closes[t.upper()] = round(float(local.at[t.upper(), 'last_close']), 2)
+    
+    return {t: closes[t.upper()] for t in tickers if t.upper() in closes}, bool(stale)
+
+# Dates whose last history payload used live yfinance closes; those responses
+# are rebuilt every LIVE_CLOSES_TTL seconds instead of only on a price ingest
+LIVE_CLOSES_TTL = 15 * 60
+_history_live = {}
+
 @app.route('/api/us/history/<date>')
 def get_us_history_by_date(date):
     """Get picks from a specific historical date with current performance"""
     try:
-        import json
-        import math
-        
         history_file = os.path.join('history', f'picks_{date}.json')
         
         if not os.path.exists(history_file):
             return jsonify({'error': f'No analysis found for {date}'}), 404
         
-        with open(history_file, 'r', encoding='utf-8') as f:
-            snapshot = json.load(f)
-        
-        # Get current prices individually for better reliability
-        tickers = [p['ticker'] for p in snapshot['picks']]
-        current_prices = {}
-        
-        for ticker in tickers:
-            try:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period='5d')
-                if not hist.empty:
-                    current_prices[ticker] = round(float(hist['Close'].dropna().iloc[-1]), 2)
-            except Exception as e:
-                print(f"Error fetching price for {ticker}: {e}")
-        
-        # Add performance data
-        picks_with_perf = []
-        for pick in snapshot['picks']:
-            ticker = pick['ticker']
-            price_at_rec = pick.get('price_at_analysis', 0) or 0
-            current_price = current_prices.get(ticker, price_at_rec) or price_at_rec
-            
-            if isinstance(price_at_rec, float) and math.isnan(price_at_rec):
-                price_at_rec = 0
-            if isinstance(current_price, float) and math.isnan(current_price):
-                current_price = price_at_rec
-            
-            if price_at_rec > 0:
-                change_pct = ((current_price / price_at_rec) - 1) * 100
-            else:
-                change_pct = 0
-            
-            if isinstance(change_pct, float) and math.isnan(change_pct):
-                change_pct = 0
-            
-            picks_with_perf.append({
-                **pick,
-                'sector': get_sector(ticker),
-                'current_price': round(current_price, 2),
-                'price_at_rec': round(price_at_rec, 2),
-                'change_since_rec': round(change_pct, 2)
-            })
-        
-        # Calculate average performance
-        changes = [p['change_since_rec'] for p in picks_with_perf if p['price_at_rec'] > 0]
-        avg_perf = round(sum(changes) / len(changes), 2) if changes else 0
-        
-        return jsonify({
-            'analysis_date': snapshot.get('analysis_date', date),
-            'analysis_timestamp': snapshot.get('analysis_timestamp', ''),
-            'top_picks': picks_with_perf,
-            'summary': {
-                'total': len(picks_with_perf),
-                'avg_performance': avg_perf
-            }
-        })
+        # Rebuilt when the snapshot changes or the next price ingest rewrites
+        # the local prices, and every LIVE_CLOSES_TTL while live closes are in use
+        paths = [history_file, price_store.index_file, price_store.legacy_csv,
+                 price_index.fallback_csv, fundamentals_store.path]
+        version = int(time.time() // LIVE_CLOSES_TTL) if _history_live.get(date) else None
+        return cached_json(('history', date), paths, lambda: _history_payload(date, history_file), version)
         
     except Exception as e:
         print(f"Error getting history for {date}: {e}")
         return jsonify({'error': str(e)}), 500
 
+def _history_payload(date, history_file):
+    """Snapshot picks with performance against the latest closes"""
+    import math
+    
+    snapshot = read_json(history_file)
+    
+    # Latest closes for every pick in one lookup
+    tickers = [p['ticker'] for p in snapshot['picks']]
+    current_prices, _history_live[date] = get_latest_closes(tickers)
+    
+    # Add performance data
+    picks_with_perf = []
+    for pick in snapshot['picks']:
+        ticker = pick['ticker']
+        price_at_rec = pick.get('price_at_analysis', 0) or 0
+        current_price = current_prices.get(ticker, price_at_rec) or price_at_rec
+        
+        if isinstance(price_at_rec, float) and math.isnan(price_at_rec):
+            price_at_rec = 0
+        if isinstance(current_price, float) and math.isnan(current_price):
+            current_price = price_at_rec
+        
+        if price_at_rec > 0:
+            change_pct = ((current_price / price_at_rec) - 1) * 100
+        else:
+            change_pct = 0
+        
+        if isinstance(change_pct, float) and math.isnan(change_pct):
+            change_pct = 0
+        
+        picks_with_perf.append({
+            **pick,
+            'sector': get_sector(ticker),
+            'current_price': round(current_price, 2),
+            'price_at_rec': round(price_at_rec, 2),
+            'change_since_rec': round(change_pct, 2)
+        })
+    
+    # Calculate average performance
+    changes = [p['change_since_rec'] for p in picks_with_perf if p['price_at_rec'] > 0]
+    avg_perf = round(sum(changes) / len(changes), 2) if changes else 0
+    
+    return {
+        'analysis_date': snapshot.get('analysis_date', date),
+        'analysis_timestamp': snapshot.get('analysis_timestamp', ''),
+        'top_picks': picks_with_perf,
+        'summary': {
+            'total': len(picks_with_perf),
+            'avg_performance': avg_perf
+        }
+    }
+
 @app.route('/api/us/macro-analysis')
 def get_us_macro_analysis():
     """Get macro market analysis with live indicators + cached AI predictions"""
@@ -562,8 +635,8 @@ def get_us_macro_analysis():
         import json
         
         # Get language and model preference
-        lang = request.args.get('lang', 'ko')
-        model = request.args.get('model', 'gemini')  # 'gemini' or 'gpt'
+        lang = query_choice('lang')
+        model = query_choice('model')  # 'gemini' or 'gpt'
         
         # === LIVE MACRO INDICATORS ===
         macro_tickers = {
@@ -590,7 +663,7 @@ def get_us_macro_analysis():
             else:
                 analysis_path = 'macro_analysis_gpt.json'
             # Fallback to gemini if GPT file doesn't exist
-            if not os.path.exists(analysis_path):
+            if not file_cache.exists(analysis_path):
                 if lang == 'en':
                     analysis_path = 'macro_analysis_en.json'
                 else:
@@ -601,17 +674,16 @@ def get_us_macro_analysis():
             else:
                 analysis_path = 'macro_analysis.json'
         
-        if not os.path.exists(analysis_path):
+        if not file_cache.exists(analysis_path):
             analysis_path = 'macro_analysis.json'
         
         ai_analysis = "AI 분석을 로드할 수 없습니다. macro_analyzer.py를 실행하세요."
         
-        if os.path.exists(analysis_path):
-            with open(analysis_path, 'r', encoding='utf-8') as f:
-                cached = json.load(f)
-                ai_analysis = cached.get('ai_analysis', ai_analysis)
-                # Start with cached indicators
-                macro_indicators = cached.get('macro_indicators', {})
+        if file_cache.exists(analysis_path):
+            cached = file_cache.load(analysis_path)
+            ai_analysis = cached.get('ai_analysis', ai_analysis)
+            # Start with cached indicators
+            macro_indicators = cached.get('macro_indicators', {})
         
         # === UPDATE KEY INDICATORS WITH LIVE DATA ===
         # DISABLED: Helper logic for Render
@@ -626,11 +698,10 @@ def get_us_macro_analysis():
         }
         
         try:
-            import time as t
             for name, ticker in live_tickers.items():
                 try:
                     stock = yf.Ticker(ticker)
-                    hist = stock.history(period='5d')
+                    hist = yahoo.call(stock.history, period='5d')
                     
                     if not hist.empty and len(hist) >= 2:
                         current = float(hist['Close'].iloc[-1])
@@ -642,14 +713,15 @@ def get_us_macro_analysis():
                             'current': round(current, 2),
                             'change_1d': round(change_pct, 2)
                         }
-                    t.sleep(0.3)
                 except Exception as e:
                     print(f"Error fetching live {name}: {e}")
         except Exception as e:
             print(f"Error in live data loop: {e}")
         """
         
-        return jsonify({
+        # The timestamp is taken when the response is built for the current
+        # analysis file, so the body (and its ETag) holds until it is rewritten
+        return cached_json(('macro-analysis', model, analysis_path), [analysis_path], lambda: {
             'macro_indicators': macro_indicators,
             'ai_analysis': ai_analysis,
             'model': model,
@@ -669,17 +741,14 @@ def get_us_sector_heatmap():
         # Load sector heatmap data
         heatmap_path = 'sector_heatmap.json'
         
-        if not os.path.exists(heatmap_path):
+        if not file_cache.exists(heatmap_path):
             # Generate fresh data if not exists
             from sector_heatmap import SectorHeatmapCollector
             collector = SectorHeatmapCollector()
             data = collector.get_sector_performance('1d')
             return jsonify(data)
         
-        with open(heatmap_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        return jsonify(data)
+        return cached_json('sector-heatmap', [heatmap_path], lambda: read_json(heatmap_path))
         
     except Exception as e:
         print(f"Error getting sector heatmap: {e}")
@@ -694,13 +763,10 @@ def get_us_options_flow():
         # Load options flow data
         flow_path = 'options_flow.json'
         
-        if not os.path.exists(flow_path):
+        if not file_cache.exists(flow_path):
             return jsonify({'error': 'Options flow data not found. Run options_flow.py first.'}), 404
         
-        with open(flow_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        return jsonify(data)
+        return cached_json('options-flow', [flow_path], lambda: read_json(flow_path))
         
     except Exception as e:
         print(f"Error getting options flow: {e}")
@@ -713,35 +779,37 @@ def get_us_ai_summary(ticker):
         import json
         
         # Get language preference
-        lang = request.args.get('lang', 'ko')
+        lang = query_choice('lang')
         
         # Load AI summaries
         summary_path = 'ai_summaries.json'
         
-        if not os.path.exists(summary_path):
+        if not file_cache.exists(summary_path):
             return jsonify({'error': 'AI summaries not found. Run ai_summary_generator.py first.'}), 404
         
-        with open(summary_path, 'r', encoding='utf-8') as f:
-            summaries = json.load(f)
+        summaries = file_cache.load(summary_path)
         
         if ticker not in summaries:
             return jsonify({'error': f'Summary not found for {ticker}'}), 404
         
-        summary_data = summaries[ticker]
-        
-        # Get summary in requested language (fallback to Korean if English not available)
-        if lang == 'en':
-            summary = summary_data.get('summary_en', summary_data.get('summary', ''))
-        else:
-            summary = summary_data.get('summary_ko', summary_data.get('summary', ''))
+        def build():
+            summary_data = summaries[ticker]
+            
+            # Get summary in requested language (fallback to Korean if English not available)
+            if lang == 'en':
+                summary = summary_data.get('summary_en', summary_data.get('summary', ''))
+            else:
+                summary = summary_data.get('summary_ko', summary_data.get('summary', ''))
+            
+            return {
+                'ticker': ticker,
+                'summary': summary,
+                'lang': lang,
+                'news_count': summary_data.get('news_count', 0),
+                'updated': summary_data.get('updated', '')
+            }
         
-        return jsonify({
-            'ticker': ticker,
-            'summary': summary,
-            'lang': lang,
-            'news_count': summary_data.get('news_count', 0),
-            'updated': summary_data.get('updated', '')
-        })
+        return cached_json(('ai-summary', ticker, lang), [summary_path], build)
         
     except Exception as e:
         print(f"Error getting AI summary for {ticker}: {e}")
@@ -755,50 +823,87 @@ def get_us_calendar():
         calendar_path = 'weekly_calendar.json'
         
         # If file doesn't exist, return empty
-        if not os.path.exists(calendar_path):
+        if not file_cache.exists(calendar_path):
             return jsonify({'events': [], 'message': 'Calendar data not available'}), 404
             
-        with open(calendar_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-        return jsonify(data)
+        return cached_json('calendar', [calendar_path], lambda: read_json(calendar_path))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Sections served by /api/us/bootstrap, in first-paint order
+BOOTSTRAP_SECTIONS = {
+    'portfolio': get_us_portfolio_data,
+    'smart_money': get_us_smart_money,
+    'etf_flows': get_us_etf_flows,
+    'history_dates': get_us_history_dates,
+    'macro': get_us_macro_analysis,
+    'sector_heatmap': get_us_sector_heatmap,
+    'options_flow': get_us_options_flow,
+    'calendar': get_us_calendar,
+}
+
+# Macro query values the bootstrap accepts (anything else would only mint new cache keys)
+# Spliced bodies keyed on (sections, args, section tags); stale tags age out
+bootstrap_cache = IndicatorCache(maxsize=64)
+
+def _section_body(view, args):
+    """Identity-encoded body, status and tag of a section view"""
+    with app.test_request_context(query_string=args):
+        resp = app.make_response(view())
+    body = resp.get_data().strip()
+    tag = resp.get_etag()[0] or hashlib.sha1(body).hexdigest()
+    return body, resp.status_code, tag
+
+@app.route('/api/us/bootstrap')
+def get_us_bootstrap():
+    """
+    Whole dashboard state in one response: {section: payload, ..., 'status': {section: code}}
+    ?sections=portfolio,smart_money picks a subset; lang/model are passed to macro.
+    """
+    try:
+        requested = request.args.get('sections')
+        wanted = {n.strip() for n in requested.split(',') if n.strip()} if requested else set(BOOTSTRAP_SECTIONS)
+        unknown = sorted(wanted - set(BOOTSTRAP_SECTIONS))
+        if unknown:
+            return jsonify({'error': f"Unknown sections: {', '.join(unknown)}",
+                            'available': list(BOOTSTRAP_SECTIONS)}), 400
+        # Canonical (first-paint) order, so every spelling of a subset shares one cache entry
+        names = [n for n in BOOTSTRAP_SECTIONS if n in wanted]
+        
+        args = {k: request.args[k] for k in QUERY_CHOICES if k in request.args}
+        invalid = [k for k, v in args.items() if v not in QUERY_CHOICES[k]]
+        if invalid:
+            return jsonify({'error': f"Invalid {', '.join(invalid)}",
+                            'allowed': {k: list(v) for k, v in QUERY_CHOICES.items()}}), 400
+        parts = {name: _section_body(BOOTSTRAP_SECTIONS[name], args if name == 'macro' else {})
+                 for name in names}
+        
+        # Sections are served from the response cache, so splice their bytes
+        # instead of re-encoding; the combined body is rebuilt (and compressed)
+        # only when one of the sections changes
+        def build():
+            status = json.dumps({name: code for name, (_, code, _) in parts.items()}).encode()
+            body = b'{' + b','.join(json.dumps(name).encode() + b':' + data
+                                    for name, (data, _, _) in parts.items())
+            body += b',"status":' + status + b'}'
+            return PreparedResponse(body)
+        
+        tags = tuple(tag for _, _, tag in parts.values())
+        key = (tuple(names), tuple(sorted(args.items())), tags)
+        return send_prepared(bootstrap_cache.get(key, build))
+        
+    except Exception as e:
+        print(f"Error building bootstrap payload: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/us/stock-chart/<ticker>')
 def get_us_stock_chart(ticker):
     """Get stock price history for charting"""
     try:
-        import pandas as pd
-        from datetime import datetime
-        
         period = request.args.get('period', '1y')
         
-        # Determine CSV path (try full first, then light)
-        csv_path = 'us_daily_prices.csv'
-        if not os.path.exists(csv_path):
-            csv_path = 'us_daily_prices_light.csv'
-            
-        if not os.path.exists(csv_path):
-             return jsonify({'error': 'Price data not found.'}), 404
-             
-        # Read data
-        try:
-            # Optimize: Read only needed columns
-            df = pd.read_csv(csv_path)
-        except Exception as e:
-            return jsonify({'error': f"Error reading CSV: {str(e)}"}), 500
-            
-        # Filter by ticker - Case insensitive
-        df_ticker = df[df['ticker'].astype(str).str.upper() == ticker.upper()].copy()
-        
-        if df_ticker.empty:
-             return jsonify({'error': f'No data found for {ticker}'}), 404
-             
-        # Filter by period
-        df_ticker['date'] = pd.to_datetime(df_ticker['date'])
-        
+        cutoff_date = None
         if period != 'all':
             days = 365 # Default 1y
             if period == '1m': days = 30
@@ -807,36 +912,25 @@ def get_us_stock_chart(ticker):
             elif period == '5y': days = 365 * 5
             
             cutoff_date = datetime.now() - timedelta(days=days)
-            df_ticker = df_ticker[df_ticker['date'] >= cutoff_date]
-            
+        
+        if not price_index.available():
+             return jsonify({'error': 'Price data not found.'}), 404
+        
+        # O(rows returned): binary-search the ticker's date range in the in-memory index
+        arrays = price_index.slice(ticker, start=cutoff_date)
+        
+        if arrays is None or len(arrays['time']) == 0:
+             return jsonify({'error': f'No data found for {ticker}'}), 404
+        
         # Format for Lightweight Charts (TradingView)
         # candles = [{time: timestamp(seconds), open, high, low, close}]
-        candles = []
-        for _, row in df_ticker.iterrows():
-            try:
-                # Handle potential key case sensitivity from different CSV sources
-                # Try lowercase first (light CSV), then Title case (yfinance)
-                op = float(row.get('open', row.get('Open', 0)))
-                hi = float(row.get('high', row.get('High', 0)))
-                lo = float(row.get('low', row.get('Low', 0)))
-                cl = float(row.get('current_price', row.get('Close', 0))) # light CSV uses current_price
-                
-                # Timestamp needs to be in seconds for Lightweight Charts
-                ts = int(row['date'].timestamp())
-                
-                candles.append({
-                    'time': ts,
-                    'open': op,
-                    'high': hi,
-                    'low': lo,
-                    'close': cl
-                })
-            except Exception as e:
-                print(f"Error parsing row for {ticker}: {e}")
-                continue
-            
-        # Sort by date
-        candles.sort(key=lambda x: x['time'])
+        candles = [
+            {'time': ts, 'open': op, 'high': hi, 'low': lo, 'close': cl}
+            for ts, op, hi, lo, cl in zip(
+                arrays['time'].tolist(), arrays['open'].tolist(), arrays['high'].tolist(),
+                arrays['low'].tolist(), arrays['close'].tolist()
+            )
+        ]
         
         return jsonify({
             'ticker': ticker,
@@ -848,111 +942,57 @@ def get_us_stock_chart(ticker):
         print(f"Error serving chart for {ticker}: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Computed indicator payloads, keyed on (ticker, period, data version, day)
+indicator_cache = IndicatorCache(maxsize=256)
+
+def _remote_arrays(ticker, period):
+    """OHLCV arrays from yfinance for tickers missing from the local store"""
+    hist = yahoo.call(yf.Ticker(ticker).history, period=period)
+    if hist.empty:
+        return None
+    return {
+        'time': np.array([int(d.timestamp()) for d in hist.index], dtype=np.int64),
+        'high': hist['High'].to_numpy(dtype=np.float64),
+        'low': hist['Low'].to_numpy(dtype=np.float64),
+        'close': hist['Close'].to_numpy(dtype=np.float64),
+        'volume': hist['Volume'].to_numpy(dtype=np.float64),
+    }
+
+def _indicator_entry(ticker, period):
+    """(payload, arrays) for a ticker from the LRU; None if there is no data"""
+    ticker = ticker.upper()
+    today = datetime.now().date()
+    
+    if price_index.available():
+        key = (ticker, period, price_index.version(), today)
+        
+        def build_local():
+            arrays = price_index.slice(ticker, start=period_start(period))
+            if arrays is None or len(arrays['time']) == 0:
+                return None
+            return indicator_payload(ticker, arrays), arrays
+        
+        entry = indicator_cache.get(key, build_local)
+        if entry is not None:
+            return entry
+    
+    def build_remote():
+        arrays = _remote_arrays(ticker, period)
+        return (indicator_payload(ticker, arrays), arrays) if arrays is not None else None
+    
+    return indicator_cache.get((ticker, period, 'remote', today), build_remote)
+
 @app.route('/api/us/technical-indicators/<ticker>')
 def get_technical_indicators(ticker):
     """Get technical indicators (RSI, MACD, Bollinger Bands, Support/Resistance)"""
     try:
-        import ta
-        from ta.momentum import RSIIndicator
-        from ta.trend import MACD
-        from ta.volatility import BollingerBands
-        
         period = request.args.get('period', '1y')
         
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period)
-        
-        if hist.empty:
+        entry = _indicator_entry(ticker, period)
+        if entry is None:
             return jsonify({'error': f'No data found for {ticker}'}), 404
         
-        df = hist.reset_index()
-        close = df['Close']
-        high = df['High']
-        low = df['Low']
-        
-        # RSI (14-period)
-        rsi_indicator = RSIIndicator(close=close, window=14)
-        df['rsi'] = rsi_indicator.rsi()
-        
-        # MACD (12, 26, 9)
-        macd = MACD(close=close, window_slow=26, window_fast=12, window_sign=9)
-        df['macd_line'] = macd.macd()
-        df['signal_line'] = macd.macd_signal()
-        df['macd_histogram'] = macd.macd_diff()
-        
-        # Bollinger Bands (20-period, 2 std)
-        bb = BollingerBands(close=close, window=20, window_dev=2)
-        df['bb_upper'] = bb.bollinger_hband()
-        df['bb_middle'] = bb.bollinger_mavg()
-        df['bb_lower'] = bb.bollinger_lband()
-        
-        # Support & Resistance detection (simple pivot-based)
-        def find_support_resistance(df, window=20):
-            supports = []
-            resistances = []
-            
-            for i in range(window, len(df) - window):
-                low_window = low.iloc[i-window:i+window+1]
-                high_window = high.iloc[i-window:i+window+1]
-                
-                # Local minimum = Support
-                if low.iloc[i] == low_window.min():
-                    supports.append(float(low.iloc[i]))
-                    
-                # Local maximum = Resistance
-                if high.iloc[i] == high_window.max():
-                    resistances.append(float(high.iloc[i]))
-            
-            # Cluster and deduplicate (within 2% range)
-            def cluster_levels(levels, threshold=0.02):
-                if not levels:
-                    return []
-                levels = sorted(levels)
-                clusters = []
-                current_cluster = [levels[0]]
-                
-                for level in levels[1:]:
-                    if (level - current_cluster[0]) / current_cluster[0] < threshold:
-                        current_cluster.append(level)
-                    else:
-                        clusters.append(sum(current_cluster) / len(current_cluster))
-                        current_cluster = [level]
-                clusters.append(sum(current_cluster) / len(current_cluster))
-                return [round(c, 2) for c in clusters[-5:]]  # Top 5 recent levels
-            
-            return cluster_levels(supports), cluster_levels(resistances)
-        
-        supports, resistances = find_support_resistance(df)
-        
-        # Prepare response
-        def make_series(dates, values):
-            result = []
-            for date, val in zip(dates, values):
-                if pd.notna(val):
-                    result.append({
-                        'time': int(date.timestamp()),
-                        'value': round(float(val), 2)
-                    })
-            return result
-        
-        return jsonify({
-            'ticker': ticker,
-            'rsi': make_series(df['Date'], df['rsi']),
-            'macd': {
-                'macd_line': make_series(df['Date'], df['macd_line']),
-                'signal_line': make_series(df['Date'], df['signal_line']),
-                'histogram': make_series(df['Date'], df['macd_histogram'])
-            },
-            'bollinger': {
-                'upper': make_series(df['Date'], df['bb_upper']),
-                'middle': make_series(df['Date'], df['bb_middle']),
-                'lower': make_series(df['Date'], df['bb_lower'])
-            },
-            'support_resistance': {
-                'support': supports,
-                'resistance': resistances
-            }
-        })
+        return jsonify({**entry[0], 'ticker': ticker})
         
     except Exception as e:
         print(f"Error getting technical indicators for {ticker}: {e}")
@@ -960,45 +1000,81 @@ def get_technical_indicators(ticker):
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/us/technical-indicators/batch')
+def get_technical_indicators_batch():
+    """
+    Indicators for many tickers in one call: ?tickers=AAPL,MSFT&period=1y
+    Returns latest-value summaries (for table badges); full=1 returns full series.
+    """
+    try:
+        period = request.args.get('period', '1y')
+        full = request.args.get('full', '0') in ('1', 'true')
+        tickers = [t.strip() for t in request.args.get('tickers', '').split(',') if t.strip()]
+        if not tickers:
+            return jsonify({'error': 'tickers parameter required'}), 400
+        if len(tickers) > 100:
+            return jsonify({'error': 'At most 100 tickers per request'}), 400
+        
+        indicators = {}
+        for ticker in tickers:
+            try:
+                entry = _indicator_entry(ticker, period)
+            except Exception as e:
+                indicators[ticker] = {'error': str(e)}
+                continue
+            if entry is None:
+                indicators[ticker] = {'error': f'No data found for {ticker}'}
+            elif full:
+                indicators[ticker] = {**entry[0], 'ticker': ticker}
+            else:
+                indicators[ticker] = indicator_summary(ticker, *entry)
+        
+        return jsonify({'period': period, 'indicators': indicators})
+        
+    except Exception as e:
+        print(f"Error getting batch technical indicators: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+# Background runner for pipeline scripts triggered from the dashboard
+job_runner = JobRunner(os.path.dirname(os.path.abspath(__file__)))
+
+REANALYZE_STAGES = [
+    ('Final Report', ['final_report_generator.py'], 120),
+]
 
 @app.route('/api/us/reanalyze', methods=['POST'])
 def reanalyze_us_data():
-    """Run final_report_generator.py to regenerate Smart Money picks"""
+    """Queue final_report_generator.py; clicks while a run is active join that run"""
     try:
-        import subprocess
-        
-        # Run the script
-        result = subprocess.run(
-            ['python', 'final_report_generator.py'],
-            capture_output=True,
-            text=True,
-            cwd=os.path.dirname(__file__),
-            timeout=120  # 2 minutes timeout
-        )
-        
-        if result.returncode == 0:
-            return jsonify({
-                'success': True,
-                'message': 'Smart Money picks regenerated successfully',
-                'output': result.stdout
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': f'Script failed: {result.stderr}'
-            }), 500
-            
-    except subprocess.TimeoutExpired:
+        job, coalesced = job_runner.submit('reanalyze', REANALYZE_STAGES)
         return jsonify({
-            'success': False,
-            'error': 'Script execution timeout (>2 minutes)'
-        }), 500
+            'success': True,
+            'job_id': job['id'],
+            'state': job['state'],
+            'coalesced': coalesced,
+            'status_url': f"/api/us/jobs/{job['id']}",
+            'message': 'Reanalysis already running' if coalesced else 'Reanalysis queued'
+        }), 202
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/us/jobs/<job_id>')
+def get_us_job(job_id):
+    """Progress, per-stage timings and outcome of a background job"""
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job not found: {job_id}'}), 404
+    return jsonify(job)
+
+@app.route('/api/us/rate-limits')
+def get_us_rate_limits():
+    """Per-host request counters and current adaptive rate for this worker"""
+    return jsonify({'pid': os.getpid(), 'hosts': host_stats()})
+
 if __name__ == '__main__':
     import os
     port = int(os.environ.get('PORT', 5001))
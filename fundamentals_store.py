@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fundamentals Snapshot Store
+On-disk cache of yfinance `.info` payloads keyed by ticker, with per-field TTLs.
+Shared by the 13F analyzer, the screener and the dashboard sector lookup so each
+ticker's info is fetched at most once per TTL window across the whole pipeline.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 3600
+
+# Per-field time-to-live (seconds). Fields not listed use DEFAULT_TTL.
+FIELD_TTLS = {
+    # Static profile
+    'sector': 90 * DAY, 'industry': 90 * DAY,
+    'longName': 30 * DAY, 'shortName': 30 * DAY,
+    # Ownership / share structure (changes with quarterly filings)
+    'heldPercentInstitutions': 7 * DAY, 'heldPercentInsiders': 7 * DAY,
+    'floatShares': 7 * DAY, 'sharesOutstanding': 7 * DAY,
+    'shortPercentOfFloat': 7 * DAY,
+    # Valuation, growth and profitability (move with price / earnings)
+    'trailingPE': DAY, 'forwardPE': DAY, 'priceToBook': DAY,
+    'revenueGrowth': 7 * DAY, 'earningsGrowth': 7 * DAY,
+    'profitMargins': 7 * DAY, 'returnOnEquity': 7 * DAY,
+    'marketCap': DAY, 'dividendYield': DAY,
+    # Analyst coverage and quotes (change daily)
+    'targetMeanPrice': DAY, 'recommendationKey': DAY,
+    'currentPrice': DAY, 'regularMarketPrice': DAY,
+}
+DEFAULT_TTL = DAY
+
+# Field sets used by each consumer
+INSTITUTIONAL_FIELDS = ['heldPercentInstitutions', 'heldPercentInsiders', 'floatShares',
+                        'sharesOutstanding', 'shortPercentOfFloat']
+FUNDAMENTAL_FIELDS = ['trailingPE', 'forwardPE', 'priceToBook', 'revenueGrowth', 'earningsGrowth',
+                      'profitMargins', 'returnOnEquity', 'marketCap', 'dividendYield']
+ANALYST_FIELDS = ['longName', 'shortName', 'currentPrice', 'regularMarketPrice',
+                  'targetMeanPrice', 'recommendationKey']
+
+# yfinance sector names -> dashboard short codes
+SECTOR_SHORT_MAP = {
+    'Technology': 'Tech',
+    'Information Technology': 'Tech',
+    'Healthcare': 'Health',
+    'Health Care': 'Health',
+    'Financials': 'Fin',
+    'Financial Services': 'Fin',
+    'Consumer Discretionary': 'Cons',
+    'Consumer Cyclical': 'Cons',
+    'Consumer Staples': 'Staple',
+    'Consumer Defensive': 'Staple',
+    'Energy': 'Energy',
+    'Industrials': 'Indust',
+    'Materials': 'Mater',
+    'Basic Materials': 'Mater',
+    'Utilities': 'Util',
+    'Real Estate': 'REIT',
+    'Communication Services': 'Comm',
+    'Sector': 'Unknown'
+}
+
+
+def short_sector(sector: Optional[str]) -> str:
+    """Map a yfinance sector name to the dashboard short code"""
+    if not sector:
+        return '-'
+    return SECTOR_SHORT_MAP.get(sector, sector[:5])
+
+
+class FundamentalsStore:
+    """
+    fundamentals_cache.json layout:
+    {ticker: {'info': {field: value}, 'fetched_at': {field: epoch_seconds}, 'fetched': epoch_seconds}}
+
+    `fetched` is the last full fetch; a field yfinance did not return then counts
+    as fresh (absent) until its TTL runs out, so sparse tickers are not refetched
+    on every lookup.
+    """
+
+    def __init__(self, data_dir: str = '.', cache_file: str = 'fundamentals_cache.json'):
+        self.path = os.path.join(data_dir, cache_file)
+        self._lock = threading.RLock()
+        self._data: Dict[str, Dict] = {}
+        self._mtime = None
+        self._dirty = False
+        self.fetches = 0
+        self.hits = 0
+        self.load()
+
+    # ------------------------------------------------------------------
+    # Bulk load / write
+    # ------------------------------------------------------------------
+    def load(self):
+        """(Re)load the snapshot file if it changed on disk"""
+        with self._lock:
+            if not os.path.exists(self.path):
+                return
+            mtime = os.path.getmtime(self.path)
+            if mtime == self._mtime:
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+                self._mtime = mtime
+            except Exception as e:
+                logger.warning(f"⚠️ Could not read {self.path}: {e}")
+
+    def save(self):
+        """Write the snapshot file if anything was fetched since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False, default=str)
+            os.replace(tmp, self.path)
+            self._mtime = os.path.getmtime(self.path)
+            self._dirty = False
+            logger.info(f"💾 Saved fundamentals for {len(self._data)} tickers "
+                        f"({self.fetches} fetched, {self.hits} from cache)")
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def is_fresh(self, ticker: str, fields: Optional[Iterable[str]] = None) -> bool:
+        """True if every requested field is cached and within its TTL"""
+        entry = self._data.get(ticker)
+        if not entry:
+            return False
+        fetched_at = entry.get('fetched_at', {})
+        now = time.time()
+        for field in (fields if fields is not None else fetched_at.keys()):
+            ts = fetched_at.get(field, entry.get('fetched'))
+            if ts is None or now - ts > FIELD_TTLS.get(field, DEFAULT_TTL):
+                return False
+        return True
+
+    def peek(self, ticker: str, field: str, default=None):
+        """Cached value regardless of age; never fetches"""
+        entry = self._data.get(ticker)
+        if not entry:
+            return default
+        return entry.get('info', {}).get(field, default)
+
+    def put(self, ticker: str, info: Dict):
+        """
+        Record a freshly fetched (full) info payload. Fields cached earlier but
+        missing from it are dropped, so they count as absent as of this fetch
+        instead of keeping an old timestamp that makes every lookup refetch.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._data.setdefault(ticker, {'info': {}, 'fetched_at': {}})
+            entry['info'] = dict(info)
+            entry['fetched_at'] = {field: now for field in info}
+            entry['fetched'] = now
+            self._dirty = True
+
+    def fetch(self, ticker: str) -> Dict:
+        """Fetch `.info` from yfinance and store it"""
+        import yfinance as yf
+
+        info = yf.Ticker(ticker).info or {}
+        with self._lock:
+            self.fetches += 1
+        if info:
+            self.put(ticker, info)
+        return info
+
+    def get(self, ticker: str, fields: Optional[List[str]] = None, fetch: bool = True) -> Dict:
+        """
+        Info payload for a ticker. Fetches from yfinance only when a requested
+        field is missing or past its TTL (and fetch=True).
+        Raises whatever yfinance raises when a required fetch fails.
+        """
+        with self._lock:
+            fresh = self.is_fresh(ticker, fields)
+            self.hits += fresh
+        if fresh or not fetch:
+            return dict(self._data.get(ticker, {}).get('info', {}))
+        self.fetch(ticker)
+        return dict(self._data.get(ticker, {}).get('info', {}))
+
+    def get_many(self, tickers: Iterable[str], fields: Optional[List[str]] = None,
+                 fetch: bool = True) -> Dict[str, Dict]:
+        """Bulk lookup; failed fetches return whatever is cached (possibly {})"""
+        results = {}
+        for ticker in tickers:
+            try:
+                results[ticker] = self.get(ticker, fields, fetch)
+            except Exception as e:
+                logger.debug(f"Fundamentals fetch failed for {ticker}: {e}")
+                results[ticker] = dict(self._data.get(ticker, {}).get('info', {}))
+        return results
+
+    def stale_tickers(self, tickers: Iterable[str], fields: Optional[List[str]] = None) -> List[str]:
+        """Tickers that would trigger a fetch for the given fields"""
+        return [t for t in tickers if not self.is_fresh(t, fields)]
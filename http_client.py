@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared HTTP Client
+One pooled keep-alive session per upstream host, so the TCP+TLS handshake is
+paid once per host per run, and default (connect, read) timeouts on every
+call. With HTTP2=1 and httpx[http2] installed, sessions speak HTTP/2 instead;
+responses expose the same status_code / content / text / json() / headers.
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx  # optional: pip install 'httpx[http2]'
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+except ImportError:
+    httpx = None
+
+DEFAULT_TIMEOUT = (5.0, 30.0)  # (connect, read) seconds
+POOL_SIZE = 16  # keep-alive connections per host (matches the fetch engine's concurrency)
+
+Timeout = Union[float, Tuple[float, float]]
+
+_sessions: Dict[str, object] = {}
+_lock = threading.Lock()
+
+
+def http2_enabled() -> bool:
+    return httpx is not None and os.getenv('HTTP2', '').lower() in ('1', 'true', 'yes')
+
+
+def _new_session():
+    if http2_enabled():
+        limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+        return httpx.Client(http2=True, follow_redirects=True, limits=limits)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def session_for(host: str):
+    """The process-wide pooled session for a host"""
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = _sessions[host] = _new_session()
+        return session
+
+
+def request(method: str, url: str, timeout: Optional[Timeout] = None, **kwargs):
+    """Send a request on the host's pooled session (DEFAULT_TIMEOUT unless given)"""
+    session = session_for(urlsplit(url).netloc)
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    if httpx is not None and isinstance(session, httpx.Client):
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        timeout = httpx.Timeout(read, connect=connect)
+    return session.request(method, url, timeout=timeout, **kwargs)
+
+
+def get(url: str, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def close_all():
+    """Close every pooled session (they are recreated on next use)"""
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
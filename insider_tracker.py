@@ -4,6 +4,8 @@ import pandas as pd
 import yfinance as yf
 from datetime import datetime
 
+from fetch_engine import FetchEngine, log_host_stats, raise_if_throttled
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -34,12 +36,15 @@ class InsiderTracker:
                     'shares': int(row.get('Shares', 0) or 0)
                 })
             return recent_buys
-        except: return []
+        except Exception as e:
+            raise_if_throttled(e)
+            return []
 
     def analyze_tickers(self, tickers):
+        tickers = list(tickers)
         results = {}
-        for t in tickers:
-            activities = self.get_insider_activity(t)
+        activity = FetchEngine('yahoo').map(self.get_insider_activity, tickers, default=[])
+        for t, activities in zip(tickers, activity):
             if activities:
                 score = sum(10 for a in activities if a['value'] > 100000)
                 results[t] = {'score': score, 'transactions': activities[:5]}
@@ -47,6 +52,7 @@ class InsiderTracker:
         with open(self.output_file, 'w') as f:
             json.dump({'details': results}, f, indent=2)
         logger.info("Saved insider_moves.json")
+        log_host_stats()
 
 if __name__ == "__main__":
     # Top stocks example
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Background Job Runner
+Runs pipeline scripts off the request thread. Submissions of a kind that is
+already queued or running coalesce into that job; job state is persisted to
+jobs/<id>.json so any worker process can report it.
+"""
+
+import os
+import sys
+import json
+import uuid
+import time
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl  # POSIX only; without it coalescing is per process
+except ImportError:
+    fcntl = None
+
+ACTIVE_STATES = ('queued', 'running')
+
+
+class JobRunner:
+    def __init__(self, base_dir: str = '.', jobs_dir: str = 'jobs', max_workers: int = 1, keep: int = 50):
+        self.base_dir = base_dir
+        self.jobs_dir = os.path.join(base_dir, jobs_dir)
+        self.keep = keep
+        self._lock = threading.RLock()
+        self._jobs: Dict[str, Dict] = {}
+        self._active: Dict[str, str] = {}  # kind -> job id
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _persist(self, job: Dict):
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        tmp = self._path(job['id']) + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self._path(job['id']))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Job state from this process, or from disk if another worker owns it"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return json.loads(json.dumps(job))
+        if not all(c.isalnum() for c in job_id):
+            return None
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # ------------------------------------------------------------------
+    # Cross-process exclusivity
+    # ------------------------------------------------------------------
+    def _acquire(self, kind: str, job: Dict):
+        """
+        Lock the kind for `job`; returns (handle, None) or (None, owner id). The
+        job is persisted before its id goes into the lock file, so another
+        worker that reads the owner can always load it. The owner id is ''
+        while the lock holder has not written it yet.
+        """
+        if fcntl is None:
+            return None, None
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        handle = open(os.path.join(self.jobs_dir, f"{kind}.lock"), 'a+')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.seek(0)
+            owner = handle.read().strip()
+            handle.close()
+            return None, owner
+        self._persist(job)
+        handle.seek(0)
+        handle.truncate()
+        handle.write(job['id'])
+        handle.flush()
+        return handle, None
+
+    def _claim(self, kind: str, job: Dict, attempts: int = 20, delay: float = 0.05):
+        """
+        (handle, None) once the kind's lock is ours, or (None, active job) while
+        another worker holds it. A held lock always means a run is in progress:
+        an owner whose state already reads finished is about to release it, so
+        retry; one that cannot be loaded is reported as running.
+        """
+        owner = ''
+        for _ in range(attempts):
+            handle, owner = self._acquire(kind, job)
+            if owner is None:
+                return handle, None
+            other = self.get(owner) if owner else None
+            if other is not None and other['state'] in ACTIVE_STATES:
+                return None, other
+            time.sleep(delay)
+        other = self.get(owner) if owner else None
+        if other is None:
+            other = {'id': owner or None, 'kind': kind, 'state': 'running'}
+        return None, other
+
+    # ------------------------------------------------------------------
+    # Submission / execution
+    # ------------------------------------------------------------------
+    def submit(self, kind: str, stages: List[Tuple[str, List[str], int]]) -> Tuple[Dict, bool]:
+        """
+        Queue a job of `stages` [(name, argv, timeout_s)] unless one of the same
+        kind is already active. Returns (job, coalesced).
+        """
+        with self._lock:
+            active_id = self._active.get(kind)
+            if active_id and self._jobs[active_id]['state'] in ACTIVE_STATES:
+                return json.loads(json.dumps(self._jobs[active_id])), True
+
+            job_id = uuid.uuid4().hex[:12]
+            job = {
+                'id': job_id,
+                'kind': kind,
+                'state': 'queued',
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'started': None,
+                'finished': None,
+                'progress': 0.0,
+                'current_stage': None,
+                'stages': [{'name': name, 'state': 'pending', 'seconds': None} for name, _, _ in stages],
+                'error': None,
+            }
+            handle, active = self._claim(kind, job)
+            if active is not None:
+                return active, True
+
+            self._jobs[job_id] = job
+            self._active[kind] = job_id
+            self._prune()
+            self._persist(job)
+
+        self._pool.submit(self._run, job_id, stages, handle)
+        return json.loads(json.dumps(job)), False
+
+    def _update(self, job: Dict, **fields):
+        with self._lock:
+            job.update(fields)
+            self._persist(job)
+
+    def _run(self, job_id: str, stages, handle):
+        job = self._jobs[job_id]
+        self._update(job, state='running', started=datetime.now().isoformat(timespec='seconds'))
+        state, error = 'succeeded', None
+        try:
+            for i, (name, argv, timeout) in enumerate(stages):
+                stage = job['stages'][i]
+                self._update(job, current_stage=name)
+                stage['state'] = 'running'
+                t0 = time.time()
+                try:
+                    result = subprocess.run([sys.executable] + argv, capture_output=True, text=True,
+                                            cwd=self.base_dir, timeout=timeout)
+                    ok = result.returncode == 0
+                    stage['output'] = result.stdout[-2000:]
+                    if not ok:
+                        error = f"Script failed: {result.stderr[-2000:]}"
+                except subprocess.TimeoutExpired:
+                    ok, error = False, f"Script execution timeout (>{timeout} seconds)"
+                stage['seconds'] = round(time.time() - t0, 2)
+                stage['state'] = 'succeeded' if ok else 'failed'
+                if not ok:
+                    state = 'failed'
+                    break
+                self._update(job, progress=round((i + 1) / len(stages), 3))
+        except Exception as e:
+            state, error = 'failed', str(e)
+        finally:
+            # Outputs are swapped in by the scripts themselves (temp file +
+            # os.replace), so readers see either the old or the new result
+            self._update(job, state=state, error=error, current_stage=None,
+                         finished=datetime.now().isoformat(timespec='seconds'))
+            if handle is not None:
+                handle.close()  # releases the flock
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond `keep` (caller holds the lock)"""
+        finished = [j for j in self._jobs.values() if j['state'] not in ACTIVE_STATES]
+        for job in sorted(finished, key=lambda j: j['created'])[:max(0, len(self._jobs) - self.keep)]:
+            self._jobs.pop(job['id'], None)
+            try:
+                os.remove(self._path(job['id']))
+            except OSError:
+                pass
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM Response Cache
+Content-addressed on-disk cache of model answers: one JSON file per
+sha256(model, prompt, generation config) under llm_cache/, so pipeline
+stages running in parallel can share it without a common index. Entries
+expire after a TTL; when the directory outgrows its size budget the least
+recently used entries (by file mtime, touched on every hit) are evicted.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 7 * 24 * 3600  # seconds
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def model_name(url: str) -> str:
+    """'gemini-2.0-flash' from a .../models/gemini-2.0-flash:generateContent URL"""
+    match = re.search(r'/models/([^:/?]+)', url)
+    return match.group(1) if match else url
+
+
+class LLMCache:
+    def __init__(self, cache_dir: str = 'llm_cache', ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bytes: Optional[int] = None  # running size estimate, scanned on first write
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'writes': 0, 'evictions': 0}
+
+    @staticmethod
+    def key(model: str, prompt: str, config: Optional[Dict] = None) -> str:
+        blob = json.dumps({'model': model, 'prompt': prompt, 'config': config or {}},
+                          sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _count(self, stat: str, n: int = 1):
+        with self._lock:
+            self.stats[stat] += n
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached answer, or None when missing or past its TTL"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count('misses')
+            return None
+        if time.time() - entry.get('created', 0) > self.ttl:
+            self._count('expired')
+            self._count('misses')
+            return None
+        try:
+            os.utime(path)  # mark as recently used for LRU eviction
+        except OSError:
+            pass
+        self._count('hits')
+        return entry.get('response')
+
+    def put(self, key: str, response: str, model: str = ''):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'model': model, 'created': time.time(), 'response': response}, f, ensure_ascii=False)
+        size = os.path.getsize(tmp)
+        os.replace(tmp, path)
+        self._count('writes')
+
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._scan_bytes()
+            else:
+                self._bytes += size
+            over = self._bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def _scan_bytes(self) -> int:
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.json'):
+                try:
+                    total += entry.stat().st_size
+                except OSError:
+                    pass
+        return total
+
+    def evict(self, target: float = 0.9):
+        """Drop least recently used entries until the cache fits in target * max_bytes"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.json'):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._bytes = total
+            self.stats['evictions'] += removed
+
+    def get_or_generate(self, model: str, prompt: str, config: Optional[Dict],
+                        generate: Callable[[], Optional[str]]) -> Optional[str]:
+        """
+        Cached answer for (model, prompt, config), else generate() and cache
+        its result. Failures (None or empty answers) are not cached.
+        """
+        key = self.key(model, prompt, config)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        response = generate()
+        if response:
+            self.put(key, response, model)
+        return response
+
+    def log_stats(self):
+        s = self.stats
+        logger.info(f"🧠 LLM cache: {s['hits']} hits, {s['misses']} misses ({s['expired']} expired), "
+                    f"{s['writes']} writes, {s['evictions']} evictions")
+
+
+_caches: Dict[str, LLMCache] = {}
+_caches_lock = threading.Lock()
+
+
+def shared_cache(data_dir: str = '.') -> LLMCache:
+    """The process-wide cache for a data directory"""
+    cache_dir = os.path.abspath(os.path.join(data_dir, 'llm_cache'))
+    with _caches_lock:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            cache = _caches[cache_dir] = LLMCache(cache_dir)
+        return cache
@@ -8,13 +8,17 @@ Macro Market Analyzer
 
 import os
 import json
-import requests
 import yfinance as yf
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
+import http_client
+from fetch_engine import limiter_for
+from llm_cache import LLMCache, model_name, shared_cache
+from bilingual import BILINGUAL_INSTRUCTIONS, bilingual_config, parse_bilingual
+
 # Load .env
 load_dotenv()
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
@@ -82,7 +86,7 @@ class MacroDataCollector:
             import xml.etree.ElementTree as ET
             from urllib.parse import quote
             url = "https://news.google.com/rss/search?q=Federal+Reserve+Economy&hl=en-US&gl=US&ceid=US:en"
-            resp = requests.get(url, timeout=10)
+            resp = limiter_for('google_news').call(http_client.get, url, timeout=10)
             if resp.status_code == 200:
                 root = ET.fromstring(resp.content)
                 for item in root.findall('.//item')[:5]:
@@ -102,26 +106,53 @@ class MacroDataCollector:
 
 class MacroAIAnalyzer:
     """Gemini 3.0 Analysis"""
-    def __init__(self):
+    def __init__(self, cache: Optional[LLMCache] = None):
         self.api_key = os.getenv('GOOGLE_API_KEY')
         self.url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+        self.cache = cache or shared_cache()
     
     def analyze(self, data, news, patterns, lang='ko'):
         if not self.api_key: return "API Key Missing"
         
         prompt = self._build_prompt(data, news, patterns, lang)
-        
         try:
-            payload = {
-                "contents": [{"parts": [{"text": prompt}]}],
-                "generationConfig": {"temperature": 0.7, "maxOutputTokens": 2000}
-            }
-            resp = requests.post(f"{self.url}?key={self.api_key}", json=payload)
-            if resp.status_code == 200:
-                return resp.json()['candidates'][0]['content']['parts'][0]['text']
+            text = self._request(prompt, {"temperature": 0.7, "maxOutputTokens": 2000})
         except Exception as e:
             return f"Error: {e}"
-        return "Failed to generate"
+        return text or "Failed to generate"
+    
+    def analyze_bilingual(self, data, news, patterns) -> Dict[str, str]:
+        """
+        {'ko', 'en'} analyses from a single JSON-mode request, falling back
+        to one analyze() per language if the answer does not parse
+        """
+        if not self.api_key: return {'ko': "API Key Missing", 'en': "API Key Missing"}
+        
+        prompt = self._build_prompt(data, news, patterns, 'en') + "\n" + BILINGUAL_INSTRUCTIONS
+        config = bilingual_config(temperature=0.7, maxOutputTokens=4000)
+        try:
+            pair = parse_bilingual(self._request(prompt, config, valid=lambda t: parse_bilingual(t) is not None))
+        except Exception as e:
+            return {'ko': f"Error: {e}", 'en': f"Error: {e}"}
+        if pair is None:
+            logger.warning("Bilingual macro analysis did not parse; generating each language separately")
+            return {lang: self.analyze(data, news, patterns, lang) for lang in ('ko', 'en')}
+        return pair
+    
+    def _request(self, prompt, config, valid=None) -> Optional[str]:
+        """Answer text (cached), or None on an HTTP error or an answer `valid` rejects"""
+        payload = {"contents": [{"parts": [{"text": prompt}]}], "generationConfig": config}
+        
+        def call():
+            # Up to 2000 output tokens per language: allow a longer read than the default
+            resp = limiter_for('gemini').call(http_client.post, f"{self.url}?key={self.api_key}", json=payload,
+                                               timeout=(5.0, 90.0))
+            if resp.status_code != 200:
+                return None
+            text = resp.json()['candidates'][0]['content']['parts'][0]['text']
+            return text if valid is None or valid(text) else None
+        
+        return self.cache.get_or_generate(model_name(self.url), prompt, config, call)
     
     def _build_prompt(self, data, news, patterns, lang):
         metrics = "\\n".join([f"- {k}: {v['value']}" for k,v in data.items()])
@@ -147,16 +178,16 @@ class MultiModelAnalyzer:
     def __init__(self, data_dir='.'):
         self.data_dir = data_dir
         self.collector = MacroDataCollector()
-        self.gemini = MacroAIAnalyzer()
+        self.gemini = MacroAIAnalyzer(shared_cache(data_dir))
     
     def run(self):
         data = self.collector.get_current_macro_data()
         news = self.collector.get_macro_news()
         patterns = self.collector.get_historical_patterns()
         
-        # Gemini Analysis
-        analysis_ko = self.gemini.analyze(data, news, patterns, 'ko')
-        analysis_en = self.gemini.analyze(data, news, patterns, 'en')
+        # Gemini Analysis (both languages from one request)
+        analyses = self.gemini.analyze_bilingual(data, news, patterns)
+        analysis_ko, analysis_en = analyses['ko'], analyses['en']
         
         output = {
             'timestamp': datetime.now().isoformat(),
@@ -173,6 +204,7 @@ class MultiModelAnalyzer:
             json.dump(output, f, indent=2)
             
         logger.info("Saved macro analysis")
+        self.gemini.cache.log_stats()
 
 if __name__ == "__main__":
     MultiModelAnalyzer().run()
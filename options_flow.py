@@ -4,6 +4,8 @@ import os, json, logging
 import yfinance as yf
 from datetime import datetime
 
+from fetch_engine import FetchEngine, log_host_stats, raise_if_throttled
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -40,17 +42,24 @@ class OptionsFlowAnalyzer:
                 'unusual': {'calls': unusual_calls, 'puts': unusual_puts}
             }
         except Exception as e:
+            raise_if_throttled(e)
             return {'error': str(e)}
 
     def analyze_watchlist(self):
         results = []
-        for t in self.watchlist:
-            res = self.get_options_summary(t)
+        # Two Yahoo requests per ticker: expirations, then the front-month chain.
+        # Every watchlist name has listed options, so an empty expiry list is
+        # Yahoo pushing back rather than a real answer
+        summaries = FetchEngine('yahoo').map(self.get_options_summary, self.watchlist,
+                                             default={'error': 'timeout'}, cost=2,
+                                             empty=lambda res: res.get('error') == 'No options')
+        for res in summaries:
             if 'error' not in res: results.append(res)
         
         with open('options_flow.json', 'w') as f:
             json.dump({'options_flow': results}, f, indent=2)
         logger.info("Saved options_flow.json")
+        log_host_stats()
 
 if __name__ == "__main__":
     OptionsFlowAnalyzer().analyze_watchlist()
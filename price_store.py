@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+US Daily Price Store
+Partitioned columnar storage for daily OHLCV data (one Parquet file per ticker)
+Replaces the monolithic us_daily_prices.csv for both ingest and readers
+"""
+
+import os
+import json
+import hashlib
+import time
+import logging
+import threading
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Column layout shared with create_us_daily_prices.py
+PRICE_COLUMNS = ['ticker', 'date', 'open', 'high', 'low', 'current_price',
+                 'volume', 'change', 'change_rate', 'name', 'market']
+FLOAT_COLUMNS = ['open', 'high', 'low', 'current_price', 'volume', 'change', 'change_rate']
+STRING_COLUMNS = ['ticker', 'name', 'market']
+
+
+class PriceStore:
+    """
+    Per-ticker Parquet partitions under <data_dir>/us_daily_prices/
+    - <TICKER>.parquet: full daily history for one ticker, sorted by date
+    - _index.json: per-ticker row count, date range and last close, plus a
+      store-wide generation counter bumped on every write
+    Falls back to the legacy us_daily_prices.csv when no partitions exist.
+    """
+
+    def __init__(self, data_dir: str = '.'):
+        self.data_dir = data_dir
+        self.root = os.path.join(data_dir, 'us_daily_prices')
+        self.index_file = os.path.join(self.root, '_index.json')
+        self.legacy_csv = os.path.join(data_dir, 'us_daily_prices.csv')
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    def exists(self) -> bool:
+        """True if partitioned data has been written"""
+        return os.path.exists(self.index_file)
+
+    def load_index(self) -> Dict:
+        """Load store index ({'generation', 'updated', 'tickers': {...}})"""
+        if not self.exists():
+            return {'generation': 0, 'updated': None, 'tickers': {}}
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_index(self, index: Dict):
+        tmp = self.index_file + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp, self.index_file)
+
+    def generation(self) -> int:
+        """Store-wide write counter (changes whenever any partition is rewritten)"""
+        return int(self.load_index().get('generation', 0))
+
+    def tickers(self) -> List[str]:
+        """Tickers with stored data"""
+        if self.exists():
+            return sorted(self.load_index()['tickers'].keys())
+        if os.path.exists(self.legacy_csv):
+            return sorted(pd.read_csv(self.legacy_csv, usecols=['ticker'])['ticker'].astype(str).unique())
+        return []
+
+    def latest_dates(self) -> Dict[str, datetime]:
+        """Latest stored date per ticker, served from the index without reading data"""
+        if self.exists():
+            return {
+                ticker: pd.Timestamp(meta['last_date']).to_pydatetime()
+                for ticker, meta in self.load_index()['tickers'].items()
+            }
+        df = self._read_legacy(columns=['ticker', 'date'])
+        if df.empty:
+            return {}
+        return df.groupby('ticker')['date'].max().to_dict()
+
+    def latest_closes(self, tickers: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Last stored bar per ticker in one lookup, served from the index without
+        reading any partition. Frame indexed by ticker with last_date/last_close;
+        tickers without data are absent.
+        """
+        if self.exists():
+            meta = self.load_index()['tickers']
+            wanted = meta.keys() if tickers is None else [t.upper() for t in tickers if t.upper() in meta]
+            df = pd.DataFrame({
+                'ticker': list(wanted),
+                'last_date': pd.to_datetime([meta[t]['last_date'] for t in wanted]),
+                'last_close': np.array([meta[t]['last_close'] for t in wanted], dtype=np.float64),
+            })
+            return df.set_index('ticker')
+
+        df = self._read_legacy(tickers=tickers, columns=['ticker', 'date', 'current_price'])
+        df['ticker'] = df['ticker'].astype(str).str.upper()
+        last = df.groupby('ticker').tail(1)
+        return pd.DataFrame({
+            'last_date': last['date'].values,
+            'last_close': last['current_price'].astype(np.float64).values,
+        }, index=pd.Index(last['ticker'].values, name='ticker'))
+
+    def watermark(self) -> str:
+        """
+        Digest of the per-ticker row counts, last dates and last closes.
+        Unlike `generation` it only moves when the stored bars actually change,
+        so a no-op ingest (weekend, holiday) leaves it untouched.
+        """
+        if self.exists():
+            meta = self.load_index()['tickers']
+        elif os.path.exists(self.legacy_csv):
+            st = os.stat(self.legacy_csv)
+            meta = {'legacy_csv': [st.st_size, st.st_mtime_ns]}
+        else:
+            meta = {}
+        return hashlib.sha256(json.dumps(meta, sort_keys=True).encode()).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+    def partition_path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker.upper().replace('/', '_')}.parquet")
+
+    def read(self, tickers: Optional[List[str]] = None, columns: Optional[List[str]] = None,
+             start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Load prices for the given tickers (default: all), restricted to the
+        requested columns and [start, end] date range. Result is sorted by
+        (ticker, date).
+        """
+        if columns is not None:
+            # ticker/date are always needed for filtering and sorting
+            columns = ['ticker', 'date'] + [c for c in columns if c not in ('ticker', 'date')]
+
+        if not self.exists():
+            return self._read_legacy(tickers, columns, start, end)
+
+        import pyarrow.dataset as ds
+
+        index = self.load_index()['tickers']
+        wanted = index.keys() if tickers is None else [t.upper() for t in tickers]
+        paths = [self.partition_path(t) for t in wanted if t in index]
+        if not paths:
+            return pd.DataFrame(columns=columns or PRICE_COLUMNS)
+
+        expr = None
+        if start is not None:
+            expr = ds.field('date') >= pd.Timestamp(start).to_datetime64()
+        if end is not None:
+            cond = ds.field('date') <= pd.Timestamp(end).to_datetime64()
+            expr = cond if expr is None else expr & cond
+
+        table = ds.dataset(paths, format='parquet').to_table(columns=columns, filter=expr)
+        df = table.to_pandas()
+        return df.sort_values(['ticker', 'date'], kind='stable').reset_index(drop=True)
+
+    def read_ticker(self, ticker: str, columns: Optional[List[str]] = None,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """Load a single ticker's history"""
+        return self.read([ticker], columns=columns, start=start, end=end)
+
+    def _read_legacy(self, tickers: Optional[List[str]] = None, columns: Optional[List[str]] = None,
+                     start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """Read the pre-partition monolithic CSV"""
+        if not os.path.exists(self.legacy_csv):
+            return pd.DataFrame(columns=columns or PRICE_COLUMNS)
+
+        df = pd.read_csv(self.legacy_csv, usecols=columns)
+        df['date'] = pd.to_datetime(df['date'], utc=True).dt.tz_localize(None)
+        if tickers is not None:
+            df = df[df['ticker'].astype(str).str.upper().isin([t.upper() for t in tickers])]
+        if start is not None:
+            df = df[df['date'] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df['date'] <= pd.Timestamp(end)]
+        return df.sort_values(['ticker', 'date'], kind='stable').reset_index(drop=True)
+
+    # ------------------------------------------------------------------
+    # Writers
+    # ------------------------------------------------------------------
+    def _normalize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Fix column set and dtypes so every partition shares one schema"""
+        df = df.copy()
+        for col in PRICE_COLUMNS:
+            if col not in df.columns:
+                df[col] = np.nan
+        df = df[PRICE_COLUMNS]
+        df['date'] = pd.to_datetime(df['date']).astype('datetime64[ns]')
+        for col in FLOAT_COLUMNS:
+            df[col] = df[col].astype('float64')
+        for col in STRING_COLUMNS:
+            df[col] = df[col].fillna('').astype(str)
+        return df
+
+    def _write_partition(self, ticker: str, df: pd.DataFrame):
+        path = self.partition_path(ticker)
+        tmp = path + '.tmp'
+        df.to_parquet(tmp, index=False, engine='pyarrow')
+        os.replace(tmp, path)
+
+    def upsert(self, new_df: pd.DataFrame, replace: bool = False) -> List[str]:
+        """
+        Merge new rows into the affected ticker partitions only.
+        Rows for an existing (ticker, date) are overwritten; with replace=True
+        the ticker's partition is rebuilt from new_df alone.
+        Returns the list of tickers whose partitions were rewritten.
+        """
+        if new_df is None or new_df.empty:
+            return []
+
+        if not self.exists() and os.path.exists(self.legacy_csv):
+            self.migrate_from_csv()
+
+        os.makedirs(self.root, exist_ok=True)
+        index = self.load_index()
+        new_df = self._normalize(new_df)
+        new_df['ticker'] = new_df['ticker'].str.upper()
+
+        changed = []
+        for ticker, rows in new_df.groupby('ticker', sort=True):
+            path = self.partition_path(ticker)
+            if not replace and os.path.exists(path):
+                merged = pd.concat([pd.read_parquet(path), rows], ignore_index=True)
+            else:
+                merged = rows
+
+            merged = merged.drop_duplicates(subset=['date'], keep='last')
+            merged = merged.sort_values('date').reset_index(drop=True)
+
+            # Recompute across the merge seam so the first new bar is not NaN
+            merged['change'] = merged['current_price'].diff()
+            merged['change_rate'] = merged['current_price'].pct_change() * 100
+
+            self._write_partition(ticker, merged)
+            index['tickers'][ticker] = self._partition_meta(merged)
+            changed.append(ticker)
+
+        index['generation'] = int(index.get('generation', 0)) + 1
+        index['updated'] = datetime.now().isoformat()
+        self._save_index(index)
+        return changed
+
+    def _partition_meta(self, df: pd.DataFrame) -> Dict:
+        return {
+            'rows': int(len(df)),
+            'first_date': df['date'].iloc[0].isoformat(),
+            'last_date': df['date'].iloc[-1].isoformat(),
+            'last_close': float(df['current_price'].iloc[-1]),
+        }
+
+    def migrate_from_csv(self) -> bool:
+        """One-time conversion of us_daily_prices.csv into per-ticker partitions"""
+        if not os.path.exists(self.legacy_csv):
+            return False
+
+        logger.info(f"📦 Migrating {self.legacy_csv} to partitioned store {self.root}")
+        df = self._read_legacy()
+        if df.empty:
+            return False
+
+        os.makedirs(self.root, exist_ok=True)
+        df = self._normalize(df)
+        df['ticker'] = df['ticker'].str.upper()
+        df = df.drop_duplicates(subset=['ticker', 'date'], keep='last')
+
+        index = {'generation': 1, 'updated': datetime.now().isoformat(), 'tickers': {}}
+        for ticker, rows in df.groupby('ticker', sort=True):
+            rows = rows.sort_values('date').reset_index(drop=True)
+            self._write_partition(ticker, rows)
+            index['tickers'][ticker] = self._partition_meta(rows)
+
+        self._save_index(index)
+        logger.info(f"✅ Migrated {len(df)} rows for {len(index['tickers'])} tickers")
+        return True
+
+
+class _IndexData(NamedTuple):
+    """One loaded generation of a PriceIndex, published as a single reference"""
+    signature: Optional[tuple]
+    offsets: Dict[str, Tuple[int, int]]
+    times: np.ndarray
+    arrays: Dict[str, np.ndarray]
+
+
+class PriceIndex:
+    """
+    Per-worker in-memory OHLCV arrays for every ticker, built once from the store.
+    Rows are sorted by (ticker, date); each ticker maps to a [start, end) offset
+    range so a date-range slice costs two binary searches plus the rows returned.
+    The index reloads itself when the store (or fallback CSV) changes on disk;
+    a reload builds a new _IndexData and swaps it in with one assignment, so a
+    concurrent slice() sees either the old data or the new, never a mix.
+    """
+
+    FIELDS = ('open', 'high', 'low', 'current_price', 'volume')
+
+    def __init__(self, store: PriceStore, fallback_csv: Optional[str] = None, check_interval: float = 5.0):
+        self.store = store
+        self.fallback_csv = fallback_csv
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._data = _IndexData(None, {}, np.empty(0, dtype=np.int64), {})
+
+    def _source(self) -> Optional[str]:
+        for path in (self.store.index_file, self.store.legacy_csv, self.fallback_csv):
+            if path and os.path.exists(path):
+                return path
+        return None
+
+    def _current_signature(self):
+        path = self._source()
+        if path is None:
+            return None
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size)
+
+    def _load(self, signature):
+        path = signature[0]
+        columns = ['ticker', 'date'] + list(self.FIELDS)
+        if path == self.fallback_csv:
+            df = pd.read_csv(path, usecols=columns)
+            df['date'] = pd.to_datetime(df['date'], utc=True).dt.tz_localize(None)
+            df['ticker'] = df['ticker'].astype(str).str.upper()
+            df = df.sort_values(['ticker', 'date'], kind='stable').reset_index(drop=True)
+        else:
+            df = self.store.read(columns=list(self.FIELDS))
+            df['ticker'] = df['ticker'].astype(str).str.upper()
+
+        tickers = df['ticker'].to_numpy()
+        # Boundaries where the ticker changes in the sorted frame
+        starts = np.flatnonzero(np.r_[True, tickers[1:] != tickers[:-1]]) if len(df) else np.empty(0, dtype=int)
+        ends = np.r_[starts[1:], len(df)]
+
+        offsets = {tickers[s]: (int(s), int(e)) for s, e in zip(starts, ends)}
+        self._data = _IndexData(
+            signature=signature,
+            offsets=offsets,
+            times=df['date'].to_numpy(dtype='datetime64[s]').astype(np.int64),
+            arrays={f: df[f].to_numpy(dtype=np.float64) for f in self.FIELDS},
+        )
+        logger.info(f"📈 Price index loaded: {len(offsets)} tickers, {len(df)} rows from {path}")
+
+    def refresh(self, force: bool = False):
+        """Reload if the backing file changed (checked at most every check_interval seconds)"""
+        now = time.monotonic()
+        if not force and self._data.signature is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            signature = self._current_signature()
+            if signature is not None and (force or signature != self._data.signature):
+                self._load(signature)
+
+    def available(self) -> bool:
+        self.refresh()
+        return self._data.signature is not None
+
+    def version(self):
+        """Identity of the loaded data; changes whenever the index reloads"""
+        self.refresh()
+        return self._data.signature
+
+    def latest_closes(self, tickers: Optional[List[str]] = None) -> pd.DataFrame:
+        """Same frame as PriceStore.latest_closes, from the loaded arrays (covers the fallback CSV)"""
+        self.refresh()
+        data = self._data
+        wanted = list(data.offsets) if tickers is None else [t.upper() for t in tickers if t.upper() in data.offsets]
+        last = np.array([data.offsets[t][1] - 1 for t in wanted], dtype=np.int64)
+        return pd.DataFrame({
+            'last_date': pd.to_datetime(data.times[last], unit='s'),
+            'last_close': data.arrays['current_price'][last],
+        }, index=pd.Index(wanted, name='ticker'))
+
+    def slice(self, ticker: str, start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Return {'time', 'open', 'high', 'low', 'close', 'volume'} arrays for one ticker,
+        restricted to [start, end]; None if the ticker is unknown.
+        'time' is epoch seconds.
+        """
+        self.refresh()
+        data = self._data  # read once: offsets and arrays from the same load
+        bounds = data.offsets.get(ticker.upper())
+        if bounds is None:
+            return None
+
+        lo, hi = bounds
+        times = data.times[lo:hi]
+        i = np.searchsorted(times, int(pd.Timestamp(start).timestamp()), side='left') if start is not None else 0
+        j = np.searchsorted(times, int(pd.Timestamp(end).timestamp()), side='right') if end is not None else len(times)
+
+        return {
+            'time': times[i:j],
+            'open': data.arrays['open'][lo + i:lo + j],
+            'high': data.arrays['high'][lo + i:lo + j],
+            'low': data.arrays['low'][lo + i:lo + j],
+            'close': data.arrays['current_price'][lo + i:lo + j],
+            'volume': data.arrays['volume'][lo + i:lo + j],
+        }
+
+
+def main():
+    """Inspect or migrate the price store"""
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='US Daily Price Store')
+    parser.add_argument('--dir', default='.', help='Data directory')
+    parser.add_argument('--migrate', action='store_true', help='Convert us_daily_prices.csv into partitions')
+    args = parser.parse_args()
+
+    store = PriceStore(args.dir)
+    if args.migrate:
+        store.migrate_from_csv()
+
+    index = store.load_index()
+    print(f"[STORE] {store.root}")
+    print(f"   Tickers: {len(index['tickers'])}")
+    print(f"   Rows: {sum(m['rows'] for m in index['tickers'].values())}")
+    print(f"   Generation: {index['generation']} (updated {index['updated']})")
+
+
+if __name__ == "__main__":
+    main()
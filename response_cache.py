@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File-backed Response Cache
+Per-process cache of parsed pipeline files and of values derived from them,
+invalidated only when a backing file's (mtime, size) signature changes.
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+
+def read_json(path: str) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FileCache:
+    """
+    derive(key, paths, build) memoizes build() until one of `paths` is
+    rewritten, created or removed. Signatures are re-stat'ed at most once per
+    check_interval seconds, so steady-state hits touch neither the disk nor
+    the parser.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signatures: Dict[str, Tuple[float, Optional[Tuple[int, int]]]] = {}
+        self._values: Dict[Hashable, Tuple[Tuple, Any]] = {}
+
+    def signature(self, path: str) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of a file, or None when it does not exist"""
+        now = time.monotonic()
+        with self._lock:
+            checked = self._signatures.get(path)
+        if checked is not None and now - checked[0] < self.check_interval:
+            return checked[1]
+        try:
+            st = os.stat(path)
+            sig = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            sig = None
+        with self._lock:
+            self._signatures[path] = (now, sig)
+        return sig
+
+    def exists(self, path: str) -> bool:
+        return self.signature(path) is not None
+
+    def derive(self, key: Hashable, paths: Iterable[str], build: Callable[[], Any],
+               version: Hashable = None) -> Any:
+        """
+        Cached build() result, rebuilt when any backing file changes or when
+        `version` differs from the one it was built under
+        """
+        sigs = (tuple((p, self.signature(p)) for p in paths), version)
+        with self._lock:
+            hit = self._values.get(key)
+        if hit is not None and hit[0] == sigs:
+            return hit[1]
+        value = build()
+        with self._lock:
+            self._values[key] = (sigs, value)
+        return value
+
+    def load(self, path: str, parser: Callable[[str], Any] = read_json) -> Any:
+        """Parsed file contents (shared object - do not mutate)"""
+        return self.derive(('file', path), [path], lambda: parser(path))
+
+    def invalidate(self, path: Optional[str] = None):
+        """Force a re-stat of one path (or all paths) on the next lookup"""
+        with self._lock:
+            if path is None:
+                self._signatures.clear()
+            else:
+                self._signatures.pop(path, None)
+
+
+class PreparedResponse:
+    """
+    A serialized response body with its strong ETag and lazily built
+    compressed variants. Built once per data generation and shared by every
+    request until a backing file changes.
+    """
+
+    MIN_COMPRESS_BYTES = 1024
+
+    def __init__(self, body: bytes, status: int = 200, mimetype: str = 'application/json'):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available_encodings() -> Tuple[str, ...]:
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def compressible(self) -> bool:
+        return len(self.body) >= self.MIN_COMPRESS_BYTES
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        """Each representation gets its own strong tag"""
+        return f"{self.etag}-{encoding}" if encoding else self.etag
+
+    def etags(self) -> Tuple[str, ...]:
+        return (self.etag,) + tuple(self.variant_etag(e) for e in self.available_encodings())
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        """Body in the given content-coding (None = identity), compressed once"""
+        if not encoding:
+            return self.body
+        with self._lock:
+            data = self._encoded.get(encoding)
+            if data is None:
+                if encoding == 'gzip':
+                    data = gzip.compress(self.body, compresslevel=6, mtime=0)
+                elif encoding == 'br' and brotli is not None:
+                    data = brotli.compress(self.body, quality=5)
+                else:
+                    raise ValueError(f"Unsupported encoding: {encoding}")
+                self._encoded[encoding] = data
+        return data
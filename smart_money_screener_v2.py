@@ -11,6 +11,7 @@ Comprehensive analysis combining:
 """
 
 import os
+import heapq
 import pandas as pd
 import numpy as np
 import yfinance as yf
@@ -21,6 +22,10 @@ from tqdm import tqdm
 import warnings
 warnings.filterwarnings('ignore')
 
+from fetch_engine import FetchEngine, log_host_stats, raise_if_throttled
+from price_store import PriceStore
+from fundamentals_store import FundamentalsStore, FUNDAMENTAL_FIELDS, ANALYST_FIELDS
+
 # Logging Configuration
 logging.basicConfig(
     level=logging.INFO,
@@ -39,10 +44,27 @@ class EnhancedSmartMoneyScreener:
     5. Relative Strength
     """
     
-    def __init__(self, data_dir: str = '.'):
+    # Composite weights (calculate_composite_score and the top-N bound share them)
+    SCORE_WEIGHTS = {'sd': 0.25, 'inst': 0.20, 'tech': 0.20, 'fund': 0.15, 'analyst': 0.10, 'rs': 0.10}
+    MAX_COMPONENT_SCORE = 100
+    
+    def __init__(self, data_dir: str = '.', use_local_prices: bool = True):
         self.data_dir = data_dir
         self.output_file = os.path.join(data_dir, 'smart_money_picks_v2.csv')
         
+        # Local OHLCV from create_us_daily_prices.py (technicals / RS without network calls)
+        self.store = PriceStore(data_dir)
+        self.use_local_prices = use_local_prices
+        self.local_technicals: Dict[str, Dict] = {}
+        self.local_rs: Dict[str, Dict] = {}
+        
+        # (analysis, ticker) -> history-based analysis already fetched, so a
+        # candidate retried after throttling only redoes the failed lookups
+        self.fetched: Dict[Tuple[str, str], Dict] = {}
+        
+        # Shared .info snapshots (one fetch per ticker per TTL window)
+        self.fundamentals = FundamentalsStore(data_dir)
+        
         # Load analysis data
         self.volume_df = None
         self.holdings_df = None
@@ -55,6 +77,9 @@ class EnhancedSmartMoneyScreener:
         # S&P 500 benchmark data
         self.spy_data = None
         
+        # Candidates/lookups skipped by the last bounded run_screening()
+        self.pruning_stats: Dict = {}
+        
     def load_data(self) -> bool:
         """Load all analysis results"""
         try:
@@ -81,10 +106,16 @@ class EnhancedSmartMoneyScreener:
             if os.path.exists(etf_file):
                 self.etf_df = pd.read_csv(etf_file)
             
-            # Load SPY for relative strength
+            # Load SPY for relative strength (local store first, then yfinance)
             logger.info("📈 Loading SPY benchmark data...")
-            spy = yf.Ticker("SPY")
-            self.spy_data = spy.history(period="3mo")
+            self.spy_data = self._load_local_spy() if self.use_local_prices else None
+            if self.spy_data is None or self.spy_data.empty:
+                try:
+                    spy = yf.Ticker("SPY")
+                    self.spy_data = spy.history(period="3mo")
+                except Exception as e:
+                    logger.warning(f"⚠️ SPY benchmark unavailable: {e}")
+                    self.spy_data = None
             
             return True
             
@@ -92,8 +123,98 @@ class EnhancedSmartMoneyScreener:
             logger.error(f"❌ Error loading data: {e}")
             return False
     
-    def get_technical_analysis(self, ticker: str) -> Dict:
-        """Calculate technical indicators"""
+    def _load_local_spy(self) -> Optional[pd.DataFrame]:
+        """SPY 3-month closes from the local store, shaped like yfinance history"""
+        cutoff = datetime.now() - pd.DateOffset(months=3)
+        spy = self.store.read_ticker('SPY', columns=['current_price'], start=cutoff)
+        if spy.empty:
+            return None
+        return spy.set_index('date').rename(columns={'current_price': 'Close'})[['Close']]
+    
+    def _aligned_close_matrix(self, prices: pd.DataFrame, months: int) -> pd.DataFrame:
+        """
+        Close prices for the last `months` as a (bars x tickers) matrix,
+        right-aligned on each ticker's latest bar (shorter histories are NaN-padded at the top)
+        """
+        cutoff = datetime.now() - pd.DateOffset(months=months)
+        window = prices[prices['date'] >= cutoff]
+        pos = window.groupby('ticker', sort=False).cumcount(ascending=False)
+        matrix = window.assign(pos=pos.to_numpy()).pivot(index='pos', columns='ticker', values='current_price')
+        return matrix.sort_index(ascending=False).reset_index(drop=True)
+    
+    def precompute_local_analysis(self, tickers: List[str]):
+        """Technical analysis and relative strength for all candidates from the local price store"""
+        if not self.use_local_prices or not (self.store.exists() or os.path.exists(self.store.legacy_csv)):
+            return
+        
+        cutoff = datetime.now() - pd.DateOffset(months=6)
+        prices = self.store.read(list(tickers), columns=['current_price'], start=cutoff)
+        if prices.empty:
+            logger.warning("⚠️ No local prices for candidates; falling back to yfinance")
+            return
+        
+        self.local_technicals = self.technical_analysis_matrix(self._aligned_close_matrix(prices, 6))
+        self.local_rs = self.relative_strength_matrix(self._aligned_close_matrix(prices, 3))
+        logger.info(f"📈 Local technicals for {len(self.local_technicals)} candidates")
+    
+    def technical_analysis_matrix(self, close: pd.DataFrame) -> Dict[str, Dict]:
+        """
+        Calculate technical indicators for every column of a right-aligned
+        (bars x tickers) close matrix at once
+        """
+        counts = close.count()
+        valid = close.notna()
+        
+        # RSI (14-day)
+        delta = close.diff()
+        gain = (delta.where(delta > 0, 0)).where(valid).rolling(window=14).mean()
+        loss = (-delta.where(delta < 0, 0)).where(valid).rolling(window=14).mean()
+        rs = gain / loss
+        rsi = 100 - (100 / (1 + rs))
+        
+        # MACD
+        ema12 = close.ewm(span=12, adjust=False).mean()
+        ema26 = close.ewm(span=26, adjust=False).mean()
+        macd = ema12 - ema26
+        signal = macd.ewm(span=9, adjust=False).mean()
+        macd_histogram = macd - signal
+        
+        # Moving Averages
+        ma20 = close.rolling(20).mean()
+        ma50 = close.rolling(50).mean()
+        ma200 = close.rolling(200).mean()
+        
+        results = {}
+        for ticker in close.columns:
+            if counts[ticker] < 50:
+                results[ticker] = self._default_technical()
+                continue
+            
+            has_200 = counts[ticker] >= 200
+            results[ticker] = self._score_technical(
+                current_rsi=rsi[ticker].iloc[-1],
+                macd_current=macd[ticker].iloc[-1],
+                signal_current=signal[ticker].iloc[-1],
+                macd_hist_current=macd_histogram[ticker].iloc[-1],
+                macd_hist_prev=macd_histogram[ticker].iloc[-2],
+                ma20=ma20[ticker].iloc[-1],
+                ma50=ma50[ticker].iloc[-1],
+                ma200=ma200[ticker].iloc[-1] if has_200 else ma50[ticker].iloc[-1],
+                ma50_prev=ma50[ticker].iloc[-5],
+                ma200_prev=ma200[ticker].iloc[-5] if has_200 else ma50[ticker].iloc[-5],
+                current_price=close[ticker].iloc[-1]
+            )
+        return results
+    
+    def get_technical_analysis(self, ticker: str, remote: bool = True) -> Dict:
+        """Calculate technical indicators (remote=False: local prices or the neutral default)"""
+        if ticker in self.local_technicals:
+            return self.local_technicals[ticker]
+        if ('tech', ticker) in self.fetched:
+            return self.fetched[('tech', ticker)]
+        if not remote:
+            return self._default_technical()
+        
         try:
             stock = yf.Ticker(ticker)
             hist = stock.history(period="6mo")
@@ -101,99 +222,80 @@ class EnhancedSmartMoneyScreener:
             if len(hist) < 50:
                 return self._default_technical()
             
-            close = hist['Close']
-            
-            # RSI (14-day)
-            delta = close.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            current_rsi = rsi.iloc[-1]
-            
-            # MACD
-            ema12 = close.ewm(span=12, adjust=False).mean()
-            ema26 = close.ewm(span=26, adjust=False).mean()
-            macd = ema12 - ema26
-            signal = macd.ewm(span=9, adjust=False).mean()
-            macd_histogram = macd - signal
-            
-            macd_current = macd.iloc[-1]
-            signal_current = signal.iloc[-1]
-            macd_hist_current = macd_histogram.iloc[-1]
-            
-            # Moving Averages
-            ma20 = close.rolling(20).mean().iloc[-1]
-            ma50 = close.rolling(50).mean().iloc[-1]
-            ma200 = close.rolling(200).mean().iloc[-1] if len(close) >= 200 else ma50
-            current_price = close.iloc[-1]
-            
-            # MA Arrangement
-            if current_price > ma20 > ma50:
-                ma_signal = "Bullish"
-            elif current_price < ma20 < ma50:
-                ma_signal = "Bearish"
-            else:
-                ma_signal = "Neutral"
-            
-            # Golden/Death Cross
-            ma50_prev = close.rolling(50).mean().iloc[-5]
-            ma200_prev = close.rolling(200).mean().iloc[-5] if len(close) >= 200 else ma50_prev
-            
-            if ma50 > ma200 and ma50_prev <= ma200_prev:
-                cross_signal = "Golden Cross"
-            elif ma50 < ma200 and ma50_prev >= ma200_prev:
-                cross_signal = "Death Cross"
-            else:
-                cross_signal = "None"
-            
-            # Technical Score (0-100)
-            tech_score = 50
-            
-            # RSI contribution
-            if 40 <= current_rsi <= 60:
-                tech_score += 10  # Neutral zone - room to move
-            elif current_rsi < 30:
-                tech_score += 15  # Oversold - potential bounce
-            elif current_rsi > 70:
-                tech_score -= 5   # Overbought
-            
-            # MACD contribution
-            if macd_hist_current > 0 and macd_histogram.iloc[-2] < 0:
-                tech_score += 15  # Bullish crossover
-            elif macd_hist_current > 0:
-                tech_score += 8
-            elif macd_hist_current < 0:
-                tech_score -= 5
-            
-            # MA contribution
-            if ma_signal == "Bullish":
-                tech_score += 15
-            elif ma_signal == "Bearish":
-                tech_score -= 10
-            
-            if cross_signal == "Golden Cross":
-                tech_score += 10
-            elif cross_signal == "Death Cross":
-                tech_score -= 15
-            
-            tech_score = max(0, min(100, tech_score))
-            
-            return {
-                'rsi': round(current_rsi, 1),
-                'macd': round(macd_current, 3),
-                'macd_signal': round(signal_current, 3),
-                'macd_histogram': round(macd_hist_current, 3),
-                'ma20': round(ma20, 2),
-                'ma50': round(ma50, 2),
-                'ma_signal': ma_signal,
-                'cross_signal': cross_signal,
-                'technical_score': tech_score
-            }
+            close = hist['Close'].reset_index(drop=True).to_frame(ticker)
+            result = self.fetched[('tech', ticker)] = self.technical_analysis_matrix(close)[ticker]
+            return result
             
         except Exception as e:
+            # Throttling goes back to the fetch engine's limiter, which backs
+            # off and retries; after its last retry the candidate is rescored
+            # with remote=False (see score_candidates)
+            raise_if_throttled(e)
             return self._default_technical()
     
+    def _score_technical(self, current_rsi, macd_current, signal_current, macd_hist_current,
+                         macd_hist_prev, ma20, ma50, ma200, ma50_prev, ma200_prev, current_price) -> Dict:
+        """Technical signals and score (0-100) from the latest indicator values"""
+        # MA Arrangement
+        if current_price > ma20 > ma50:
+            ma_signal = "Bullish"
+        elif current_price < ma20 < ma50:
+            ma_signal = "Bearish"
+        else:
+            ma_signal = "Neutral"
+        
+        # Golden/Death Cross
+        if ma50 > ma200 and ma50_prev <= ma200_prev:
+            cross_signal = "Golden Cross"
+        elif ma50 < ma200 and ma50_prev >= ma200_prev:
+            cross_signal = "Death Cross"
+        else:
+            cross_signal = "None"
+        
+        # Technical Score (0-100)
+        tech_score = 50
+        
+        # RSI contribution
+        if 40 <= current_rsi <= 60:
+            tech_score += 10  # Neutral zone - room to move
+        elif current_rsi < 30:
+            tech_score += 15  # Oversold - potential bounce
+        elif current_rsi > 70:
+            tech_score -= 5   # Overbought
+        
+        # MACD contribution
+        if macd_hist_current > 0 and macd_hist_prev < 0:
+            tech_score += 15  # Bullish crossover
+        elif macd_hist_current > 0:
+            tech_score += 8
+        elif macd_hist_current < 0:
+            tech_score -= 5
+        
+        # MA contribution
+        if ma_signal == "Bullish":
+            tech_score += 15
+        elif ma_signal == "Bearish":
+            tech_score -= 10
+        
+        if cross_signal == "Golden Cross":
+            tech_score += 10
+        elif cross_signal == "Death Cross":
+            tech_score -= 15
+        
+        tech_score = max(0, min(100, tech_score))
+        
+        return {
+            'rsi': round(current_rsi, 1),
+            'macd': round(macd_current, 3),
+            'macd_signal': round(signal_current, 3),
+            'macd_histogram': round(macd_hist_current, 3),
+            'ma20': round(ma20, 2),
+            'ma50': round(ma50, 2),
+            'ma_signal': ma_signal,
+            'cross_signal': cross_signal,
+            'technical_score': tech_score
+        }
+    
     def _default_technical(self) -> Dict:
         return {
             'rsi': 50, 'macd': 0, 'macd_signal': 0, 'macd_histogram': 0,
@@ -201,11 +303,12 @@ class EnhancedSmartMoneyScreener:
             'technical_score': 50
         }
     
-    def get_fundamental_analysis(self, ticker: str) -> Dict:
-        """Get fundamental/valuation metrics"""
+    def get_fundamental_analysis(self, ticker: str, remote: bool = True) -> Dict:
+        """Get fundamental/valuation metrics (remote=False: cached values, else the neutral default)"""
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = self.fundamentals.get(ticker, FUNDAMENTAL_FIELDS, fetch=remote)
+            if not remote and not info:
+                return self._default_fundamental()
             
             # Valuation
             pe_ratio = info.get('trailingPE', 0) or 0
@@ -286,6 +389,7 @@ class EnhancedSmartMoneyScreener:
             }
             
         except Exception as e:
+            raise_if_throttled(e)
             return self._default_fundamental()
     
     def _default_fundamental(self) -> Dict:
@@ -296,11 +400,12 @@ class EnhancedSmartMoneyScreener:
             'fundamental_score': 50
         }
     
-    def get_analyst_ratings(self, ticker: str) -> Dict:
-        """Get analyst consensus and target price"""
+    def get_analyst_ratings(self, ticker: str, remote: bool = True) -> Dict:
+        """Get analyst consensus and target price (remote=False: cached values, else the neutral default)"""
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = self.fundamentals.get(ticker, ANALYST_FIELDS, fetch=remote)
+            if not remote and not info:
+                return self._default_analyst()
             
             # Get company name
             company_name = info.get('longName', '') or info.get('shortName', '') or ticker
@@ -349,6 +454,7 @@ class EnhancedSmartMoneyScreener:
             }
             
         except Exception as e:
+            raise_if_throttled(e)
             return self._default_analyst()
             
     def _default_analyst(self) -> Dict:
@@ -357,8 +463,69 @@ class EnhancedSmartMoneyScreener:
             'upside_pct': 0, 'recommendation': 'none', 'analyst_score': 50
         }
     
-    def get_relative_strength(self, ticker: str) -> Dict:
-        """Calculate relative strength vs S&P 500"""
+    def relative_strength_matrix(self, close: pd.DataFrame) -> Dict[str, Dict]:
+        """Relative strength vs S&P 500 for every column of a right-aligned 3-month close matrix"""
+        default = {'rs_20d': 0, 'rs_60d': 0, 'rs_score': 50}
+        if self.spy_data is None or len(self.spy_data) < 20:
+            return {ticker: dict(default) for ticker in close.columns}
+        
+        values = close.to_numpy(dtype=np.float64)
+        counts = close.count().to_numpy()
+        n_bars = len(close)
+        
+        # First bar of each ticker's window sits right after its NaN padding
+        first = values[n_bars - counts, np.arange(values.shape[1])] if n_bars else np.array([])
+        last = values[-1] if n_bars else np.array([])
+        back_21 = values[-21] if n_bars >= 21 else np.full(values.shape[1], np.nan)
+        
+        stock_return_20d = np.where(counts >= 21, (last / back_21 - 1) * 100, 0)
+        stock_return_60d = (last / first - 1) * 100
+        
+        spy_close = self.spy_data['Close']
+        spy_return_20d = (spy_close.iloc[-1] / spy_close.iloc[-21] - 1) * 100 if len(self.spy_data) >= 21 else 0
+        spy_return_60d = (spy_close.iloc[-1] / spy_close.iloc[0] - 1) * 100
+        
+        rs_20d_all = stock_return_20d - spy_return_20d
+        rs_60d_all = stock_return_60d - spy_return_60d
+        
+        results = {}
+        for i, ticker in enumerate(close.columns):
+            if counts[i] < 20:
+                results[ticker] = dict(default)
+                continue
+            results[ticker] = self._score_relative_strength(rs_20d_all[i], rs_60d_all[i])
+        return results
+    
+    def _score_relative_strength(self, rs_20d: float, rs_60d: float) -> Dict:
+        """RS Score (0-100) from excess returns vs SPY"""
+        rs_score = 50
+        if rs_20d > 10: rs_score += 25
+        elif rs_20d > 5: rs_score += 15
+        elif rs_20d > 0: rs_score += 8
+        elif rs_20d < -10: rs_score -= 20
+        elif rs_20d < -5: rs_score -= 10
+        
+        if rs_60d > 15: rs_score += 15
+        elif rs_60d > 5: rs_score += 8
+        elif rs_60d < -15: rs_score -= 15
+        
+        rs_score = max(0, min(100, rs_score))
+        
+        return {
+            'rs_20d': round(rs_20d, 1),
+            'rs_60d': round(rs_60d, 1),
+            'rs_score': rs_score
+        }
+    
+    def get_relative_strength(self, ticker: str, remote: bool = True) -> Dict:
+        """Calculate relative strength vs S&P 500 (remote=False: local prices or neutral)"""
+        if ticker in self.local_rs:
+            return self.local_rs[ticker]
+        if ('rs', ticker) in self.fetched:
+            return self.fetched[('rs', ticker)]
+        if not remote:
+            return {'rs_20d': 0, 'rs_60d': 0, 'rs_score': 50}
+        
         try:
             if self.spy_data is None or len(self.spy_data) < 20:
                 return {'rs_20d': 0, 'rs_60d': 0, 'rs_score': 50}
@@ -369,49 +536,25 @@ class EnhancedSmartMoneyScreener:
             if len(hist) < 20:
                 return {'rs_20d': 0, 'rs_60d': 0, 'rs_score': 50}
             
-            # Calculate returns
-            stock_return_20d = (hist['Close'].iloc[-1] / hist['Close'].iloc[-21] - 1) * 100 if len(hist) >= 21 else 0
-            stock_return_60d = (hist['Close'].iloc[-1] / hist['Close'].iloc[0] - 1) * 100
-            
-            spy_return_20d = (self.spy_data['Close'].iloc[-1] / self.spy_data['Close'].iloc[-21] - 1) * 100 if len(self.spy_data) >= 21 else 0
-            spy_return_60d = (self.spy_data['Close'].iloc[-1] / self.spy_data['Close'].iloc[0] - 1) * 100
-            
-            rs_20d = stock_return_20d - spy_return_20d
-            rs_60d = stock_return_60d - spy_return_60d
-            
-            # RS Score (0-100)
-            rs_score = 50
-            if rs_20d > 10: rs_score += 25
-            elif rs_20d > 5: rs_score += 15
-            elif rs_20d > 0: rs_score += 8
-            elif rs_20d < -10: rs_score -= 20
-            elif rs_20d < -5: rs_score -= 10
-            
-            if rs_60d > 15: rs_score += 15
-            elif rs_60d > 5: rs_score += 8
-            elif rs_60d < -15: rs_score -= 15
-            
-            rs_score = max(0, min(100, rs_score))
-            
-            return {
-                'rs_20d': round(rs_20d, 1),
-                'rs_60d': round(rs_60d, 1),
-                'rs_score': rs_score
-            }
+            close = hist['Close'].reset_index(drop=True).to_frame(ticker)
+            result = self.fetched[('rs', ticker)] = self.relative_strength_matrix(close)[ticker]
+            return result
             
         except Exception as e:
+            raise_if_throttled(e)
             return {'rs_20d': 0, 'rs_60d': 0, 'rs_score': 50}
     
     def calculate_composite_score(self, row: pd.Series, tech: Dict, fund: Dict, analyst: Dict, rs: Dict) -> Tuple[float, str]:
         """Calculate final composite score"""
         # Weighted composite
+        w = self.SCORE_WEIGHTS
         composite = (
-            row.get('supply_demand_score', 50) * 0.25 +
-            row.get('institutional_score', 50) * 0.20 +
-            tech.get('technical_score', 50) * 0.20 +
-            fund.get('fundamental_score', 50) * 0.15 +
-            analyst.get('analyst_score', 50) * 0.10 +
-            rs.get('rs_score', 50) * 0.10
+            row.get('supply_demand_score', 50) * w['sd'] +
+            row.get('institutional_score', 50) * w['inst'] +
+            tech.get('technical_score', 50) * w['tech'] +
+            fund.get('fundamental_score', 50) * w['fund'] +
+            analyst.get('analyst_score', 50) * w['analyst'] +
+            rs.get('rs_score', 50) * w['rs']
         )
         
         # Determine grade
@@ -424,8 +567,133 @@ class EnhancedSmartMoneyScreener:
         
         return round(composite, 1), grade
     
-    def run_screening(self, top_n: int = 50) -> pd.DataFrame:
-        """Run enhanced screening"""
+    def composite_upper_bound(self, row: pd.Series) -> float:
+        """
+        Best composite a candidate can still reach: supply/demand and
+        institutional scores are known, technicals and RS are known when they
+        came from the local price store, and every remote component counts as
+        MAX_COMPONENT_SCORE
+        """
+        ticker = row['ticker']
+        best = self.MAX_COMPONENT_SCORE
+        tech = self.local_technicals.get(ticker, {}).get('technical_score', best)
+        rs = self.local_rs.get(ticker, {}).get('rs_score', best)
+        return self.calculate_composite_score(
+            row, {'technical_score': tech}, {'fundamental_score': best},
+            {'analyst_score': best}, {'rs_score': rs}
+        )[0]
+    
+    def score_candidate(self, row: pd.Series, remote: bool = True) -> Dict:
+        """
+        Run every analysis for one candidate and build its result row.
+        remote=False scores it without network lookups (see score_candidates)
+        """
+        ticker = row['ticker']
+        
+        # Get all analyses
+        tech = self.get_technical_analysis(ticker, remote)
+        fund = self.get_fundamental_analysis(ticker, remote)
+        analyst = self.get_analyst_ratings(ticker, remote)
+        rs = self.get_relative_strength(ticker, remote)
+        
+        # Calculate composite score
+        composite_score, grade = self.calculate_composite_score(row, tech, fund, analyst, rs)
+        
+        return {
+            'ticker': ticker,
+            'name': analyst.get('company_name', ticker),
+            'composite_score': composite_score,
+            'grade': grade,
+            # ... Add all other fields ...
+            'sd_score': row.get('supply_demand_score', 50),
+            'inst_score': row.get('institutional_score', 50),
+            'tech_score': tech['technical_score'],
+            'fund_score': fund['fundamental_score'],
+            'analyst_score': analyst['analyst_score'],
+            'rs_score': rs['rs_score'],
+            'current_price': analyst['current_price'],
+            'target_upside': analyst['upside_pct']
+        }
+    
+    def score_candidates(self, rows: List[pd.Series], engine: FetchEngine, desc: Optional[str] = None) -> List[Dict]:
+        """
+        score_candidate() for every row on the fetch engine. A candidate whose
+        lookups keep failing or time out is scored again without the network:
+        lookups that did succeed (fundamentals in the store, fetched history
+        analyses) are reused and only the failed ones fall back to their
+        neutral default, so the candidate stays in the output.
+        """
+        results = engine.map(self.score_candidate, rows, cost=self.remote_lookups, desc=desc)
+        failed = [i for i, result in enumerate(results) if result is None]
+        if failed:
+            logger.warning(f"⚠️ Lookups failed for {', '.join(rows[i]['ticker'] for i in failed)}; "
+                           f"scoring them from what was fetched, neutral defaults for the rest")
+        for i in failed:
+            results[i] = self.score_candidate(rows[i], remote=False)
+        return results
+    
+    def remote_lookups(self, row: pd.Series) -> int:
+        """Analyses score_candidate() would have to fetch over the network for this row"""
+        ticker = row['ticker']
+        return (sum(not self.fundamentals.is_fresh(ticker, fields) for fields in (FUNDAMENTAL_FIELDS, ANALYST_FIELDS)) +
+                (ticker not in self.local_technicals and ('tech', ticker) not in self.fetched) +
+                (ticker not in self.local_rs and ('rs', ticker) not in self.fetched))
+    
+    def screen_top_n(self, candidates: pd.DataFrame, top_n: int, engine: FetchEngine) -> List[Dict]:
+        """
+        Branch-and-bound screening: score candidates in descending order of
+        composite_upper_bound() and stop as soon as the next bound is below the
+        current N-th best composite. Every skipped candidate is guaranteed to
+        rank below the top N, so the top N matches a full run.
+        """
+        # iterrows() rows, as in a full run, so composites round identically
+        rows = [row for _, row in candidates.iterrows()]
+        bounds = np.array([self.composite_upper_bound(row) for row in rows])
+        order = np.argsort(-bounds, kind='stable')
+        
+        results = []
+        best: List[float] = []  # min-heap of the top-N composite scores so far
+        
+        def hopeless(i):
+            # Bounds are rounded like composites, so a candidate that could
+            # still tie the N-th score is scored
+            return len(best) >= top_n and bounds[i] < best[0]
+        
+        pos = 0
+        with tqdm(total=len(order), desc=f"Enhanced Screening (top {top_n})") as progress:
+            while pos < len(order) and not hopeless(order[pos]):
+                # Score one wave per engine width concurrently; the cutoff is
+                # tightened between waves, so a wave may score a few extra
+                wave = order[pos:pos + engine.max_workers]
+                pos += len(wave)
+                for result in self.score_candidates([rows[i] for i in wave], engine):
+                    results.append(result)
+                    if len(best) < top_n:
+                        heapq.heappush(best, result['composite_score'])
+                    elif result['composite_score'] > best[0]:
+                        heapq.heapreplace(best, result['composite_score'])
+                progress.update(len(wave))
+        
+        pruned = [rows[i] for i in order[pos:]]
+        self.pruning_stats = {
+            'candidates': len(candidates),
+            'scored': pos,
+            'pruned': len(pruned),
+            'cutoff_score': float(best[0]) if best else None,
+            'lookups_avoided': 4 * len(pruned),
+            'remote_lookups_avoided': sum(self.remote_lookups(row) for row in pruned),
+        }
+        s = self.pruning_stats
+        logger.info(f"✂️ Scored {s['scored']}/{s['candidates']} candidates (top-{top_n} cutoff {s['cutoff_score']}); "
+                    f"skipped {s['lookups_avoided']} lookups, {s['remote_lookups_avoided']} of them remote")
+        return results
+    
+    def run_screening(self, top_n: int = 50, bounded: bool = False) -> pd.DataFrame:
+        """
+        Run enhanced screening. With bounded=True only candidates that can
+        still reach the top `top_n` are fully analyzed (see screen_top_n);
+        the output then holds the scored candidates only.
+        """
         logger.info("🔍 Running Enhanced Smart Money Screening...")
         
         # Merge volume and holdings data
@@ -442,36 +710,20 @@ class EnhancedSmartMoneyScreener:
         
         logger.info(f"📊 Pre-filtered to {len(filtered)} candidates")
         
-        results = []
+        # Technicals and RS for all candidates at once from local prices
+        self.precompute_local_analysis(filtered['ticker'].tolist())
         
-        for idx, row in tqdm(filtered.iterrows(), total=len(filtered), desc="Enhanced Screening"):
-            ticker = row['ticker']
-            
-            # Get all analyses
-            tech = self.get_technical_analysis(ticker)
-            fund = self.get_fundamental_analysis(ticker)
-            analyst = self.get_analyst_ratings(ticker)
-            rs = self.get_relative_strength(ticker)
-            
-            # Calculate composite score
-            composite_score, grade = self.calculate_composite_score(row, tech, fund, analyst, rs)
-            
-            result = {
-                'ticker': ticker,
-                'name': analyst.get('company_name', ticker),
-                'composite_score': composite_score,
-                'grade': grade,
-                # ... Add all other fields ...
-                'sd_score': row.get('supply_demand_score', 50),
-                'inst_score': row.get('institutional_score', 50),
-                'tech_score': tech['technical_score'],
-                'fund_score': fund['fundamental_score'],
-                'analyst_score': analyst['analyst_score'],
-                'rs_score': rs['rs_score'],
-                'current_price': analyst['current_price'],
-                'target_upside': analyst['upside_pct']
-            }
-            results.append(result)
+        # Remaining lookups (.info, plus history for tickers missing locally)
+        # run concurrently, paced by the shared Yahoo rate limit
+        engine = FetchEngine('yahoo')
+        if bounded and top_n > 0:
+            results = self.screen_top_n(filtered, top_n, engine)
+        else:
+            rows = [row for _, row in filtered.iterrows()]
+            results = self.score_candidates(rows, engine, desc="Enhanced Screening")
+        
+        self.fundamentals.save()
+        log_host_stats()
         
         # Create DataFrame and sort
         results_df = pd.DataFrame(results)
@@ -480,7 +732,7 @@ class EnhancedSmartMoneyScreener:
         
         return results_df
     
-    def run(self, top_n: int = 50) -> pd.DataFrame:
+    def run(self, top_n: int = 50, bounded: bool = False) -> pd.DataFrame:
         """Main execution"""
         logger.info("🚀 Starting Enhanced Smart Money Screener v2.0...")
         
@@ -488,7 +740,7 @@ class EnhancedSmartMoneyScreener:
             logger.error("❌ Failed to load data")
             return pd.DataFrame()
         
-        results_df = self.run_screening(top_n)
+        results_df = self.run_screening(top_n, bounded)
         
         # Save results
         results_df.to_csv(self.output_file, index=False)
@@ -502,10 +754,14 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--dir', default='.')
     parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--remote-prices', action='store_true',
+                        help='Fetch technicals/RS history from yfinance instead of the local price store')
+    parser.add_argument('--bounded', action='store_true',
+                        help='Only fully analyze candidates that can still reach the top --top (skips hopeless lookups)')
     args = parser.parse_args()
     
-    screener = EnhancedSmartMoneyScreener(data_dir=args.dir)
-    results = screener.run(top_n=args.top)
+    screener = EnhancedSmartMoneyScreener(data_dir=args.dir, use_local_prices=not args.remote_prices)
+    results = screener.run(top_n=args.top, bounded=args.bounded)
     
     if not results.empty:
         print(f"\\n[RESULTS] TOP {args.top} ENHANCED SMART MONEY PICKS")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Support / Resistance Levels
+Pivot detection with centred rolling min/max and single-pass level clustering,
+with clusters ranked by touch count and traded volume. Works on plain numpy
+arrays, so the technical-indicators endpoint and the benchmark share one code
+path.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def find_pivots(low: np.ndarray, high: np.ndarray, window: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bar indices of pivot lows (minimum of the centred 2*window+1 neighbourhood)
+    and pivot highs (maximum of it). Bars closer than `window` to either end
+    are never pivots. O(n) regardless of window size.
+    """
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    n = len(low)
+    if n <= 2 * window:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    span = 2 * window + 1
+    low_min = pd.Series(low).rolling(span, center=True, min_periods=1).min().to_numpy()
+    high_max = pd.Series(high).rolling(span, center=True, min_periods=1).max().to_numpy()
+
+    interior = np.zeros(n, dtype=bool)
+    interior[window:n - window] = True
+    return np.flatnonzero(interior & (low == low_min)), np.flatnonzero(interior & (high == high_max))
+
+
+def cluster_levels(prices: np.ndarray, volumes: Optional[np.ndarray] = None, bars: Optional[np.ndarray] = None,
+                   threshold: float = 0.02) -> List[Dict]:
+    """
+    Group pivot prices that lie within `threshold` of their cluster's lowest
+    price, in one pass over the sorted prices (non-positive prices are skipped). Each cluster reports:
+      level     - volume-weighted mean price (plain mean without volume)
+      touches   - number of pivots in the cluster
+      volume    - volume traded on those pivot bars
+      strength  - touches weighted by each pivot's volume relative to the
+                  median pivot volume (= touches without volume)
+      last_bar  - most recent pivot bar index (recency tie-break)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    volumes = np.ones_like(prices) if volumes is None else np.nan_to_num(np.asarray(volumes, dtype=np.float64))
+    bars = np.arange(len(prices)) if bars is None else np.asarray(bars)
+
+    # Zero/negative/NaN prices (bad or placeholder rows) are not levels, and a
+    # zero anchor would divide by zero below
+    valid = np.isfinite(prices) & (prices > 0)
+    if not valid.all():
+        prices, volumes, bars = prices[valid], volumes[valid], bars[valid]
+    if len(prices) == 0:
+        return []
+
+    order = np.argsort(prices, kind='stable')
+    p, v, b = prices[order], volumes[order], bars[order]
+
+    # Cluster starts: walk the sorted prices once, opening a new cluster when a
+    # price is `threshold` or more above the current cluster's first price
+    starts = [0]
+    anchor = p[0]
+    for i in range(1, len(p)):
+        if (p[i] - anchor) / anchor >= threshold:
+            starts.append(i)
+            anchor = p[i]
+    starts = np.asarray(starts)
+
+    touches = np.diff(np.r_[starts, len(p)])
+    vol_sum = np.add.reduceat(v, starts)
+    weighted = np.add.reduceat(p * v, starts)
+    plain = np.add.reduceat(p, starts) / touches
+    level = np.where(vol_sum > 0, weighted / np.where(vol_sum > 0, vol_sum, 1), plain)
+
+    median = np.median(v)
+    rel = v / median if median > 0 else np.ones_like(v)
+    strength = np.add.reduceat(rel, starts)
+    last_bar = np.maximum.reduceat(b, starts)
+
+    return [
+        {'level': round(float(lv), 2), 'touches': int(t), 'volume': float(vs),
+         'strength': round(float(s), 3), 'last_bar': int(lb)}
+        for lv, t, vs, s, lb in zip(level, touches, vol_sum, strength, last_bar)
+    ]
+
+
+def strongest(clusters: List[Dict], top: int = 5) -> List[Dict]:
+    """Top clusters by strength (most recent first on ties), returned in price order"""
+    ranked = sorted(clusters, key=lambda c: (c['strength'], c['last_bar']), reverse=True)[:top]
+    return sorted(ranked, key=lambda c: c['level'])
+
+
+def support_resistance(low: np.ndarray, high: np.ndarray, volume: Optional[np.ndarray] = None,
+                       window: int = 20, threshold: float = 0.02, top: int = 5) -> Dict[str, List[Dict]]:
+    """Strongest support and resistance clusters for one OHLC(V) series"""
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    sup_idx, res_idx = find_pivots(low, high, window)
+    vol = None if volume is None else np.asarray(volume, dtype=np.float64)
+    return {
+        'support': strongest(cluster_levels(low[sup_idx], None if vol is None else vol[sup_idx], sup_idx, threshold), top),
+        'resistance': strongest(cluster_levels(high[res_idx], None if vol is None else vol[res_idx], res_idx, threshold), top),
+    }
+
+
+def nearest_levels(close: float, levels: Dict[str, List[Dict]]) -> Dict[str, Optional[float]]:
+    """Closest support at or below and resistance at or above the close"""
+    supports = [c['level'] for c in levels['support'] if c['level'] <= close]
+    resistances = [c['level'] for c in levels['resistance'] if c['level'] >= close]
+    return {
+        'nearest_support': max(supports) if supports else None,
+        'nearest_resistance': min(resistances) if resistances else None,
+    }
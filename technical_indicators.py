@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Technical Indicators
+RSI, MACD, Bollinger Bands and support/resistance computed from local
+OHLCV arrays (PriceIndex slices), with an LRU of finished payloads keyed on
+(ticker, period, data version).
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from support_resistance import nearest_levels, support_resistance
+
+# yfinance-style period strings (plus the chart endpoint's short forms)
+PERIOD_DAYS = {
+    '5d': 5, '1m': 30, '1mo': 30, '3m': 90, '3mo': 90, '6m': 180, '6mo': 180,
+    '1y': 365, '2y': 365 * 2, '5y': 365 * 5, '10y': 365 * 10,
+}
+
+
+def period_start(period: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """First date covered by a period string; None for 'max'/'all'"""
+    now = now or datetime.now()
+    if period in ('max', 'all'):
+        return None
+    if period == 'ytd':
+        return datetime(now.year, 1, 1)
+    return now - timedelta(days=PERIOD_DAYS.get(period, 365))
+
+
+# ----------------------------------------------------------------------
+# Indicators
+# ----------------------------------------------------------------------
+def compute_indicators(arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """RSI(14), MACD(12, 26, 9) and Bollinger(20, 2) columns for one ticker"""
+    from ta.momentum import RSIIndicator
+    from ta.trend import MACD
+    from ta.volatility import BollingerBands
+
+    close = pd.Series(arrays['close'])
+    macd = MACD(close=close, window_slow=26, window_fast=12, window_sign=9)
+    bb = BollingerBands(close=close, window=20, window_dev=2)
+    return {
+        'rsi': RSIIndicator(close=close, window=14).rsi().to_numpy(),
+        'macd_line': macd.macd().to_numpy(),
+        'signal_line': macd.macd_signal().to_numpy(),
+        'macd_histogram': macd.macd_diff().to_numpy(),
+        'bb_upper': bb.bollinger_hband().to_numpy(),
+        'bb_middle': bb.bollinger_mavg().to_numpy(),
+        'bb_lower': bb.bollinger_lband().to_numpy(),
+    }
+
+
+def make_series(times: np.ndarray, values: np.ndarray) -> List[Dict]:
+    """[{time, value}] for the non-NaN points (Lightweight Charts line data)"""
+    mask = ~np.isnan(values)
+    return [{'time': t, 'value': round(v, 2)} for t, v in zip(times[mask].tolist(), values[mask].tolist())]
+
+
+def indicator_payload(ticker: str, arrays: Dict[str, np.ndarray]) -> Dict:
+    """Full /api/us/technical-indicators/<ticker> response body"""
+    ind = compute_indicators(arrays)
+    times = arrays['time']
+    levels = support_resistance(arrays['low'], arrays['high'], arrays.get('volume'))
+    return {
+        'ticker': ticker,
+        'rsi': make_series(times, ind['rsi']),
+        'macd': {
+            'macd_line': make_series(times, ind['macd_line']),
+            'signal_line': make_series(times, ind['signal_line']),
+            'histogram': make_series(times, ind['macd_histogram'])
+        },
+        'bollinger': {
+            'upper': make_series(times, ind['bb_upper']),
+            'middle': make_series(times, ind['bb_middle']),
+            'lower': make_series(times, ind['bb_lower'])
+        },
+        'support_resistance': {
+            'support': [c['level'] for c in levels['support']],
+            'resistance': [c['level'] for c in levels['resistance']],
+            'clusters': levels
+        }
+    }
+
+
+def indicator_summary(ticker: str, payload: Dict, arrays: Dict[str, np.ndarray]) -> Dict:
+    """Latest values only, for table badges"""
+    def last(series):
+        return series[-1]['value'] if series else None
+
+    close = round(float(arrays['close'][-1]), 2)
+    rsi = last(payload['rsi'])
+    hist = last(payload['macd']['histogram'])
+    upper, lower = last(payload['bollinger']['upper']), last(payload['bollinger']['lower'])
+
+    if upper is None or lower is None:
+        bb_position = None
+    else:
+        bb_position = 'above' if close > upper else ('below' if close < lower else 'inside')
+
+    return {
+        'ticker': ticker,
+        'time': int(arrays['time'][-1]),
+        'close': close,
+        'rsi': rsi,
+        'rsi_signal': None if rsi is None else ('overbought' if rsi >= 70 else ('oversold' if rsi <= 30 else 'neutral')),
+        'macd_histogram': hist,
+        'macd_signal': None if hist is None else ('bullish' if hist > 0 else 'bearish'),
+        'bb_position': bb_position,
+        **nearest_levels(close, payload['support_resistance']['clusters']),
+    }
+
+
+class IndicatorCache:
+    """Thread-safe LRU of computed payloads"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items: 'OrderedDict[Hashable, object]' = OrderedDict()
+
+    def get(self, key: Hashable, build: Callable[[], object]):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        value = build()
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
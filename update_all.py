@@ -1,40 +1,229 @@
 #!/usr/bin/env python3
-import os, sys, subprocess, time, argparse
+import os, sys, json, hashlib, subprocess, time, argparse, threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
+MANIFEST_FILE = "pipeline_manifest.json"
+PRICE_INDEX = "us_daily_prices/_index.json"
+
+# (script, description, timeout, inputs, outputs, hosts)
+# Edges come from the files: a stage waits for every earlier stage that writes
+# one of its inputs or outputs, so the list order must stay topological.
+# `hosts` are the rate-limited upstreams a stage calls. fetch_engine limiters
+# only pace calls within one process, so a host is held by one running stage
+# at a time; a stage whose hosts are busy waits for them, not for its
+# predecessors in the list.
 scripts = [
-    ("create_us_daily_prices.py", "Data Collection", 1800),
-    ("analyze_volume.py", "Volume Analysis", 600),
-    ("analyze_13f.py", "Institutional Analysis", 1800),
-    ("analyze_etf_flows.py", "ETF Analysis", 600),
-    ("insider_tracker.py", "Insider Analysis", 600),
-    ("smart_money_screener_v2.py", "Screening", 600),
-    ("sector_heatmap.py", "Heatmap", 300),
-    ("options_flow.py", "Options", 300),
-    ("ai_summary_generator.py", "AI summaries", 1800),
-    ("final_report_generator.py", "Final Report", 300),
-    ("macro_analyzer.py", "Macro Analysis", 600),
-    ("economic_calendar.py", "Calendar", 300)
+    ("create_us_daily_prices.py", "Data Collection", 1800,
+     [], ["us_daily_prices/_index.json", "us_stocks_list.csv"], ["yahoo"]),
+    ("analyze_volume.py", "Volume Analysis", 600,
+     ["us_daily_prices/_index.json"], ["us_volume_analysis.csv", "us_volume_state.parquet"], []),
+    ("analyze_13f.py", "Institutional Analysis", 1800,
+     ["us_stocks_list.csv", "us_daily_prices/_index.json"], ["us_13f_holdings.csv", "fundamentals_cache.json"],
+     ["yahoo"]),
+    ("analyze_etf_flows.py", "ETF Analysis", 600,
+     [], ["us_etf_flows.csv", "etf_flow_analysis.json"], ["yahoo", "gemini"]),
+    ("insider_tracker.py", "Insider Analysis", 600,
+     [], ["insider_moves.json"], ["yahoo"]),
+    ("smart_money_screener_v2.py", "Screening", 600,
+     ["us_volume_analysis.csv", "us_13f_holdings.csv", "us_etf_flows.csv",
+      "us_daily_prices/_index.json", "fundamentals_cache.json"],
+     ["smart_money_picks_v2.csv", "fundamentals_cache.json"], ["yahoo"]),
+    ("sector_heatmap.py", "Heatmap", 300,
+     [], ["sector_heatmap.json"], ["yahoo"]),
+    ("options_flow.py", "Options", 300,
+     [], ["options_flow.json"], ["yahoo"]),
+    ("ai_summary_generator.py", "AI summaries", 600,
+     ["smart_money_picks_v2.csv"], ["ai_summaries.json"], ["gemini", "google_news"]),
+    ("final_report_generator.py", "Final Report", 300,
+     ["smart_money_picks_v2.csv", "ai_summaries.json"], ["final_top10_report.json", "smart_money_current.json"], []),
+    ("macro_analyzer.py", "Macro Analysis", 600,
+     [], ["macro_analysis.json", "macro_analysis_en.json"], ["yahoo", "gemini", "google_news"]),
+    ("economic_calendar.py", "Calendar", 300,
+     [], ["weekly_calendar.json"], ["yahoo", "gemini"])
 ]
 
+_print_lock = threading.Lock()
+
+def log(msg):
+    with _print_lock:
+        print(msg, flush=True)
+
+def fingerprint(path):
+    """Content hash of a file; the price index uses the store's row watermark"""
+    if not os.path.exists(path):
+        return None
+    if path == PRICE_INDEX:
+        from price_store import PriceStore
+        return PriceStore('.').watermark()
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest():
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest):
+    tmp = MANIFEST_FILE + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, MANIFEST_FILE)
+
+def stage_inputs(name, inputs):
+    """Fingerprinted inputs of a stage: its declared files plus the script itself"""
+    return {path: fingerprint(path) for path in [name] + inputs}
+
+def why_run(name, inputs, outputs, manifest, force):
+    """Reason a stage must run, or None when it can be skipped"""
+    if name in force:
+        return "forced"
+    if not inputs:
+        return "source stage (no declared inputs)"
+    entry = manifest.get(name)
+    if not entry:
+        return "no previous successful run"
+    missing = [p for p in outputs if not os.path.exists(p)]
+    if missing:
+        return f"output missing: {', '.join(missing)}"
+    current = stage_inputs(name, inputs)
+    changed = [p for p, h in current.items() if entry['inputs'].get(p) != h]
+    if changed:
+        return f"changed: {', '.join(changed)}"
+    return None
+
+def build_dag(stages):
+    """Map each script to the scripts it must wait for (shared files)"""
+    deps = {}
+    writers = {}  # file -> scripts writing it so far (list order)
+    for name, _, _, inputs, outputs, _ in stages:
+        deps[name] = set()
+        for path in inputs + outputs:
+            deps[name].update(writers.get(path, []))
+        for path in outputs:
+            writers.setdefault(path, []).append(name)
+    return deps
+
 def run_script(name, desc, timeout):
-    print(f"Running {desc}...")
+    log(f"Running {desc}...")
     try:
         subprocess.run([sys.executable, name], timeout=timeout, check=True)
-        print("[DONE]")
+        log(f"[DONE] {desc}")
+        return True
     except Exception as e:
-        print(f"[FAILED] {e}")
+        log(f"[FAILED] {desc}: {e}")
+        return False
+
+def run_dag(stages, workers, manifest=None, force=()):
+    """
+    Run stages as soon as their dependencies finish and their hosts are free;
+    returns per-stage timings.
+    With a manifest, a stage is skipped when its inputs match its last
+    successful run. The check happens at dispatch time, so a stage whose
+    upstream just rewrote an input still runs.
+    """
+    deps = build_dag(stages)
+    by_name = {s[0]: s for s in stages}
+    pending = [s[0] for s in stages]
+    timings = {}
+    reasons = {}
+    lock = threading.Lock()
+    t0 = time.time()
+
+    def task(name):
+        _, desc, timeout, inputs, outputs, _ = by_name[name]
+        start = time.time() - t0
+        if manifest is not None:
+            reasons[name] = why_run(name, inputs, outputs, manifest, force)
+            if reasons[name] is None:
+                log(f"[SKIPPED] {desc}: inputs unchanged since {manifest[name]['finished']}")
+                timings[name] = (start, start, 'skipped')
+                return
+        ok = run_script(name, desc, timeout)
+        if ok and manifest is not None:
+            # Fingerprints are taken after the run so files a stage both reads
+            # and writes (fundamentals_cache.json) do not retrigger it
+            with lock:
+                manifest[name] = {'inputs': stage_inputs(name, inputs),
+                                  'finished': datetime.now().isoformat(timespec='seconds')}
+                save_manifest(manifest)
+        timings[name] = (start, time.time() - t0, 'ok' if ok else 'FAILED')
+
+    running = {}
+    busy = set()  # hosts held by running stages
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            # A failed stage still releases its dependents: they run on the
+            # previous outputs, as the serial runner did
+            ready = [n for n in pending if deps[n].issubset(timings)]
+            for name in ready:
+                hosts = set(by_name[name][5])
+                if len(running) >= workers or hosts & busy:
+                    continue
+                pending.remove(name)
+                busy |= hosts
+                running[pool.submit(task, name)] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                busy -= set(by_name[running.pop(future)][5])
+
+    return deps, timings, reasons
+
+def critical_path(stages, deps, timings):
+    """Longest chain of stage durations through the DAG"""
+    best = {}
+    for name, *_ in stages:  # list order is a topological order
+        if name not in timings:
+            continue
+        start, end, _ = timings[name]
+        prev = max((best[d] for d in deps[name] if d in best), key=lambda b: b[0], default=(0.0, []))
+        best[name] = (prev[0] + end - start, prev[1] + [name])
+    return max(best.values(), key=lambda b: b[0], default=(0.0, []))
+
+def report(stages, deps, timings, reasons, wall):
+    desc = {s[0]: s[1] for s in stages}
+    log("\nStage timings:")
+    for name, *_ in stages:
+        if name in timings:
+            start, end, status = timings[name]
+            why = f"  ({reasons[name]})" if reasons.get(name) else ""
+            log(f"  {desc[name]:<24} {start:7.1f}s -> {end:7.1f}s  {end - start:7.1f}s  {status}{why}")
+    skipped = [desc[n] for n, t in timings.items() if t[2] == 'skipped']
+    if skipped:
+        log(f"Skipped (inputs unchanged): {', '.join(skipped)}")
+    length, path = critical_path(stages, deps, timings)
+    serial = sum(end - start for start, end, _ in timings.values())
+    log(f"\nCritical path ({length/60:.1f} min): " + " -> ".join(desc[n] for n in path))
+    log(f"Serial stage time: {serial/60:.1f} min, wall time: {wall/60:.1f} min")
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--quick', action='store_true')
+    parser.add_argument('--workers', type=int, default=4, help='Stages run concurrently (1 = serial)')
+    parser.add_argument('--make', action='store_true',
+                        help=f'Skip stages whose inputs are unchanged since their last successful run ({MANIFEST_FILE})')
+    parser.add_argument('--force', nargs='+', default=[], metavar='STAGE',
+                        help='Always run these stages (script name, with or without .py); implies --make')
     args = parser.parse_args()
-    
+
+    stages = [s for s in scripts if not (args.quick and "AI" in s[1])]
+    force = {f if f.endswith('.py') else f + '.py' for f in args.force}
+    unknown = force - {s[0] for s in scripts}
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
     start = time.time()
-    for name, desc, timeout in scripts:
-        if args.quick and "AI" in desc: continue
-        run_script(name, desc, timeout)
-        
-    print(f"Total time: {(time.time()-start)/60:.1f} min")
+    manifest = load_manifest() if args.make or force else None
+    deps, timings, reasons = run_dag(stages, max(1, args.workers), manifest, force)
+    wall = time.time() - start
+
+    report(stages, deps, timings, reasons, wall)
+    print(f"Total time: {wall/60:.1f} min")
 
 if __name__ == "__main__":
     main()